@@ -0,0 +1,88 @@
+"""
+Lolipop benchmark comparison
+
+Diffs two result files written by benchmarks/suite.py and flags
+benchmarks whose median (or --metric) got slower or faster by more than a
+threshold.
+
+Usage:
+    python benchmarks/compare.py old.json new.json [--threshold 10]
+                                 [--metric median_ms|min_ms|mean_ms]
+
+Exit code is non-zero when any benchmark regressed, so it can gate CI.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def load(path: Path) -> dict:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if "results" not in data:
+        raise SystemExit(f"{path}: not a benchmark result file")
+    return data
+
+
+def compare(
+    old: dict, new: dict, threshold: float, metric: str = "median_ms"
+) -> tuple[list[tuple], bool]:
+    rows = []
+    regressed = False
+    names = list(old["results"]) + [n for n in new["results"] if n not in old["results"]]
+
+    for name in names:
+        a = old["results"].get(name)
+        b = new["results"].get(name)
+        if a is None or b is None:
+            rows.append((name, a and a[metric], b and b[metric], None, "added" if a is None else "removed"))
+            continue
+        before, after = a[metric], b[metric]
+        change = (after - before) / before * 100 if before else 0.0
+        if change > threshold:
+            status = "SLOWER"
+            regressed = True
+        elif change < -threshold:
+            status = "faster"
+        else:
+            status = ""
+        rows.append((name, before, after, change, status))
+
+    return rows, regressed
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("old", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument(
+        "--threshold", type=float, default=10.0,
+        help="Percent change to report (default 10)",
+    )
+    parser.add_argument(
+        "--metric", choices=("median_ms", "min_ms", "mean_ms"), default="median_ms",
+    )
+    args = parser.parse_args(argv)
+
+    old, new = load(args.old), load(args.new)
+    for label, data in (("old", old), ("new", new)):
+        meta = data.get("meta", {})
+        print(f"{label}: {meta.get('commit') or '?'} {meta.get('timestamp', '')} python {meta.get('python', '?')}")
+    print()
+
+    rows, regressed = compare(old, new, args.threshold, args.metric)
+    width = max((len(r[0]) for r in rows), default=10)
+    print(f"{'benchmark':<{width}}  {'old ms':>10}  {'new ms':>10}  {'change':>8}")
+    for name, before, after, change, status in rows:
+        fmt = lambda v: f"{v:10.3f}" if v is not None else f"{'-':>10}"
+        pct = f"{change:+7.1f}%" if change is not None else f"{'':>8}"
+        print(f"{name:<{width}}  {fmt(before)}  {fmt(after)}  {pct}  {status}")
+
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Lolipop env reuse check
+
+Regression check that an environment survives being resolved again.
+For each version spec, a fresh process resolves the env (creating it),
+then a second process resolves it again, the way two consecutive
+`lolipop run`s do. The second resolve must reuse the env as is: same
+manifest created_at, same pyvenv.cfg inode, no "recreating it" warning.
+
+Range specs (>=3.10, 3.X.*, >=3.10,<4) are covered explicitly: env
+validation once compared them as version prefixes and rebuilt such
+envs on every run.
+
+Usage:
+    python benchmarks/env_reuse_check.py [--spec '>=3.10' ...]
+
+Exit code is non-zero if any env was recreated.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+
+def _default_specs() -> list[str]:
+    major, minor = sys.version_info[:2]
+    return [">=3.10", f"{major}.{minor}.*", ">=3.10,<4", f"{major}.{minor}"]
+
+
+# -------------------------
+# Worker (runs with HOME set to the fixture dir)
+# -------------------------
+def worker(name: str, spec: str) -> None:
+    from lolipop.handlers import env_manifest
+    from lolipop.handlers.environment import resolve_environment
+
+    path = resolve_environment({"name": name, "version": spec})
+    manifest = env_manifest.read_manifest(path) or {}
+    print(json.dumps({
+        "created_at": manifest.get("created_at"),
+        "inode": (path / "pyvenv.cfg").stat().st_ino,
+    }))
+
+
+def _resolve(home: Path, name: str, spec: str) -> tuple[dict, str]:
+    env = os.environ.copy()
+    env.update(
+        HOME=str(home),
+        PYTHONPATH=os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")])),
+        LOLIPOP_NO_DAEMON="1",
+    )
+    proc = subprocess.run(
+        [sys.executable, __file__, "--worker", name, "--spec", spec],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip() or proc.stdout.strip())
+    lines = proc.stdout.strip().splitlines()
+    return json.loads(lines[-1]), proc.stdout + proc.stderr
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--spec", action="append", help="Version spec to check (repeatable)")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        worker(args.worker, args.spec[0])
+        return 0
+
+    failed = False
+    with tempfile.TemporaryDirectory(prefix="lolipop-envcheck-") as tmp:
+        home = Path(tmp)
+        for i, spec in enumerate(args.spec or _default_specs()):
+            name = f"reuse-{i}"
+            try:
+                first, _ = _resolve(home, name, spec)
+                second, output = _resolve(home, name, spec)
+            except RuntimeError as e:
+                print(f"[{spec}] FAIL: {e}")
+                failed = True
+                continue
+
+            problems = []
+            if "recreating" in output:
+                problems.append("recreated on second resolve")
+            if first != second:
+                problems.append(f"env changed: {first} -> {second}")
+            print(f"[{spec}] {'FAIL: ' + '; '.join(problems) if problems else 'ok'}")
+            failed = failed or bool(problems)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""
+Lolipop registry stress check
+
+Starts many lolipop writer processes at once against one throwaway data
+dir and checks that nothing was lost or corrupted. Every writer:
+
+- registers a few projects, most of them shared with other writers
+- records events on them and switches the active project
+- marks a project as opened and lists all projects
+
+Afterwards it asserts:
+- the registry passes PRAGMA integrity_check and holds exactly one row
+  per project, all of them listed
+- every event-log line is a whole, valid JSON event and the index
+  matches the log
+- each log holds exactly the events written to it (init + recorded),
+  and the total record count matches
+- no temp files are left behind
+
+A second round forces history compaction during the appends and checks
+the same, with per-log counts bounded by the retention policy instead
+of exact.
+
+Usage:
+    python benchmarks/registry_stress.py [--writers 200] [--events 10]
+                                         [--projects 8]
+
+Exit code is non-zero on any lost update or corruption, so this runs
+as an automated check (e.g. in CI), not only as a benchmark.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+
+# -------------------------
+# Worker (runs with HOME set to the fixture dir)
+# -------------------------
+def worker(index: int, projects: int, events: int, root: Path) -> None:
+    from lolipop.handlers import project_tracker as tracker
+
+    names = [f"shared-{(index + k) % projects}" for k in range(3)]
+    names.append(f"own-{index}")
+    for name in names:
+        tracker.register_project(root / name, activate=False)
+    for i in range(events):
+        name = names[i % len(names)]
+        tracker.record_event(name, "stress", {"writer": index, "n": i})
+        if i % 3 == 0:
+            tracker.set_active_project(name)
+    tracker.mark_opened_in_vscode(names[0])
+    tracker.list_projects()
+
+
+def _project_dirs(root: Path, writers: int, projects: int) -> None:
+    for name in [f"shared-{i}" for i in range(projects)] + [f"own-{i}" for i in range(writers)]:
+        (root / name).mkdir(parents=True, exist_ok=True)
+
+
+def _spawn(home: Path, args: argparse.Namespace, extra_env: dict) -> list[str]:
+    env = os.environ.copy()
+    env.update(
+        HOME=str(home),
+        PYTHONPATH=os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")])),
+        LOLIPOP_NO_DAEMON="1",
+        **extra_env,
+    )
+    root = home / "projects"
+    procs = [
+        subprocess.Popen(
+            [
+                sys.executable, __file__,
+                "--worker", str(i),
+                "--projects", str(args.projects),
+                "--events", str(args.events),
+                "--root", str(root),
+            ],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        for i in range(args.writers)
+    ]
+    failures = []
+    for i, proc in enumerate(procs):
+        _, stderr = proc.communicate()
+        if proc.returncode != 0:
+            failures.append(f"writer {i} exited {proc.returncode}:\n{stderr.strip()}")
+    return failures
+
+
+# -------------------------
+# Checks (run in a child with the same HOME)
+# -------------------------
+def _expected_events(writers: int, projects: int, events: int) -> dict[str, int]:
+    """
+    Events each project's log must hold: one "init" plus every event
+    written to it.
+    """
+    expected = {f"shared-{i}": 1 for i in range(projects)}
+    expected.update({f"own-{i}": 1 for i in range(writers)})
+    for index in range(writers):
+        names = [f"shared-{(index + k) % projects}" for k in range(3)] + [f"own-{index}"]
+        for i in range(events):
+            expected[names[i % len(names)]] += 1
+    return expected
+
+
+def check(expect_exact: bool, writers: int, projects: int, events: int) -> list[str]:
+    """
+    Assertions on the final state; returns every failed one.
+    """
+    import sqlite3
+
+    from lolipop.handlers import project_tracker as tracker
+    from lolipop.handlers.event_log import INDEX_RECORD, RetentionPolicy
+
+    problems = []
+    expected = _expected_events(writers, projects, events)
+    wanted = set(expected)
+
+    # registry: intact, exactly one row per project, all listed
+    registry = tracker.get_registry()
+    with sqlite3.connect(registry.db_path) as conn:
+        integrity = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        rows = conn.execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+    if integrity != "ok":
+        problems.append(f"registry integrity_check: {integrity}")
+    if rows != len(wanted):
+        problems.append(f"registry has {rows} rows, expected {len(wanted)}")
+    listed = {p["name"] for p in tracker.list_projects()}
+    if listed != wanted:
+        problems.append(
+            f"registry lists {len(listed)} projects, expected {len(wanted)}"
+            f" (missing: {sorted(wanted - listed)[:5]})"
+        )
+
+    # event logs: every line whole and valid JSON, index matching the log,
+    # record counts exact (or within retention when compacting)
+    policy = RetentionPolicy.from_env()
+    limit = int(policy.max_events * (1 + policy.compact_slack)) if policy.max_events else None
+    total = 0
+    for name in sorted(wanted):
+        log = tracker.event_log(name)
+        lines = log.log_path.read_bytes().splitlines(keepends=True) if log.exists() else []
+        total += len(lines)
+        for number, line in enumerate(lines, 1):
+            if not line.endswith(b"\n"):
+                problems.append(f"{name}: torn line {number}")
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                problems.append(f"{name}: line {number} is not valid JSON")
+                continue
+            if not isinstance(event, dict) or "timestamp" not in event or "action" not in event:
+                problems.append(f"{name}: line {number} is not an event")
+
+        offsets = [o for _, o in INDEX_RECORD.iter_unpack(log.index_path.read_bytes())] if lines else []
+        actual = []
+        pos = 0
+        for line in lines:
+            actual.append(pos)
+            pos += len(line)
+        if offsets != actual:
+            problems.append(f"{name}: index does not match log")
+
+        if expect_exact and len(lines) != expected[name]:
+            problems.append(f"{name}: {len(lines)} events, expected {expected[name]}")
+        if not expect_exact and limit is not None and len(lines) > limit:
+            problems.append(f"{name}: {len(lines)} events, retention allows {limit}")
+
+    if expect_exact and total != sum(expected.values()):
+        problems.append(f"{total} event records in total, expected {sum(expected.values())}")
+
+    leftovers = [p for p in tracker.HISTORY_DIR.parent.rglob("*.tmp")]
+    if leftovers:
+        problems.append(f"temp files left: {[str(p) for p in leftovers]}")
+    return problems
+
+
+def _check(home: Path, args: argparse.Namespace, exact: bool) -> list[str]:
+    env = os.environ.copy()
+    env.update(
+        HOME=str(home),
+        PYTHONPATH=os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")])),
+        LOLIPOP_NO_DAEMON="1",
+    )
+    proc = subprocess.run(
+        [
+            sys.executable, __file__, "--check",
+            "--writers", str(args.writers),
+            "--projects", str(args.projects),
+            "--events", str(args.events),
+            *(["--exact"] if exact else []),
+        ],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        return [f"check failed:\n{proc.stderr.strip()}"]
+    return json.loads(proc.stdout)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writers", type=int, default=200)
+    parser.add_argument("--events", type=int, default=10, help="Events per writer")
+    parser.add_argument("--projects", type=int, default=8, help="Shared projects")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--root", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--check", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--exact", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        worker(args.worker, args.projects, args.events, args.root)
+        return 0
+    if args.check:
+        print(json.dumps(check(args.exact, args.writers, args.projects, args.events)))
+        return 0
+
+    failed = False
+    rounds = (
+        ("appends", {}, True),
+        ("appends + compaction", {"LOLIPOP_HISTORY_MAX_EVENTS": "5"}, False),
+    )
+    for label, extra_env, exact in rounds:
+        with tempfile.TemporaryDirectory(prefix="lolipop-stress-") as tmp:
+            home = Path(tmp)
+            _project_dirs(home / "projects", args.writers, args.projects)
+            start = time.perf_counter()
+            problems = _spawn(home, args, extra_env)
+            elapsed = time.perf_counter() - start
+            problems += _check(home, args, exact)
+
+        status = "FAIL" if problems else "ok"
+        print(f"[{label}] {args.writers} writers x {args.events} events in {elapsed:.1f}s: {status}")
+        for problem in problems[:20]:
+            print(f"  {problem}")
+        failed = failed or bool(problems)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
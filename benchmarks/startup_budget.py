@@ -0,0 +1,108 @@
+"""
+Lolipop startup budget check
+
+Measures cold import cost of the `lolipop` entrypoint with
+`python -X importtime` and fails when it goes over budget, or when
+modules that only specific commands need are imported at startup.
+
+Usage:
+    python benchmarks/startup_budget.py [--budget-ms 120] [--runs 5]
+
+Exit code is non-zero on regression, so it can run in CI.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+DEFAULT_BUDGET_MS = float(os.environ.get("LOLIPOP_STARTUP_BUDGET_MS", "120"))
+
+# Must never be imported just to build the CLI
+FORBIDDEN = (
+    "git",
+    "yaml",
+    "tomllib",
+    "rich.console",
+    "lolipop.commands.init",
+    "lolipop.commands.run",
+    "lolipop.commands.project",
+    "lolipop.handlers.project_tracker",
+    "lolipop.clients.git_client",
+)
+
+
+def measure(entry: str = "import lolipop.main") -> tuple[float, dict[str, int]]:
+    """
+    Returns (cumulative ms of the top-level import, {module: cumulative us}).
+    """
+    env = os.environ.copy()
+    env["PYTHONPATH"] = f"{SRC_DIR}{os.pathsep}{env.get('PYTHONPATH', '')}"
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", entry],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    modules: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            modules[name.strip()] = int(cumulative.strip())
+        except ValueError:
+            continue  # header line
+
+    total_us = modules.get("lolipop.main", 0)
+    return total_us / 1000, modules
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    # first run warms the bytecode cache, take the best of the rest
+    measure()
+    samples = []
+    modules: dict[str, int] = {}
+    for _ in range(max(1, args.runs)):
+        ms, modules = measure()
+        samples.append(ms)
+
+    best = min(samples)
+    print(f"lolipop.main import: best {best:.1f} ms over {len(samples)} runs "
+          f"(budget {args.budget_ms:.1f} ms)")
+
+    failed = False
+
+    leaked = [m for m in FORBIDDEN if m in modules]
+    if leaked:
+        failed = True
+        print("✖ imported at startup: " + ", ".join(leaked))
+
+    if best > args.budget_ms:
+        failed = True
+        print("✖ startup over budget; slowest imports:")
+        top = sorted(modules.items(), key=lambda kv: kv[1], reverse=True)[:10]
+        for name, us in top:
+            print(f"    {us / 1000:8.1f} ms  {name}")
+
+    if not failed:
+        print("✔ startup within budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
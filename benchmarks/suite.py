@@ -0,0 +1,350 @@
+"""
+Lolipop benchmark suite
+
+Times lolipop's hot paths against synthetic fixtures built offline:
+
+- registry: list_projects, set_active_project, record_event and
+  register_project on registries of 10, 1k and 10k projects
+- config: load_project_config on a small and a huge lolipop.yaml,
+  with the parse cache cold and warm
+- git: GitClient.info() on a local repo for each available backend
+- env: create_venv (template clone and plain `python -m venv`)
+
+Every group runs in its own subprocess with a throwaway HOME, so it
+never touches the real lolipop data dir and module-level paths point at
+the fixture.
+
+Usage:
+    python benchmarks/suite.py [--only registry,config] [--quick]
+                               [--output results.json]
+    python benchmarks/compare.py old.json new.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC_DIR = ROOT / "src"
+
+GROUPS = ("registry", "config", "git", "env")
+REGISTRY_SIZES = (10, 1_000, 10_000)
+FORMAT = 1
+
+Results = Dict[str, dict]
+
+
+# -------------------------
+# Timing
+# -------------------------
+def measure(fn: Callable[[], object], runs: int, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        fn()
+    times: List[float] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return _stats(times)
+
+
+def _stats(times: List[float]) -> dict:
+    return {
+        "runs": len(times),
+        "min_ms": round(min(times) * 1000, 4),
+        "median_ms": round(statistics.median(times) * 1000, 4),
+        "mean_ms": round(statistics.fmean(times) * 1000, 4),
+        "max_ms": round(max(times) * 1000, 4),
+    }
+
+
+# -------------------------
+# Fixtures
+# -------------------------
+def _synthetic_record(i: int, base: Path) -> dict:
+    name = f"project-{i:05d}"
+    now = datetime.now(timezone.utc).isoformat()
+    return {
+        "id": f"{i:040x}",
+        "name": name,
+        "path": str(base / name),
+        "created_at": now,
+        "last_seen": now,
+        "active": False,
+        "opened_in_vscode": False,
+        "environment": {"name": None, "path": None, "python_version": None},
+        "git": {"initialized": False, "remote": None, "branch": None, "commit": None, "dirty": False},
+        "config_files": {"lolipop.yaml": f"{i:064x}", "loli.yaml": None, "pyproject.toml": None, "requirements.txt": None},
+        "project_metadata": {"version": "0.1.0", "description": f"Synthetic project {i}", "author": "bench"},
+        "dependencies": ["requests", "rich"],
+        "features": {},
+        "templates_used": [],
+    }
+
+
+def _small_config() -> str:
+    return (
+        "name: small\n"
+        "version: 0.1.0\n"
+        "environment:\n  name: small-env\n  lang: python\n"
+        "dependencies: [requests, rich]\n"
+        "scripts:\n  run: [python main.py]\n"
+    )
+
+
+def _huge_config(entries: int) -> str:
+    lines = ["name: huge", "version: 1.0.0", "dependencies:"]
+    lines += [f"  - package-{i}>=1.{i % 10}" for i in range(entries // 10)]
+    lines.append("files:")
+    lines += [f"  src/module_{i}.py: |\n    # module {i}\n    VALUE = {i}" for i in range(entries)]
+    lines.append("setup:")
+    lines += [f"  - name: step-{i}\n    run: echo {i}\n    inputs: [src/module_{i}.py]" for i in range(entries // 10)]
+    return "\n".join(lines) + "\n"
+
+
+def _git(repo: Path, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True)
+
+
+def _git_fixture(repo: Path, files: int, commits: int) -> None:
+    repo.mkdir(parents=True)
+    _git(repo, "init", "-q", "-b", "main")
+    _git(repo, "config", "user.email", "bench@example.com")
+    _git(repo, "config", "user.name", "bench")
+    _git(repo, "remote", "add", "origin", "https://example.com/bench.git")
+    for c in range(commits):
+        for f in range(files):
+            if c == 0 or f % commits == c:
+                (repo / f"file_{f}.txt").write_text(f"{c}-{f}\n" * 20, encoding="utf-8")
+        _git(repo, "add", "-A")
+        _git(repo, "commit", "-q", "-m", f"commit {c}")
+    _git(repo, "pack-refs", "--all")
+
+
+# -------------------------
+# Groups (run inside a worker with HOME set to the fixture dir)
+# -------------------------
+def bench_registry(home: Path, runs: int, quick: bool) -> Results:
+    from lolipop.handlers import project_tracker as tracker
+
+    results: Results = {}
+    sizes = REGISTRY_SIZES[:2] if quick else REGISTRY_SIZES
+    registry = tracker.get_registry()
+    projects_dir = home / "projects"
+    filled = 0
+
+    for size in sizes:
+        registry.put_many(_synthetic_record(i, projects_dir) for i in range(filled, size))
+        filled = size
+        names = [f"project-{i:05d}" for i in range(size)]
+        rng = random.Random(size)
+
+        results[f"registry.list_projects[n={size}]"] = measure(tracker.list_projects, runs)
+        results[f"registry.set_active_project[n={size}]"] = measure(
+            lambda: tracker.set_active_project(rng.choice(names)), runs
+        )
+        results[f"registry.record_event[n={size}]"] = measure(
+            lambda: tracker.record_event(rng.choice(names), "bench", {"n": size}), runs
+        )
+
+        counter = iter(range(10**9))
+
+        def register():
+            project = home / "registered" / f"new-{size}-{next(counter)}"
+            project.mkdir(parents=True)
+            (project / "lolipop.yaml").write_text(_small_config(), encoding="utf-8")
+            tracker.register_project(project)
+
+        results[f"registry.register_project[n={size}]"] = measure(register, runs)
+
+    return results
+
+
+def bench_config(home: Path, runs: int, quick: bool) -> Results:
+    from lolipop.modules.config_loader import clear_config_cache, load_project_config
+
+    results: Results = {}
+    fixtures = {"small": _small_config(), "huge": _huge_config(2_000 if quick else 20_000)}
+
+    for label, text in fixtures.items():
+        project = home / f"config-{label}"
+        project.mkdir()
+        (project / "lolipop.yaml").write_text(text, encoding="utf-8")
+        size_kb = round(len(text.encode("utf-8")) / 1024, 1)
+
+        def cold():
+            clear_config_cache()
+            load_project_config(project)
+
+        cold_runs = max(1, runs // 5) if label == "huge" else runs
+        results[f"config.load[{label},cold]"] = {**measure(cold, cold_runs), "size_kb": size_kb}
+        results[f"config.load[{label},warm]"] = {
+            **measure(lambda: load_project_config(project), runs),
+            "size_kb": size_kb,
+        }
+
+    return results
+
+
+def bench_git(home: Path, runs: int, quick: bool) -> Results:
+    from lolipop.clients.git_client import BACKENDS, GITPYTHON_AVAILABLE, GitClient
+
+    results: Results = {}
+    repo = home / "repo"
+    _git_fixture(repo, files=50 if quick else 500, commits=5 if quick else 20)
+
+    for backend in BACKENDS:
+        if backend == "gitpython" and not GITPYTHON_AVAILABLE:
+            continue
+        results[f"git.info[{backend}]"] = measure(
+            lambda: GitClient(repo, backend=backend).info(), runs
+        )
+        results[f"git.info[{backend},no-dirty]"] = measure(
+            lambda: GitClient(repo, backend=backend).info(check_dirty=False), runs
+        )
+
+    return results
+
+
+def bench_env(home: Path, runs: int, quick: bool) -> Results:
+    from lolipop.handlers import environment
+
+    results: Results = {}
+    version = os.environ.get("LOLIPOP_BENCH_PYTHON_VERSION") or None
+    runs = 1 if quick else max(1, min(runs, 3))
+    counter = iter(range(10**9))
+
+    def create():
+        environment.create_venv(f"bench-{next(counter)}", version)
+
+    start = time.perf_counter()
+    create()  # builds the template
+    results["env.create_venv[first,template-build]"] = _stats([time.perf_counter() - start])
+    results["env.create_venv[template]"] = measure(create, runs, warmup=0)
+
+    os.environ["LOLIPOP_NO_VENV_TEMPLATE"] = "1"
+    try:
+        results["env.create_venv[python -m venv]"] = measure(create, runs, warmup=0)
+    finally:
+        del os.environ["LOLIPOP_NO_VENV_TEMPLATE"]
+
+    return results
+
+
+BENCHES = {
+    "registry": bench_registry,
+    "config": bench_config,
+    "git": bench_git,
+    "env": bench_env,
+}
+
+
+# -------------------------
+# Driver
+# -------------------------
+def _run_worker(group: str, runs: int, quick: bool) -> Results:
+    with tempfile.TemporaryDirectory(prefix=f"lolipop-bench-{group}-") as tmp:
+        out = Path(tmp) / "result.json"
+        home = Path(tmp) / "home"
+        home.mkdir()
+        env = os.environ.copy()
+        env.update(
+            HOME=str(home),
+            PYTHONPATH=os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")])),
+            LOLIPOP_NO_DAEMON="1",
+        )
+        env.pop("LOLIPOP_PROFILE", None)
+        cmd = [
+            sys.executable, __file__,
+            "--worker", group,
+            "--runs", str(runs),
+            "--output", str(out),
+        ]
+        if quick:
+            cmd.append("--quick")
+        proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{group} benchmarks failed:\n{proc.stderr.strip()}")
+        return json.loads(out.read_text(encoding="utf-8"))
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--only", help=f"Comma-separated groups ({', '.join(GROUPS)})")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--quick", action="store_true", help="Smaller fixtures, fewer runs")
+    parser.add_argument("--output", "-o", type=Path, help="Write results JSON here")
+    parser.add_argument("--worker", choices=GROUPS, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        home = Path(os.environ["HOME"])
+        results = BENCHES[args.worker](home, args.runs, args.quick)
+        args.output.write_text(json.dumps(results), encoding="utf-8")
+        return 0
+
+    groups = args.only.split(",") if args.only else list(GROUPS)
+    unknown = [g for g in groups if g not in GROUPS]
+    if unknown:
+        parser.error(f"unknown group(s): {', '.join(unknown)}")
+    runs = min(args.runs, 5) if args.quick else args.runs
+
+    report = {
+        "format": FORMAT,
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "quick": args.quick,
+        },
+        "results": {},
+    }
+
+    failed = False
+    for group in groups:
+        print(f"[{group}]", file=sys.stderr, flush=True)
+        try:
+            results = _run_worker(group, runs, args.quick)
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            failed = True
+            continue
+        for name, stats in results.items():
+            print(f"  {name:48} median {stats['median_ms']:10.3f} ms  min {stats['min_ms']:10.3f} ms",
+                  file=sys.stderr)
+        report["results"].update(results)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Lolipop venv creation benchmark
+
+Compares `python -m venv` with cloning a template venv
+(handlers/venv_template) in a scratch directory.
+
+Usage:
+    python benchmarks/venv_clone.py [--python python3] [--runs 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from lolipop.handlers.venv_template import clone_tree, ensure_template  # noqa: E402
+
+
+def _time(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--python", default=Path(sys.executable).name)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print JSON only")
+    args = parser.parse_args(argv)
+
+    results: dict[str, list[float]] = {"venv": [], "template_build": []}
+    with tempfile.TemporaryDirectory(prefix="lolipop-bench-") as tmp:
+        home = Path(tmp)
+
+        results["template_build"].append(
+            _time(lambda: ensure_template(home, args.python))
+        )
+        template = ensure_template(home, args.python)
+
+        for i in range(args.runs):
+            dest = home / f"venv-{i}"
+            results["venv"].append(
+                _time(lambda: subprocess.run(
+                    [args.python, "-m", "venv", str(dest)], check=True
+                ))
+            )
+
+        strategies = ("reflink", "hardlink", "copy")
+        for strategy in strategies:
+            key = f"clone_{strategy}"
+            results[key] = []
+            used = None
+            for i in range(args.runs):
+                dest = home / f"{key}-{i}"
+                start = time.perf_counter()
+                used = clone_tree(template, dest, strategy=strategy)
+                results[key].append(time.perf_counter() - start)
+            if used != strategy:
+                # the filesystem did not support it; report what ran instead
+                results[f"{key} (fell back to {used})"] = results.pop(key)
+
+    summary = {
+        name: {
+            "runs": len(times),
+            "median_ms": round(statistics.median(times) * 1000, 2),
+            "min_ms": round(min(times) * 1000, 2),
+        }
+        for name, times in results.items()
+    }
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return 0
+
+    for name, stats in summary.items():
+        print(f"{name:40} median {stats['median_ms']:9.2f} ms  min {stats['min_ms']:9.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,9 +4,16 @@ Lolipop - Utility and Dev tool
 utility for installation, setup, development, organising and more
 """
 
-# make the handlers, modules, commands etc available at package level
-from lolipop import handlers  # noqa: F401
-from lolipop import modules  # noqa: F401
-from lolipop import commands  # noqa: F401
+import importlib
 
-__all__ = ["handlers", "modules", "commands"]
\ No newline at end of file
+__all__ = ["handlers", "modules", "commands"]
+
+
+# make the handlers, modules, commands etc available at package level,
+# imported on first access so `import lolipop` stays cheap
+def __getattr__(name: str):
+    if name in __all__:
+        module = importlib.import_module(f"lolipop.{name}")
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module 'lolipop' has no attribute {name!r}")
@@ -1,37 +1,103 @@
 """
 Git client for Lolipop
 
-Uses GitPython when available and valid.
-Falls back to subprocess for resilience.
+Backends:
+- native (default): metadata read straight from .git files, no process
+  spawn or GitPython import; only the dirty check runs git
+- gitpython: used when available and valid
+- subprocess: plain git commands, for resilience
+
+The default can be overridden with LOLIPOP_GIT_BACKEND.
 """
 
 from pathlib import Path
 from typing import Dict, Any, Optional, TYPE_CHECKING
+import importlib.util
+import os
+import signal
 import subprocess
 
+from lolipop.clients import git_native
+from lolipop.modules.profiler import span, traced
+
 if TYPE_CHECKING:
     from git import Repo  # type-only import
 
-try:
-    import git
-    GITPYTHON_AVAILABLE = True
-except ImportError:
-    git = None
-    GITPYTHON_AVAILABLE = False
+# GitPython is heavy to import; only check it is installed here and
+# import it when a GitClient is actually created.
+GITPYTHON_AVAILABLE = importlib.util.find_spec("git") is not None
 
 
 class GitError(Exception):
     pass
 
 
+class GitTimeout(GitError):
+    pass
+
+
+BACKENDS = ("native", "gitpython", "subprocess")
+
+
+def run_git_in(
+    cwd: Path,
+    *args: str,
+    timeout: Optional[float] = None,
+    interactive: bool = True,
+) -> str:
+    """
+    Run git in any directory (also bare repos and clone targets'
+    parents). See GitClient.run_git.
+    """
+    env = None
+    if not interactive:
+        env = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+    with span(f"git {args[0] if args else ''}".rstrip(), cat="git"):
+        # own process group, so a timeout also kills ssh/helpers git spawned
+        proc = subprocess.Popen(
+            ["git", *args],
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            stdin=None if interactive else subprocess.DEVNULL,
+            text=True,
+            env=env,
+            start_new_session=timeout is not None and os.name == "posix",
+        )
+        try:
+            stdout, stderr = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            if os.name == "posix":
+                os.killpg(proc.pid, signal.SIGKILL)
+            else:
+                proc.kill()
+            proc.communicate()
+            raise GitTimeout(f"git {args[0] if args else ''} timed out after {timeout:.0f}s")
+    if proc.returncode != 0:
+        raise GitError(stderr.strip() or "Git command failed")
+    return stdout.strip()
+
+
 class GitClient:
-    def __init__(self, project_dir: Path):
+    def __init__(self, project_dir: Path, backend: Optional[str] = None):
         self.project_dir = project_dir.resolve()
-        self.backend = "subprocess"
         self.repo: Optional["Repo"] = None
 
-        if GITPYTHON_AVAILABLE:
+        backend = backend or os.environ.get("LOLIPOP_GIT_BACKEND", "native")
+        if backend not in BACKENDS:
+            raise GitError(f"Unknown git backend: {backend}")
+        self.backend = backend
+
+        if self.backend == "native":
+            self.git_dirs = git_native.find_git_dirs(self.project_dir)
+            if self.git_dirs is None:
+                raise GitError(f"{self.project_dir} is not a git repository")
+            return
+
+        self.backend = "subprocess"
+        if backend == "gitpython" and GITPYTHON_AVAILABLE:
             try:
+                import git
                 self.repo = git.Repo(self.project_dir)
                 self.backend = "gitpython"
             except Exception:
@@ -43,20 +109,21 @@ class GitClient:
     # -------------------------
     # Low-level subprocess
     # -------------------------
-    def run_git(self, *args: str) -> str:
-        try:
-            result = subprocess.run(
-                ["git", *args],
-                cwd=self.project_dir,
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            return result.stdout.strip()
-        except subprocess.CalledProcessError as e:
-            raise GitError(e.stderr.strip() or "Git command failed")
+    def run_git(
+        self,
+        *args: str,
+        timeout: Optional[float] = None,
+        interactive: bool = True,
+    ) -> str:
+        """
+        Run git in the project dir. With interactive=False git never
+        prompts for credentials (batch use, e.g. project sync).
+        """
+        return run_git_in(self.project_dir, *args, timeout=timeout, interactive=interactive)
 
     def is_repo(self) -> bool:
+        if self.backend == "native":
+            return git_native.find_git_dirs(self.project_dir) is not None
         try:
             self.run_git("rev-parse", "--is-inside-work-tree")
             return True
@@ -67,6 +134,7 @@ class GitClient:
     # Repository lifecycle
     # -------------------------
     @staticmethod
+    @traced("git.init", cat="git")
     def init_repo(project_dir: Path):
         subprocess.run(
             ["git", "init"],
@@ -76,10 +144,49 @@ class GitClient:
             text=True,
         )
 
+    @staticmethod
+    @traced("git.clone", cat="git")
+    def clone(
+        source: str,
+        dest: Path,
+        *options: str,
+        timeout: Optional[float] = None,
+        interactive: bool = True,
+    ) -> "GitClient":
+        """
+        `git clone [options] source dest`; dest must not exist yet.
+        """
+        dest = dest.resolve()
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        run_git_in(
+            dest.parent, "clone", "--quiet", *options, source, str(dest),
+            timeout=timeout, interactive=interactive,
+        )
+        return GitClient(dest)
+
     # -------------------------
     # Metadata
     # -------------------------
-    def info(self) -> Dict[str, Any]:
+    def is_dirty(self) -> bool:
+        if self.backend == "gitpython" and self.repo is not None:
+            return self.repo.is_dirty()
+        return bool(self.run_git("status", "--porcelain"))
+
+    @traced("git.info", cat="git")
+    def info(self, check_dirty: bool = True) -> Dict[str, Any]:
+        if self.backend == "native":
+            try:
+                meta = git_native.read_metadata(self.project_dir)
+            except (OSError, git_native.NativeGitError) as e:
+                raise GitError(str(e))
+            return {
+                "backend": "native",
+                "branch": meta["branch"],
+                "commit": meta["commit"],
+                "dirty": self.is_dirty() if check_dirty else None,
+                "remote": meta["remote"],
+            }
+
         if self.backend == "gitpython" and self.repo is not None:
             return {
                 "backend": "gitpython",
@@ -0,0 +1,204 @@
+"""
+Native git metadata reader for Lolipop
+
+Reads branch, commit and remote straight from the repository files
+(.git/HEAD, loose refs, packed-refs, worktree `gitdir:` links and
+.git/config) without spawning git or importing GitPython.
+
+Anything this reader cannot answer (working tree status, objects)
+is left to the git binary.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+
+class GitDirs(NamedTuple):
+    worktree: Path   # top of the working tree
+    git_dir: Path    # per-worktree dir: HEAD, worktree-local refs
+    common_dir: Path # shared dir: refs, packed-refs, config
+
+
+class NativeGitError(Exception):
+    pass
+
+
+# -------------------------
+# Discovery
+# -------------------------
+def _read_first_line(path: Path) -> str:
+    with path.open("r", encoding="utf-8", errors="replace") as f:
+        return f.readline().strip()
+
+
+def _resolve_dot_git(dot_git: Path) -> Optional[Path]:
+    if dot_git.is_dir():
+        return dot_git
+    if dot_git.is_file():
+        # worktrees and submodules: "gitdir: <path>"
+        line = _read_first_line(dot_git)
+        if line.startswith("gitdir:"):
+            target = Path(line[len("gitdir:"):].strip())
+            if not target.is_absolute():
+                target = dot_git.parent / target
+            return target.resolve() if target.is_dir() else None
+    return None
+
+
+def find_git_dirs(start: Path) -> Optional[GitDirs]:
+    """
+    Walk up from `start` like git does. Returns None outside a repository.
+    """
+    start = start.resolve()
+    for directory in (start, *start.parents):
+        git_dir = _resolve_dot_git(directory / ".git")
+        if git_dir is None:
+            continue
+        if not (git_dir / "HEAD").is_file():
+            continue
+
+        common_dir = git_dir
+        commondir_file = git_dir / "commondir"
+        if commondir_file.is_file():
+            common = Path(_read_first_line(commondir_file))
+            if not common.is_absolute():
+                common = git_dir / common
+            common_dir = common.resolve()
+
+        return GitDirs(worktree=directory, git_dir=git_dir, common_dir=common_dir)
+    return None
+
+
+# -------------------------
+# Refs
+# -------------------------
+def _packed_refs(common_dir: Path) -> Dict[str, str]:
+    refs: Dict[str, str] = {}
+    path = common_dir / "packed-refs"
+    if not path.is_file():
+        return refs
+    with path.open("r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if not line or line[0] in "#^":
+                continue
+            parts = line.split()
+            if len(parts) == 2:
+                refs[parts[1]] = parts[0]
+    return refs
+
+
+def resolve_ref(dirs: GitDirs, ref: str, depth: int = 0) -> Optional[str]:
+    """
+    Resolve a ref name (e.g. refs/heads/main) to a commit sha.
+    Returns None for unborn branches.
+    """
+    if depth > 10:
+        raise NativeGitError(f"Symbolic ref loop at {ref}")
+
+    for base in (dirs.git_dir, dirs.common_dir):
+        loose = base / ref
+        if loose.is_file():
+            value = _read_first_line(loose)
+            if value.startswith("ref:"):
+                return resolve_ref(dirs, value[4:].strip(), depth + 1)
+            return value or None
+
+    return _packed_refs(dirs.common_dir).get(ref)
+
+
+def read_head(dirs: GitDirs) -> tuple[Optional[str], Optional[str]]:
+    """
+    Returns (branch, commit). A detached HEAD reports branch "HEAD",
+    matching `git rev-parse --abbrev-ref HEAD`.
+    """
+    head = _read_first_line(dirs.git_dir / "HEAD")
+    if head.startswith("ref:"):
+        ref = head[4:].strip()
+        branch = ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else ref
+        return branch, resolve_ref(dirs, ref)
+    return "HEAD", head or None
+
+
+# -------------------------
+# Config
+# -------------------------
+def _parse_section(header: str) -> str:
+    # [remote "origin"] -> remote.origin ; [core] -> core
+    header = header.strip()[1:-1].strip()
+    if '"' in header:
+        name, _, sub = header.partition('"')
+        sub = sub.rstrip('"')
+        return f"{name.strip().lower()}.{sub}"
+    if "." in header:
+        name, _, sub = header.partition(".")
+        return f"{name.lower()}.{sub.lower()}"
+    return header.lower()
+
+
+def _unquote(value: str) -> str:
+    value = value.strip()
+    out = []
+    quoted = False
+    i = 0
+    while i < len(value):
+        ch = value[i]
+        if ch == '"':
+            quoted = not quoted
+        elif ch == "\\" and i + 1 < len(value):
+            i += 1
+            out.append({"n": "\n", "t": "\t", "b": "\b"}.get(value[i], value[i]))
+        elif ch in "#;" and not quoted:
+            break
+        else:
+            out.append(ch)
+        i += 1
+    return "".join(out).strip()
+
+
+def read_config(dirs: GitDirs) -> Dict[str, str]:
+    """
+    Minimal git-config reader: "section.subsection.key" -> last value.
+    Includes are not followed.
+    """
+    values: Dict[str, str] = {}
+    path = dirs.common_dir / "config"
+    if not path.is_file():
+        return values
+
+    section = ""
+    with path.open("r", encoding="utf-8", errors="replace") as f:
+        for raw in f:
+            line = raw.strip()
+            if not line or line[0] in "#;":
+                continue
+            if line.startswith("["):
+                end = line.find("]")
+                section = _parse_section(line[: end + 1])
+                line = line[end + 1:].strip()
+                if not line:
+                    continue
+            key, sep, value = line.partition("=")
+            key = key.strip().lower()
+            values[f"{section}.{key}"] = _unquote(value) if sep else "true"
+    return values
+
+
+# -------------------------
+# Metadata
+# -------------------------
+def read_metadata(project_dir: Path) -> Dict[str, Optional[str]]:
+    dirs = find_git_dirs(project_dir)
+    if dirs is None:
+        raise NativeGitError(f"{project_dir} is not a git repository")
+
+    branch, commit = read_head(dirs)
+    config = read_config(dirs)
+
+    return {
+        "branch": branch,
+        "commit": commit,
+        "remote": config.get("remote.origin.url"),
+        "worktree": str(dirs.worktree),
+    }
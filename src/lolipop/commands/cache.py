@@ -0,0 +1,128 @@
+"""
+Lolipop cache command
+
+Inspect and clear lolipop's on-disk caches
+"""
+
+import json
+from typing import Optional
+
+import typer
+
+from lolipop.modules.config_loader import clear_config_cache, config_cache_info
+from lolipop.modules.logger import error, info, success
+
+app = typer.Typer(help="Inspect and clear Lolipop caches", no_args_is_help=True)
+
+
+def _human(size: int) -> str:
+    value = float(size)
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            return f"{value:.1f} {unit}" if unit != "B" else f"{int(value)} B"
+        value /= 1024
+    return f"{size} B"
+
+
+def _age(value) -> str:
+    return (value or "-")[:19].replace("T", " ")
+
+
+@app.command("info")
+def info_cmd(
+    verbose: bool = typer.Option(False, "--verbose", "-v", help="List entries"),
+):
+    """Show cache locations and sizes"""
+    cfg = config_cache_info()
+    state = "enabled" if cfg["enabled"] else "disabled"
+    info(f"Config cache ({state}): {cfg['dir']}")
+    info(f"  {len(cfg['entries'])} entries, {cfg['bytes']} bytes")
+    if verbose:
+        for entry in cfg["entries"]:
+            info(f"  {entry['path']} ({entry['size']} bytes)")
+
+    from lolipop.handlers.repo_cache import MIRROR_DIR, list_mirrors
+
+    mirrors = list_mirrors()
+    info(f"Git mirrors: {MIRROR_DIR}")
+    info(f"  {len(mirrors)} mirrors, {_human(sum(m['size'] for m in mirrors))}")
+    if verbose:
+        for mirror in mirrors:
+            info(f"  {mirror['url']} ({_human(mirror['size'])})")
+
+
+@app.command("clear")
+def clear():
+    """Remove all cached entries"""
+    removed = clear_config_cache()
+    success(f"Removed {removed} config cache entries")
+
+
+@app.command("mirrors")
+def mirrors_cmd(
+    as_json: bool = typer.Option(False, "--json", help="One JSON object per line"),
+):
+    """List cached git mirrors used by `lolipop install`"""
+    from rich.markup import escape
+    from rich.table import Table
+    from lolipop.handlers.repo_cache import list_mirrors
+    from lolipop.modules.logger import get_console
+
+    mirrors = sorted(list_mirrors(), key=lambda m: m["last_used"] or "", reverse=True)
+    if as_json:
+        for mirror in mirrors:
+            typer.echo(json.dumps(mirror, ensure_ascii=False))
+        return
+    if not mirrors:
+        info("No cached mirrors")
+        return
+
+    table = Table()
+    table.add_column("Url", overflow="fold")
+    table.add_column("Size", justify="right")
+    table.add_column("Last used")
+    table.add_column("Borrowers", justify="right")
+    for mirror in mirrors:
+        table.add_row(
+            escape(mirror["url"] or mirror["key"]),
+            _human(mirror["size"]),
+            _age(mirror["last_used"]),
+            str(len(mirror["borrowers"])),
+        )
+    get_console().print(table)
+
+
+@app.command("prune")
+def prune_cmd(
+    max_size: Optional[str] = typer.Option(
+        None, "--max-size", help="Evict least recently used mirrors until all fit (e.g. 5G)"
+    ),
+    older_than: Optional[str] = typer.Option(
+        None, "--older-than", help="Evict mirrors not used for this long (e.g. 30d) or since a date"
+    ),
+    evict_all: bool = typer.Option(False, "--all", help="Evict every mirror"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only report what would be removed"),
+):
+    """Evict cached git mirrors, least recently used first"""
+    from lolipop.handlers import repo_cache
+    from lolipop.handlers.env_usage import EnvUsageError, parse_size
+    from lolipop.handlers.event_log import EventLogError, parse_time
+
+    if max_size is None and older_than is None and not evict_all:
+        error("Nothing to prune by: use --max-size, --older-than or --all")
+        raise typer.Exit(1)
+    try:
+        report = repo_cache.prune(
+            max_size=parse_size(max_size) if max_size else None,
+            older_than=parse_time(older_than) if older_than else None,
+            dry_run=dry_run,
+        )
+    except (EnvUsageError, EventLogError) as e:
+        error(str(e))
+        raise typer.Exit(1)
+
+    verb = "Would remove" if dry_run else "Removed"
+    for mirror in report["removed"]:
+        borrowers = f", {len(mirror['borrowers'])} borrower(s) repacked" if mirror["borrowers"] else ""
+        info(f"{verb} {mirror['url']} ({_human(mirror['size'])}, last used {_age(mirror['last_used'])}{borrowers})")
+    success(f"{verb} {len(report['removed'])} mirror(s), {_human(report['freed_bytes'])}")
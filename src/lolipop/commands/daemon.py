@@ -0,0 +1,103 @@
+"""
+Lolipop daemon command
+
+Start, stop and inspect the optional background daemon
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+import typer
+
+from lolipop.modules import daemon_client
+from lolipop.modules.daemon_client import DaemonError, DaemonUnavailable
+from lolipop.modules.logger import error, info, success, warn
+
+app = typer.Typer(help="Manage the Lolipop background daemon", no_args_is_help=True)
+
+START_TIMEOUT = 10.0
+
+
+def _ping():
+    try:
+        return daemon_client.call("ping", timeout=2.0)
+    except (DaemonUnavailable, DaemonError):
+        return None
+
+
+@app.command("start")
+def start(
+    foreground: bool = typer.Option(
+        False, "--foreground", help="Run in this process instead of detaching"
+    ),
+):
+    """Start the daemon"""
+    from lolipop.handlers.daemon import LOG_FILE, DaemonError as ServerError, serve
+
+    if os.environ.get("LOLIPOP_NO_DAEMON"):
+        warn("LOLIPOP_NO_DAEMON is set; commands will not use the daemon")
+
+    status = _ping()
+    if status:
+        info(f"Daemon already running (pid {status['pid']})")
+        return
+
+    if foreground:
+        info(f"Listening on {daemon_client.SOCKET_PATH}")
+        try:
+            serve()
+        except ServerError as e:
+            error(str(e))
+            raise typer.Exit(1)
+        return
+
+    LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(LOG_FILE, "ab") as log:
+        subprocess.Popen(
+            [sys.executable, "-m", "lolipop", "daemon", "start", "--foreground"],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            start_new_session=True,
+        )
+
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        status = _ping()
+        if status:
+            success(f"Daemon started (pid {status['pid']})")
+            return
+        time.sleep(0.05)
+
+    error(f"Daemon did not start; see {LOG_FILE}")
+    raise typer.Exit(1)
+
+
+@app.command("stop")
+def stop():
+    """Stop the daemon"""
+    if _ping() is None:
+        info("Daemon is not running")
+        return
+    try:
+        daemon_client.call("shutdown", timeout=5.0)
+    except (DaemonUnavailable, DaemonError) as e:
+        error(f"Failed to stop daemon: {e}")
+        raise typer.Exit(1)
+    success("Daemon stopped")
+
+
+@app.command("status")
+def status():
+    """Show whether the daemon is running"""
+    data = _ping()
+    if data is None:
+        info("Daemon is not running")
+        raise typer.Exit(1)
+    success(f"Daemon running (pid {data['pid']})")
+    info(f"  socket:   {daemon_client.SOCKET_PATH}")
+    info(f"  uptime:   {data['uptime']}s")
+    info(f"  requests: {data['requests']}")
+    info(f"  cached:   {data['cached_configs']} configs, {data['cached_git']} git repos")
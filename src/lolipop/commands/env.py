@@ -0,0 +1,187 @@
+"""
+Lolipop env command
+
+Manage lolipop environments and the shared package store
+"""
+
+import json
+from typing import Optional
+
+import typer
+
+from lolipop.modules.logger import error, info, success
+
+app = typer.Typer(help="Manage Lolipop environments", no_args_is_help=True)
+
+
+@app.callback()
+def callback():
+    pass
+
+
+def _human(size: int) -> str:
+    value = float(size)
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            return f"{value:.1f} {unit}" if unit != "B" else f"{int(value)} B"
+        value /= 1024
+    return f"{size} B"
+
+
+@app.command("list")
+def list_cmd(
+    check: bool = typer.Option(False, "--check", help="Also validate each environment (stats only)"),
+    as_json: bool = typer.Option(False, "--json", help="One JSON object per line"),
+):
+    """List environments from their manifests"""
+    from rich.markup import escape
+    from rich.table import Table
+    from lolipop.handlers import env_manifest
+    from lolipop.handlers.environment import LOLI_ENV_HOME, env_path
+    from lolipop.modules.logger import get_console
+
+    entries = env_manifest.list_manifests(LOLI_ENV_HOME)
+    if check:
+        for i, entry in enumerate(entries):
+            path = env_path(entry["name"])
+            ok, reason = env_manifest.validate(path)
+            manifest = env_manifest.read_manifest(path)
+            if manifest is not None:
+                entries[i] = entry = {**manifest, "name": entry["name"], "manifest": True}
+            entry["status"] = "ok" if ok else reason
+
+    if as_json:
+        for entry in entries:
+            typer.echo(json.dumps(entry, ensure_ascii=False))
+        return
+    if not entries:
+        info("No environments")
+        return
+
+    table = Table()
+    table.add_column("Name")
+    table.add_column("Python")
+    table.add_column("ABI")
+    table.add_column("Interpreter", overflow="fold")
+    table.add_column("Last used")
+    if check:
+        table.add_column("Status")
+    for entry in entries:
+        row = [
+            escape(entry["name"]),
+            entry.get("version") or "-",
+            entry.get("abi") or "-",
+            escape(entry.get("interpreter") or ("no manifest" if not entry["manifest"] else "-")),
+            (entry.get("last_used") or "-")[:19].replace("T", " "),
+        ]
+        if check:
+            status = entry["status"]
+            row.append(f"[green]{status}[/]" if status == "ok" else f"[red]{escape(status)}[/]")
+        table.add_row(*row)
+    get_console().print(table)
+
+
+def _age(value) -> str:
+    return (value or "-")[:19].replace("T", " ")
+
+
+@app.command("du")
+def du_cmd(
+    refresh: bool = typer.Option(False, "--refresh", help="Re-measure every environment"),
+    as_json: bool = typer.Option(False, "--json", help="One JSON object per line"),
+):
+    """Show disk usage, last use and users of each environment"""
+    from rich.markup import escape
+    from rich.table import Table
+    from lolipop.handlers import env_usage
+    from lolipop.modules.logger import get_console
+
+    envs = sorted(env_usage.refresh(full=refresh), key=lambda e: -e["size"])
+    if as_json:
+        for env in envs:
+            typer.echo(json.dumps(env, ensure_ascii=False))
+        return
+    if not envs:
+        info("No environments")
+        return
+
+    table = Table()
+    table.add_column("Name")
+    table.add_column("Size", justify="right")
+    table.add_column("Freeable", justify="right")
+    table.add_column("Python")
+    table.add_column("Last used")
+    table.add_column("Projects", overflow="fold")
+    for env in envs:
+        table.add_row(
+            escape(env["name"]),
+            _human(env["size"]),
+            _human(env["exclusive"]),
+            env["python"] or "-",
+            _age(env["last_used"]),
+            escape(", ".join(env["projects"])) or "[dim]unreferenced[/]",
+        )
+    table.add_row(
+        "[bold]total[/]",
+        _human(sum(e["size"] for e in envs)),
+        _human(sum(e["exclusive"] for e in envs)),
+        "", "", "",
+    )
+    get_console().print(table)
+
+
+@app.command("prune")
+def prune_cmd(
+    max_size: Optional[str] = typer.Option(
+        None, "--max-size", help="Evict least recently used envs until their exclusive sizes fit (e.g. 10G)"
+    ),
+    older_than: Optional[str] = typer.Option(
+        None, "--older-than", help="Evict envs not used for this long (e.g. 30d) or since a date"
+    ),
+    unreferenced: bool = typer.Option(
+        False, "--unreferenced", help="Only envs no tracked project uses"
+    ),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only report what would be removed"),
+):
+    """Remove cold environments, least recently used first"""
+    from lolipop.handlers import env_usage
+    from lolipop.handlers.event_log import EventLogError, parse_time
+
+    if max_size is None and older_than is None and not unreferenced:
+        error("Nothing to prune by: use --max-size, --older-than and/or --unreferenced")
+        raise typer.Exit(1)
+    try:
+        report = env_usage.prune(
+            max_size=env_usage.parse_size(max_size) if max_size else None,
+            older_than=parse_time(older_than) if older_than else None,
+            unreferenced=unreferenced,
+            dry_run=dry_run,
+        )
+    except (env_usage.EnvUsageError, EventLogError) as e:
+        error(str(e))
+        raise typer.Exit(1)
+
+    verb = "Would remove" if dry_run else "Removed"
+    for env in report["removed"]:
+        users = ", ".join(env["projects"]) or "unreferenced"
+        info(f"{verb} {env['name']} ({_human(env['exclusive'])}, last used {_age(env['last_used'])}, {users})")
+    store = report["store"]
+    if store and store["removed"]:
+        info(f"Removed {len(store['removed'])} package store entries no longer used")
+    success(f"{verb} {len(report['removed'])} environment(s), {_human(report['freed_bytes'])}")
+
+
+@app.command("gc")
+def gc_cmd(
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only report what would be removed"),
+):
+    """Remove package store entries no environment references"""
+    from lolipop.handlers.package_store import gc
+
+    report = gc(dry_run=dry_run)
+    verb = "Would remove" if dry_run else "Removed"
+    for item in report["removed"]:
+        info(f"{verb} {item}")
+    if report["stale_refs"]:
+        info(f"Stale references: {report['stale_refs']}")
+    success(f"{verb} {len(report['removed'])} store entries, {_human(report['freed_bytes'])}")
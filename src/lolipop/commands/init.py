@@ -11,8 +11,10 @@ import typer
 from lolipop.modules.config_loader import load_lolipop_yaml
 from lolipop.handlers.project_init import init_project
 from lolipop.handlers.project_tracker import register_project
+from lolipop.handlers.script_runner import DEFAULT_JOBS
 from lolipop.clients.git_client import GitClient
 from lolipop.modules.logger import error, info, success
+from lolipop.modules.profiler import span
 
 app = typer.Typer(help="Initialize a Lolipop project")
 
@@ -30,6 +32,22 @@ def init(
         "-d",
         help="Directory to create the project in",
     ),
+    jobs: int | None = typer.Option(
+        None,
+        "--jobs",
+        "-j",
+        help="Max setup tasks to run in parallel (task-graph setups only)",
+    ),
+    force: bool = typer.Option(
+        False,
+        "--force",
+        help="Re-run setup steps even if their inputs are unchanged",
+    ),
+    offline: bool = typer.Option(
+        False,
+        "--offline",
+        help="Install dependencies only from the local wheelhouse",
+    ),
 ):
     try:
         # -------------------------
@@ -55,7 +73,8 @@ def init(
 
         cfg_path = cfg_path.resolve()
 
-        cfg = load_lolipop_yaml(cfg_path)
+        with span("config.load", cat="config"):
+            cfg = load_lolipop_yaml(cfg_path)
 
         if not cfg.name:
             raise RuntimeError("Project name is required")
@@ -72,7 +91,14 @@ def init(
         # -------------------------
         # Init project
         # -------------------------
-        init_project(cfg, target_dir)
+        with span("init.project"):
+            init_project(
+                cfg,
+                target_dir,
+                jobs=jobs or DEFAULT_JOBS,
+                force=force,
+                offline=offline,
+            )
 
         # Move config into project if needed
         target_cfg = target_dir / cfg_path.name
@@ -0,0 +1,92 @@
+"""
+Lolipop install command
+
+Clone a git repository (through the local mirror cache), set it up from
+its lolipop config and start tracking it.
+"""
+
+from pathlib import Path
+
+import typer
+
+from lolipop.modules.logger import error, success
+
+app = typer.Typer(help="Install a project from a git url")
+
+
+# a single command (not a callback), so options may follow the url
+@app.command()
+def install(
+    url: str = typer.Argument(..., help="Git url (https, ssh, file:// or a local path)"),
+    directory: Path | None = typer.Option(
+        None,
+        "--directory",
+        "-d",
+        help="Directory to clone into (default: ./<repo name>)",
+    ),
+    branch: str | None = typer.Option(None, "--branch", "-b", help="Branch or tag to check out"),
+    depth: int | None = typer.Option(
+        None,
+        "--depth",
+        min=1,
+        help="Shallow clone with this many commits",
+    ),
+    filter_spec: str | None = typer.Option(
+        None,
+        "--filter",
+        help="Partial clone filter, e.g. blob:none",
+    ),
+    shared: bool = typer.Option(
+        False,
+        "--shared",
+        help="Borrow objects from the mirror instead of hardlinking them",
+    ),
+    cache: bool = typer.Option(
+        True,
+        "--cache/--no-cache",
+        help="Clone through the local mirror cache",
+    ),
+    timeout: float | None = typer.Option(
+        None,
+        "--timeout",
+        help="Seconds allowed for each git transfer",
+    ),
+    jobs: int | None = typer.Option(
+        None,
+        "--jobs",
+        "-j",
+        help="Max setup tasks to run in parallel (task-graph setups only)",
+    ),
+    force: bool = typer.Option(
+        False,
+        "--force",
+        help="Re-run setup steps even if their inputs are unchanged",
+    ),
+    offline: bool = typer.Option(
+        False,
+        "--offline",
+        help="Install dependencies only from the local wheelhouse",
+    ),
+):
+    from lolipop.handlers.project_install import install_project
+    from lolipop.handlers.script_runner import DEFAULT_JOBS
+
+    try:
+        metadata = install_project(
+            url,
+            directory,
+            branch=branch,
+            depth=depth,
+            filter_spec=filter_spec,
+            shared=shared,
+            use_cache=cache,
+            timeout=timeout,
+            jobs=jobs or DEFAULT_JOBS,
+            force=force,
+            offline=offline,
+        )
+    except Exception as e:
+        error(str(e))
+        raise typer.Exit(code=1)
+
+    success(f"Project '{metadata['name']}' installed at {metadata['path']} 🍭")
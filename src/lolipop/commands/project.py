@@ -2,41 +2,144 @@
 Lolipop project command
 
 Manage tracked Lolipop projects
+
+list/current/info/switch are answered by the daemon when it is running
+and computed in-process otherwise.
 """
 
+import json
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional
+
 import typer
-from lolipop.handlers.project_tracker import (
-    list_projects,
-    load_project,
-    set_active_project,
-)
+from lolipop.modules import daemon_client
+from lolipop.modules.daemon_client import DaemonError, DaemonUnavailable
 from lolipop.modules.logger import info, success, error
 
 app = typer.Typer(help="Manage Lolipop projects", no_args_is_help=True)
 
 
+def _tracker():
+    # imported on demand: daemon-backed commands never need it
+    from lolipop.handlers import project_tracker
+
+    return project_tracker
+
+
+def _via_daemon(op: str, fallback: Callable[[], Any], **args: Any) -> Any:
+    try:
+        return daemon_client.call(op, **args)
+    except (DaemonUnavailable, DaemonError):
+        return fallback()
+
+
+def _switch(name: str) -> bool:
+    tracker = _tracker()
+    if not tracker.load_project(name):
+        return False
+    tracker.set_active_project(name)
+    return True
+
+
+DEFAULT_FIELDS = ("name", "path", "active")
+PAGE_SIZE = 500
+
+
+def _iter_projects(filters: dict, limit: Optional[int], offset: int) -> Iterator[dict]:
+    """
+    Stream matching projects page by page from the daemon, or straight
+    from the registry when no daemon is running.
+    """
+    first = True
+    while limit is None or limit > 0:
+        size = PAGE_SIZE if limit is None else min(PAGE_SIZE, limit)
+        try:
+            rows = daemon_client.call("project.query", **filters, limit=size, offset=offset)
+        except (DaemonUnavailable, DaemonError):
+            if not first:
+                raise
+            yield from _tracker().query_projects(**filters, limit=limit, offset=offset)
+            return
+        first = False
+        yield from rows
+        if len(rows) < size:
+            return
+        offset += size
+        if limit is not None:
+            limit -= size
+
+
+def _iso(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    from datetime import datetime, timezone
+    from lolipop.handlers.event_log import parse_time
+
+    return datetime.fromtimestamp(parse_time(value), timezone.utc).isoformat()
+
+
 @app.command("list")
-def list_cmd():
-    """List all tracked projects"""
-    projects = list_projects()
+def list_cmd(
+    name: Optional[str] = typer.Option(None, "--name", help="Name glob, e.g. 'api-*'"),
+    git: Optional[bool] = typer.Option(None, "--git/--no-git", help="Only projects with / without git"),
+    dirty: Optional[bool] = typer.Option(None, "--dirty/--clean", help="Only dirty / clean git trees"),
+    env: Optional[str] = typer.Option(None, "--env", help="Only projects using this environment"),
+    since: Optional[str] = typer.Option(None, "--since", help="Last seen at/after (ISO or age like 7d)"),
+    until: Optional[str] = typer.Option(None, "--until", help="Last seen before (ISO or age like 1d)"),
+    sort: str = typer.Option("name", "--sort", help="name, path or last_seen; prefix '-' to reverse"),
+    limit: Optional[int] = typer.Option(None, "--limit", "-n"),
+    offset: int = typer.Option(0, "--offset"),
+    fields: Optional[str] = typer.Option(
+        None, "--fields", "-f", help="Comma-separated fields (default name,path,active)"
+    ),
+    as_json: bool = typer.Option(False, "--json", help="One JSON object per line"),
+):
+    """List tracked projects"""
+    selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(DEFAULT_FIELDS)
+    try:
+        # inside the try: a bad --since/--until is reported, not raised
+        filters = {
+            "fields": selected,
+            "name_glob": name,
+            "has_git": git,
+            "dirty": dirty,
+            "env_name": env,
+            "seen_after": _iso(since),
+            "seen_before": _iso(until),
+            "sort": sort.lstrip("-"),
+            "descending": sort.startswith("-"),
+        }
 
-    if not projects:
-        info("No projects tracked yet.")
-        return
+        shown = 0
+        for p in _iter_projects(filters, limit, offset):
+            shown += 1
+            if as_json:
+                typer.echo(json.dumps(p, ensure_ascii=False))
+            elif fields is None:
+                marker = "✔" if p.get("active") else " "
+                info(f"[{marker}] {p.get('name')} → {p.get('path')}")
+            else:
+                typer.echo("\t".join(
+                    v if isinstance(v, str) else json.dumps(v, ensure_ascii=False)
+                    for v in (p.get(f) for f in selected)
+                ))
+    except Exception as e:
+        error(str(e))
+        raise typer.Exit(1)
 
-    for p in projects:
-        marker = "✔" if p.get("active") else " "
-        info(f"[{marker}] {p.get('name')} → {p.get('path')}")
+    if not shown and not as_json:
+        filtered = any([name, git is not None, dirty is not None, env, since, until, offset])
+        info("No matching projects." if filtered else "No projects tracked yet.")
 
 
 @app.command("current")
 def current():
     """Show the active project"""
-    for p in list_projects():
-        if p.get("active"):
-            success(f"Active project: {p.get('name')}")
-            info(p.get("path"))
-            return
+    p = _via_daemon("project.current", lambda: _tracker().get_active_project())
+    if p:
+        success(f"Active project: {p.get('name')}")
+        info(p.get("path"))
+        return
 
     error("No active project set")
 
@@ -44,7 +147,7 @@ def current():
 @app.command("info")
 def info_cmd(name: str):
     """Show detailed project info"""
-    data = load_project(name)
+    data = _via_daemon("project.info", lambda: _tracker().load_project(name), name=name)
     if not data:
         error(f"Project '{name}' not found")
         raise typer.Exit(1)
@@ -54,6 +157,8 @@ def info_cmd(name: str):
 
     env = data.get("environment", {})
     info(f"Environment: {env.get('name')}")
+    if env.get("python_version"):
+        info(f"Python: {env.get('python_version')}")
 
     git = data.get("git", {})
     if git.get("initialized"):
@@ -63,6 +168,10 @@ def info_cmd(name: str):
     else:
         info("Git: not initialized")
 
+    changed = data.get("changed_since_last_seen")
+    if changed:
+        info(f"Changed at last registration: {', '.join(changed)}")
+
     if data.get("opened_in_vscode"):
         info("Opened in VS Code ✔")
 
@@ -73,9 +182,217 @@ def info_cmd(name: str):
 @app.command("switch")
 def switch(name: str):
     """Switch active project"""
-    if not load_project(name):
+    if not _via_daemon("project.switch", lambda: _switch(name), name=name):
         error(f"Project '{name}' not found")
         raise typer.Exit(1)
 
-    set_active_project(name)
     success(f"Switched active project to '{name}'")
+
+
+@app.command("history")
+def history(
+    name: str,
+    since: Optional[str] = typer.Option(
+        None, "--since", help="ISO date/time or age like 7d, 12h"
+    ),
+    until: Optional[str] = typer.Option(
+        None, "--until", help="ISO date/time or age like 1d"
+    ),
+    action: Optional[List[str]] = typer.Option(
+        None, "--action", "-a", help="Only show these actions (repeatable)"
+    ),
+    limit: Optional[int] = typer.Option(None, "--limit", "-n"),
+    as_json: bool = typer.Option(False, "--json", help="One JSON event per line"),
+):
+    """Show a project's event history (streamed)"""
+    from lolipop.handlers.event_log import EventLogError, parse_time
+    from lolipop.handlers.project_tracker import load_project, project_history
+
+    if not load_project(name):
+        error(f"Project '{name}' not found")
+        raise typer.Exit(1)
+
+    try:
+        events = project_history(
+            name,
+            since=parse_time(since) if since else None,
+            until=parse_time(until) if until else None,
+            actions=action,
+            limit=limit,
+        )
+        for event in events:
+            if as_json:
+                typer.echo(json.dumps(event, ensure_ascii=False))
+            else:
+                details = event.get("details") or {}
+                suffix = f" {json.dumps(details, ensure_ascii=False)}" if details else ""
+                typer.echo(f"{event.get('timestamp')}  {event.get('action')}{suffix}")
+    except EventLogError as e:
+        error(str(e))
+        raise typer.Exit(1)
+
+
+@app.command("compact")
+def compact(
+    name: str,
+    keep: Optional[int] = typer.Option(
+        None, "--keep", help="Keep only the newest N events"
+    ),
+    max_age_days: Optional[float] = typer.Option(
+        None, "--max-age-days", help="Drop events older than this"
+    ),
+):
+    """Trim a project's history by retention policy"""
+    from lolipop.handlers.event_log import RetentionPolicy
+    from lolipop.handlers.project_tracker import compact_history, load_project
+
+    if not load_project(name):
+        error(f"Project '{name}' not found")
+        raise typer.Exit(1)
+
+    policy = RetentionPolicy.from_env()
+    if keep is not None or max_age_days is not None:
+        policy = RetentionPolicy(max_events=keep, max_age_days=max_age_days)
+
+    dropped = compact_history(name, policy)
+    success(f"Compacted history of '{name}': dropped {dropped} event(s)")
+
+
+@app.command("scan")
+def scan(
+    root: Path = typer.Argument(..., help="Directory to search for projects"),
+    max_depth: Optional[int] = typer.Option(
+        None, "--max-depth", help="Levels below root to descend"
+    ),
+    ignore: Optional[List[str]] = typer.Option(
+        None, "--ignore", "-i", help="Glob of directories to skip (repeatable)"
+    ),
+    jobs: Optional[int] = typer.Option(
+        None, "--jobs", "-j", help="Parallel project inspections"
+    ),
+):
+    """Discover and register all projects under a directory"""
+    from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn
+    from lolipop.handlers.project_scanner import (
+        DEFAULT_JOBS,
+        ScanError,
+        scan_and_register,
+    )
+    from lolipop.modules.logger import get_console, warn
+
+    with Progress(
+        TextColumn("[cyan]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        console=get_console(),
+        transient=True,
+    ) as progress:
+        task = progress.add_task("Discovering", total=None)
+
+        def on_found(_):
+            progress.update(task, total=(progress.tasks[0].total or 0) + 1)
+
+        def on_inspected(metadata):
+            progress.update(task, advance=1, description=f"Registering {metadata['name']}")
+
+        try:
+            report = scan_and_register(
+                root,
+                max_depth=max_depth,
+                ignore=ignore or (),
+                jobs=jobs or DEFAULT_JOBS,
+                on_found=on_found,
+                on_inspected=on_inspected,
+            )
+        except ScanError as e:
+            error(str(e))
+            raise typer.Exit(1)
+
+    for message in report["warnings"]:
+        warn(message)
+    for dup in report["duplicates"]:
+        warn(f"Skipped {dup['path']}: name '{dup['name']}' already used in this scan")
+
+    success(f"Registered {len(report['registered'])} project(s) under {root}")
+
+
+@app.command("sync")
+def sync(
+    projects: Optional[List[str]] = typer.Option(
+        None, "--projects", "-p", help="Name glob of projects to sync (repeatable)"
+    ),
+    tag: Optional[List[str]] = typer.Option(
+        None, "--tag", "-t", help="Sync projects with this tag (repeatable)"
+    ),
+    parallel: Optional[int] = typer.Option(
+        None, "--parallel", "-P", help="Repositories synced at once"
+    ),
+    timeout: Optional[float] = typer.Option(
+        None, "--timeout", help="Seconds allowed per repository"
+    ),
+    fetch: bool = typer.Option(True, "--fetch/--no-fetch", help="Fetch from remotes"),
+    pull: bool = typer.Option(True, "--pull/--no-pull", help="Fast-forward to upstream"),
+):
+    """Fetch, fast-forward and refresh git state of tracked projects"""
+    from rich.markup import escape
+    from rich.table import Table
+    from lolipop.handlers import project_sync
+    from lolipop.modules.logger import get_console, warn
+
+    try:
+        selected = project_sync.select_projects(projects or [], tag or [])
+    except project_sync.SyncError as e:
+        error(str(e))
+        raise typer.Exit(1)
+    if not selected:
+        info("No git projects to sync")
+        return
+
+    info(f"Syncing {len(selected)} project(s)...")
+    results = project_sync.sync_projects(
+        selected,
+        parallel=parallel or project_sync.DEFAULT_PARALLEL,
+        timeout=timeout or project_sync.DEFAULT_TIMEOUT,
+        fetch=fetch,
+        pull=pull,
+        on_done=lambda r: (
+            warn if r["status"] in ("failed", "timeout", "diverged") else info
+        )(f"{r['name']}: {r['status']}"),
+    )
+
+    styles = {
+        "updated": "green",
+        "up-to-date": "green",
+        "failed": "red",
+        "timeout": "red",
+        "diverged": "yellow",
+        "skipped": "dim",
+    }
+    table = Table(title=f"lolipop project sync: {len(results)} project(s)")
+    table.add_column("Project")
+    table.add_column("Status")
+    table.add_column("Branch")
+    table.add_column("Commit")
+    table.add_column("Dirty")
+    table.add_column("Time", justify="right")
+    table.add_column("Details", overflow="fold")
+    for r in results:
+        old, new = (r["old_commit"] or "")[:8], (r["commit"] or "")[:8]
+        details = r["error"] or ""
+        if r["status"] == "updated":
+            details = f"fast-forwarded {r['behind']} commit(s)"
+        elif r["ahead"] or r["behind"]:
+            details = details or f"ahead {r['ahead']}, behind {r['behind']}"
+        table.add_row(
+            escape(r["name"]),
+            f"[{styles.get(r['status'], 'default')}]{r['status']}[/]",
+            escape(r["branch"] or "-"),
+            f"{old} -> {new}" if old and new and old != new else (new or "-"),
+            "yes" if r["dirty"] else "",
+            f"{r['seconds']:.2f}s",
+            escape(details),
+        )
+    get_console().print(table)
+
+    if any(r["status"] in ("failed", "timeout") for r in results):
+        raise typer.Exit(1)
@@ -0,0 +1,80 @@
+"""
+Lolipop python command
+
+List and rediscover the Python interpreters lolipop can build envs with
+"""
+
+import json
+from typing import Optional
+
+import typer
+
+from lolipop.modules.logger import error, info, success
+
+app = typer.Typer(help="Discover Python interpreters", no_args_is_help=True)
+
+
+@app.callback()
+def callback():
+    pass
+
+
+def _print(interpreters: list, best: Optional[dict]) -> None:
+    from rich.markup import escape
+    from rich.table import Table
+    from lolipop.modules.logger import get_console
+
+    table = Table()
+    table.add_column("")
+    table.add_column("Version")
+    table.add_column("Implementation")
+    table.add_column("Path", overflow="fold")
+    for entry in interpreters:
+        version = entry["version"]
+        if entry.get("abiflags"):
+            version += f" ({entry['abiflags']})"
+        if entry.get("releaselevel", "final") != "final":
+            version += f" {entry['releaselevel']}"
+        table.add_row(
+            "*" if entry is best else "",
+            version,
+            entry.get("implementation") or "-",
+            escape(entry["path"]),
+        )
+    get_console().print(table)
+
+
+@app.command("list")
+def list_cmd(
+    spec: Optional[str] = typer.Argument(None, help="Only interpreters matching, e.g. 3.11 or '>=3.10'"),
+    refresh: bool = typer.Option(False, "--refresh", help="Rescan before listing"),
+    as_json: bool = typer.Option(False, "--json", help="One JSON object per line"),
+):
+    """List known interpreters (* marks the one a spec resolves to)"""
+    from lolipop.handlers import interpreters as registry
+
+    try:
+        found = registry.refresh() if refresh else registry.list_interpreters()
+        shown = [i for i in found if registry.matches(i["version"], spec)]
+        best = registry.find_interpreter(spec) if shown else None
+    except registry.InterpreterError as e:
+        error(str(e))
+        raise typer.Exit(1)
+
+    if as_json:
+        for entry in shown:
+            typer.echo(json.dumps(entry, ensure_ascii=False))
+        return
+    if not shown:
+        info(f"No interpreters match '{spec}'" if spec else "No interpreters found")
+        return
+    _print(shown, best)
+
+
+@app.command("refresh")
+def refresh_cmd():
+    """Rescan PATH and install roots for interpreters"""
+    from lolipop.handlers.interpreters import CACHE_FILE, refresh
+
+    found = refresh()
+    success(f"Found {len(found)} interpreter(s); cached in {CACHE_FILE}")
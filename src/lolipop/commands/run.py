@@ -2,89 +2,371 @@
 Lolipop run command
 
 Handles running a lolipop project by executing its defined scripts
+
+Config resolution is delegated to the daemon when it is running;
+environment creation, dependency installs and the scripts themselves
+always run in this process.
+
+With --all / --projects / --tag the `run` scripts of many tracked
+projects run side by side (see handlers/multi_run).
+
+With --watch the project tree is watched and the scripts are restarted
+(previous process group killed) after each debounced burst of changes.
+Config and environment are only re-resolved when a config file changes.
+
+A single file is run by exec'ing the env's own interpreter in place of
+this process (POSIX): no lolipop parent stays resident, and signals and
+the exit code reach the script directly. --supervised (and --profile,
+which reports after the run) keep lolipop as the parent instead.
 """
 
 from pathlib import Path
+import shlex
+import threading
+import time
 import typer
 import subprocess
 import os
+import sys
+from typing import List, Optional
 
-from lolipop.modules.config_loader import load_project_config
-from lolipop.handlers.environment import resolve_environment, create_base_environment
-from lolipop.handlers.script_runner import run_scripts
+from lolipop.modules import daemon_client
+from lolipop.modules.daemon_client import DaemonError, DaemonUnavailable
 # from lolipop.handlers.project_tracker import update_last_run
-from lolipop.modules.logger import error, info
+from lolipop.modules.logger import error, info, success, warn
+from lolipop.modules.profiler import span
 
 app = typer.Typer(help="Run a Lolipop project")
 
 
+def _prepare(target: Path, offline: bool) -> dict:
+    from lolipop.handlers.run_context import prepare_environment, resolve_run
+
+    try:
+        with span("daemon.call", op="run.resolve"):
+            ctx = daemon_client.call("run.resolve", target=str(target))
+    except DaemonUnavailable:
+        # resolving is read-only, so redoing it here is always safe
+        with span("run.resolve"):
+            ctx = resolve_run(target)
+    except DaemonError as e:
+        raise RuntimeError(str(e))
+
+    with span("run.prepare"):
+        return prepare_environment(ctx, offline=offline)
+
+
+# -------------------------
+# Watch mode
+# -------------------------
+class _Runner:
+    """
+    Runs the task graph in a background thread so it can be cancelled
+    (process groups killed) when the next change arrives.
+    """
+
+    def __init__(self, tasks, project_dir: Path, env: dict, jobs: int):
+        from lolipop.handlers.script_runner import run_task_graph
+
+        self.cancel = threading.Event()
+        self.thread = threading.Thread(
+            target=self._run,
+            args=(run_task_graph, tasks, project_dir, env, jobs),
+            daemon=True,
+        )
+        self.thread.start()
+
+    def _run(self, run_task_graph, tasks, project_dir, env, jobs):
+        try:
+            run_task_graph(tasks, project_dir, env, jobs=jobs, cancel=self.cancel)
+        except Exception as e:
+            error(str(e))
+            return
+        if not self.cancel.is_set():
+            success("Finished; waiting for changes")
+
+    def stop(self) -> None:
+        self.cancel.set()
+        self.thread.join()
+
+
+def _watch_tasks(ctx: dict) -> list:
+    from lolipop.handlers.script_runner import Task, parse_tasks
+
+    if ctx["is_file"]:
+        target = Path(ctx["target"])
+        cmd = f"{shlex.quote(ctx['python_cmd'])} {shlex.quote(target.name)}"
+        return [Task(target.stem, cmd, [])]
+
+    scripts = ctx["scripts"]
+    if not scripts:
+        raise RuntimeError("No 'run' script defined in config")
+    return parse_tasks([scripts] if isinstance(scripts, str) else scripts)
+
+
+def _watch(
+    target: Path,
+    ctx: dict,
+    offline: bool,
+    jobs: int,
+    ignore: List[str],
+    debounce: float,
+) -> None:
+    from lolipop.handlers.script_runner import script_env
+    from lolipop.handlers.watcher import Watcher
+    from lolipop.modules.config_loader import CONFIG_FILENAMES
+
+    project_dir = Path(ctx["project_dir"])
+    config_files = {project_dir / n for n in (*CONFIG_FILENAMES, "pyproject.toml")}
+
+    def load(ctx: dict):
+        env_path = Path(ctx["env_path"])
+        patterns = [*ignore, *ctx["watch_ignore"]]
+        if env_path.is_relative_to(project_dir):
+            patterns.append(env_path.relative_to(project_dir).as_posix())
+        return _watch_tasks(ctx), script_env(env_path), patterns
+
+    tasks, env, patterns = load(ctx)
+    watcher = Watcher(project_dir, ignore=patterns)
+    info(f"Watching {project_dir} ({watcher.backend}); Ctrl-C to stop")
+
+    runner: Optional[_Runner] = _Runner(tasks, project_dir, env, jobs)
+    try:
+        for changed in watcher.changes(debounce=debounce):
+            if runner is not None:
+                runner.stop()
+                runner = None
+
+            shown = sorted(str(p.relative_to(project_dir)) for p in changed if p != project_dir)
+            info(f"Changed: {', '.join(shown[:5])}{' …' if len(shown) > 5 else ''}")
+
+            if changed & config_files:
+                try:
+                    ctx = _prepare(target, offline)
+                    new_tasks, env, new_patterns = load(ctx)
+                except Exception as e:
+                    error(f"Config reload failed: {e}")
+                    continue
+                tasks = new_tasks
+                if new_patterns != patterns:
+                    patterns = new_patterns
+                    watcher.close()
+                    watcher = Watcher(project_dir, ignore=patterns)
+                info("Config reloaded")
+
+            runner = _Runner(tasks, project_dir, env, jobs)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if runner is not None:
+            runner.stop()
+        watcher.close()
+
+
+# -------------------------
+# Multi-project mode
+# -------------------------
+def _run_many(
+    select_all: bool,
+    patterns: List[str],
+    tags: List[str],
+    parallel: Optional[int],
+    jobs: Optional[int],
+    offline: bool,
+) -> None:
+    from rich.markup import escape
+    from rich.table import Table
+    from lolipop.handlers import multi_run
+    from lolipop.handlers.project_tracker import list_projects
+    from lolipop.modules.logger import get_console
+
+    projects = multi_run.select_projects(list_projects(), patterns, tags, select_all)
+    if not projects:
+        raise RuntimeError("No tracked projects selected")
+
+    parallel = parallel or multi_run.DEFAULT_PARALLEL
+    info(f"Preparing {len(projects)} project(s)...")
+    results = multi_run.prepare_projects(projects, offline=offline, parallel=parallel)
+
+    start = time.perf_counter()
+    try:
+        multi_run.run_projects(
+            results,
+            parallel=parallel,
+            jobs=jobs or 1,
+            on_done=lambda r: (success if r["status"] == "ok" else error)(
+                f"{r['name']}: {r['status']} in {r['seconds']:.2f}s"
+            ),
+        )
+    except KeyboardInterrupt:
+        warn("Interrupted; stopped running projects")
+    wall = time.perf_counter() - start
+
+    styles = {"ok": "green", "failed": "red", "error": "red", "skipped": "yellow"}
+    table = Table(title=f"lolipop run: {len(results)} project(s) in {wall:.2f}s")
+    table.add_column("Project")
+    table.add_column("Status")
+    table.add_column("Time", justify="right")
+    table.add_column("Details", overflow="fold")
+    for r in results:
+        status = r["status"]
+        table.add_row(
+            escape(r["name"]),
+            f"[{styles.get(status, 'yellow')}]{status}[/]",
+            f"{r['seconds']:.2f}s" if r["seconds"] else "-",
+            escape(r["error"] or ""),
+        )
+    get_console().print(table)
+
+    if any(r["status"] != "ok" and r["status"] != "skipped" for r in results):
+        raise typer.Exit(1)
+
+
+def _exec_file(python_cmd: str, target_path: Path, project_dir: Path, env: dict) -> None:
+    """
+    Replace this process with the env's interpreter running the file.
+    Only returns by raising (e.g. the interpreter is missing).
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.chdir(project_dir)
+    os.execve(python_cmd, [python_cmd, target_path.name], env)
+
+
 @app.callback(invoke_without_command=True)
 def run(
-    target: str = typer.Argument(".", help="Project directory or file to run")
+    target: str = typer.Argument(".", help="Project directory or file to run"),
+    jobs: int | None = typer.Option(
+        None,
+        "--jobs",
+        "-j",
+        help="Max tasks to run in parallel (task-graph scripts only)",
+    ),
+    offline: bool = typer.Option(
+        False,
+        "--offline",
+        help="Install dependencies only from the local wheelhouse",
+    ),
+    watch: bool = typer.Option(
+        False,
+        "--watch",
+        "-w",
+        help="Restart on file changes in the project",
+    ),
+    ignore: Optional[List[str]] = typer.Option(
+        None,
+        "--ignore",
+        "-i",
+        help="Glob of paths not to watch (repeatable; also `watch.ignore` in config)",
+    ),
+    debounce: int = typer.Option(
+        200,
+        "--debounce",
+        help="Milliseconds without changes before restarting",
+    ),
+    select_all: bool = typer.Option(
+        False,
+        "--all",
+        help="Run every tracked project",
+    ),
+    projects: Optional[List[str]] = typer.Option(
+        None,
+        "--projects",
+        "-p",
+        help="Tracked project name or glob to run (repeatable)",
+    ),
+    tag: Optional[List[str]] = typer.Option(
+        None,
+        "--tag",
+        "-t",
+        help="Run tracked projects with this tag (repeatable)",
+    ),
+    parallel: int | None = typer.Option(
+        None,
+        "--parallel",
+        "-P",
+        help="Max projects running at once (multi-project mode)",
+    ),
+    supervised: bool = typer.Option(
+        False,
+        "--supervised",
+        help="Run a file as a child of lolipop instead of exec'ing it",
+    ),
 ):
     try:
-        target_path = Path(target).resolve()
+        if select_all or projects or tag:
+            if watch:
+                raise RuntimeError("--watch runs a single project")
+            _run_many(select_all, projects or [], tag or [], parallel, jobs, offline)
+            return
 
-        # -------------------------
-        # Resolve project + config
-        # -------------------------
-        project_dir = (
-            target_path.parent if target_path.is_file() else target_path
-        )
-        cfg = load_project_config(project_dir)
+        ctx = _prepare(Path(target).resolve(), offline)
 
-        # -------------------------
-        # Environment
-        # -------------------------
-        env_cfg = cfg.environment or {}
-        env_path = (
-            resolve_environment(env_cfg)
-            if env_cfg.get("name")
-            else create_base_environment()
-        )
+        target_path = Path(ctx["target"])
+        project_dir = Path(ctx["project_dir"])
+        env_path = Path(ctx["env_path"])
+        python_cmd = ctx["python_cmd"]
 
-        lang = env_cfg.get("lang", "python")
-        version = env_cfg.get("version")
+        if watch:
+            from lolipop.handlers.script_runner import DEFAULT_JOBS
 
-        if lang != "python":
-            raise RuntimeError(f"Unsupported language: {lang}")
+            _watch(
+                Path(target).resolve(),
+                ctx,
+                offline,
+                jobs or DEFAULT_JOBS,
+                ignore or [],
+                debounce / 1000,
+            )
+            return
 
-        python_cmd = (
-            f"python{version}" if version else "python3.11"
-        )
+        from lolipop.handlers.script_runner import script_env
 
-        env = os.environ.copy()
-        env["PATH"] = f"{env_path / 'bin'}:{env['PATH']}"
+        # same environment for exec, supervised runs and project scripts
+        env = script_env(env_path)
 
         # -------------------------
         # Run file directly
         # -------------------------
-        if target_path.is_file():
+        if ctx["is_file"]:
             info(f"Running {target_path.name} using {python_cmd}")
-            subprocess.run(
-                [python_cmd, target_path.name],
-                cwd=project_dir,
-                env=env,
-                check=True,
-            )
+            from lolipop.modules import profiler
+
+            # nothing left to do after the script: hand the process over
+            if not supervised and os.name == "posix" and not profiler.is_enabled():
+                _exec_file(python_cmd, target_path, project_dir, env)
+
+            with span("run.file", file=target_path.name):
+                subprocess.run(
+                    [python_cmd, target_path.name],
+                    cwd=project_dir,
+                    env=env,
+                    check=True,
+                )
             # update_last_run(cfg.name, "run:file", {"file": target_path.name})
             return
 
         # -------------------------
         # Run project scripts
         # -------------------------
-        scripts = cfg.scripts.get("run")
+        scripts = ctx["scripts"]
         if not scripts:
             raise RuntimeError("No 'run' script defined in config")
 
-        run_scripts(
-            scripts=scripts,
-            project_dir=project_dir,
-            env_path=env_path,
-        )
+        from lolipop.handlers.script_runner import DEFAULT_JOBS, run_scripts
+
+        with span("run.scripts"):
+            run_scripts(
+                scripts=scripts,
+                project_dir=project_dir,
+                env_path=env_path,
+                jobs=jobs or DEFAULT_JOBS,
+            )
 
         # update_last_run(cfg.name, "run:project")
 
+    except typer.Exit:
+        raise
     except Exception as e:
         error(str(e))
         raise typer.Exit(1)
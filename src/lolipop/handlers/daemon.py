@@ -0,0 +1,257 @@
+"""
+Lolipop daemon
+
+Optional long-lived process that keeps the expensive parts of lolipop
+warm: imported modules, the open registry, parsed project configs and
+git metadata. CLI commands talk to it over a Unix domain socket with a
+tiny JSON-lines protocol (see modules/daemon_client):
+
+    -> {"op": "project.list", "args": {}}
+    <- {"ok": true, "result": [...]}
+
+Every in-memory cache is keyed on file stat signatures, so edits made by
+other processes (or by hand) are picked up on the next request:
+
+- registry results: registry.db and its -wal file
+- configs: every candidate config file in the project dir
+- git metadata: HEAD, the current ref, packed-refs and config
+
+Requests are served one at a time; there is no shared mutable state to
+guard and registry writes stay serialized.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socketserver
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from lolipop.clients.git_native import NativeGitError, find_git_dirs, read_metadata
+from lolipop.handlers import project_tracker
+from lolipop.handlers.project_scanner import CONFIG_NAMES
+from lolipop.handlers.run_context import resolve_run
+from lolipop.modules.app_support import get_lolipop_data_dir
+from lolipop.modules.config_loader import LolipopConfig, load_project_config
+from lolipop.modules.daemon_client import SOCKET_PATH
+
+DATA_DIR = get_lolipop_data_dir(create=False)
+PID_FILE = DATA_DIR / "daemon.pid"
+LOG_FILE = DATA_DIR / "daemon.log"
+
+
+class DaemonError(Exception):
+    pass
+
+
+def _stat(path: Path) -> Optional[tuple]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+# -------------------------
+# Cached state
+# -------------------------
+class DaemonState:
+    def __init__(self):
+        self.started = time.time()
+        self.requests = 0
+        self._registry_sig: Optional[tuple] = None
+        self._projects: Optional[list] = None
+        self._configs: Dict[str, tuple] = {}
+        self._git: Dict[str, tuple] = {}
+
+    # ---- registry ----
+    def _registry_signature(self) -> tuple:
+        db = project_tracker.REGISTRY_FILE
+        return (_stat(db), _stat(db.with_name(db.name + "-wal")))
+
+    def projects(self) -> list:
+        sig = self._registry_signature()
+        if self._projects is None or sig != self._registry_sig:
+            self._projects = project_tracker.list_projects()
+            self._registry_sig = sig
+        return self._projects
+
+    # ---- configs ----
+    def config(self, project_dir: Path) -> LolipopConfig:
+        key = str(project_dir)
+        sig = tuple(
+            _stat(project_dir / name) for name in (*CONFIG_NAMES, "pyproject.toml")
+        )
+        cached = self._configs.get(key)
+        if cached and cached[0] == sig:
+            return cached[1]
+        cfg = load_project_config(project_dir)
+        self._configs[key] = (sig, cfg)
+        return cfg
+
+    # ---- git ----
+    def git(self, project_dir: Path) -> Optional[dict]:
+        dirs = find_git_dirs(project_dir)
+        if dirs is None:
+            return None
+
+        head = dirs.git_dir / "HEAD"
+        try:
+            ref = head.read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        ref_path = dirs.common_dir / ref[5:].strip() if ref.startswith("ref:") else None
+        sig = (
+            ref,
+            _stat(ref_path) if ref_path else None,
+            _stat(dirs.common_dir / "packed-refs"),
+            _stat(dirs.common_dir / "config"),
+        )
+
+        key = str(dirs.worktree)
+        cached = self._git.get(key)
+        if cached and cached[0] == sig:
+            return cached[1]
+        try:
+            meta = read_metadata(project_dir)
+        except NativeGitError:
+            return None
+        self._git[key] = (sig, meta)
+        return meta
+
+
+# -------------------------
+# Operations
+# -------------------------
+def _op_ping(state: DaemonState, args: dict) -> dict:
+    return {
+        "pid": os.getpid(),
+        "uptime": round(time.time() - state.started, 3),
+        "requests": state.requests,
+        "cached_configs": len(state._configs),
+        "cached_git": len(state._git),
+    }
+
+
+def _op_project_list(state: DaemonState, args: dict) -> list:
+    return state.projects()
+
+
+def _op_project_query(state: DaemonState, args: dict) -> list:
+    return list(project_tracker.query_projects(**args))
+
+
+def _op_project_current(state: DaemonState, args: dict) -> Optional[dict]:
+    return next((p for p in state.projects() if p.get("active")), None)
+
+
+def _op_project_info(state: DaemonState, args: dict) -> Optional[dict]:
+    name = args.get("name")
+    return next((p for p in state.projects() if p.get("name") == name), None)
+
+
+def _op_project_switch(state: DaemonState, args: dict) -> bool:
+    name = args.get("name")
+    if not any(p.get("name") == name for p in state.projects()):
+        return False
+    project_tracker.set_active_project(name)
+    return True
+
+
+def _op_git_info(state: DaemonState, args: dict) -> Optional[dict]:
+    return state.git(Path(args["path"]).resolve())
+
+
+def _op_run_resolve(state: DaemonState, args: dict) -> dict:
+    # config only: env creation and installs stay in the client
+    return resolve_run(Path(args["target"]), load_config=state.config)
+
+
+OPS: Dict[str, Callable[[DaemonState, dict], Any]] = {
+    "ping": _op_ping,
+    "project.list": _op_project_list,
+    "project.query": _op_project_query,
+    "project.current": _op_project_current,
+    "project.info": _op_project_info,
+    "project.switch": _op_project_switch,
+    "git.info": _op_git_info,
+    "run.resolve": _op_run_resolve,
+}
+
+
+# -------------------------
+# Server
+# -------------------------
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server: DaemonServer = self.server  # type: ignore[assignment]
+        line = self.rfile.readline()
+        if not line:
+            return
+
+        try:
+            request = json.loads(line)
+            op = request.get("op")
+            args = request.get("args") or {}
+            server.state.requests += 1
+
+            if op == "shutdown":
+                response = {"ok": True, "result": None}
+                server.stopping = True
+            elif op in OPS:
+                response = {"ok": True, "result": OPS[op](server.state, args)}
+            else:
+                response = {"ok": False, "error": f"Unknown operation: {op}"}
+        except Exception as e:
+            response = {"ok": False, "error": str(e) or type(e).__name__}
+
+        self.wfile.write(json.dumps(response, default=str).encode("utf-8") + b"\n")
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    def __init__(self, socket_path: Path):
+        self.state = DaemonState()
+        self.stopping = False
+        super().__init__(str(socket_path), _Handler)
+
+
+def read_pid() -> Optional[int]:
+    try:
+        pid = int(PID_FILE.read_text(encoding="utf-8").strip())
+        os.kill(pid, 0)
+    except (OSError, ValueError):
+        return None
+    return pid
+
+
+def serve(socket_path: Path = SOCKET_PATH) -> None:
+    """
+    Run the daemon in the foreground until a `shutdown` request arrives
+    (or the process is interrupted). Cleans up its socket and pid file.
+    """
+    if read_pid() is not None:
+        raise DaemonError(f"Daemon already running (pid {read_pid()})")
+
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        socket_path.unlink()  # stale socket from a crashed daemon
+    except FileNotFoundError:
+        pass
+
+    server = DaemonServer(socket_path)
+    os.chmod(socket_path, 0o600)
+    PID_FILE.write_text(str(os.getpid()), encoding="utf-8")
+    try:
+        while not server.stopping:
+            server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for path in (socket_path, PID_FILE):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
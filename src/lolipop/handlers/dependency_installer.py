@@ -0,0 +1,388 @@
+"""
+Lolipop dependency installer
+
+Installs a project's `dependencies` into its environment through the
+shared package store.
+
+- Requirements are resolved in waves: each wave looks up wheels in the
+  local wheelhouse(s), downloads the missing ones concurrently (unless
+  offline), unpacks them into the store concurrently, and queues their
+  Requires-Dist for the next wave
+- Every constraint on a name is kept (project and Requires-Dist alike);
+  the chosen version must satisfy all of them. A later constraint that
+  excludes the chosen version re-selects it, and no satisfying version
+  is a conflict error naming each constraint and where it came from
+- Everything is linked into the environment in one batch at the end
+- An unchanged dependency list on an unchanged environment is skipped
+  via a small stamp file, so `lolipop run` pays almost nothing
+
+Wheelhouse lookup order: `wheelhouse:` in the project config (relative
+to the project), LOLIPOP_WHEELHOUSE (os.pathsep separated), then the
+download cache under the lolipop data dir. LOLIPOP_INDEX_URL or
+`index_url:` selects the index used for downloads.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from email.parser import HeaderParser
+from pathlib import Path
+from typing import Iterable, Optional
+
+from packaging.markers import UndefinedComparison, UndefinedEnvironmentName
+from packaging.requirements import InvalidRequirement
+from packaging.requirements import Requirement as PackagingRequirement
+
+from lolipop.handlers.package_store import (
+    ENV_PACKAGES_FILE,
+    PackageStoreError,
+    StoreEntry,
+    add_wheel,
+    env_python_version,
+    find_wheels,
+    link_entries,
+    normalize_name,
+    parse_wheel_name,
+)
+from lolipop.modules.app_support import get_lolipop_data_dir
+
+DOWNLOAD_CACHE = get_lolipop_data_dir(create=False) / "wheelhouse"
+STAMP_FILE = ".lolipop-deps.json"
+DEFAULT_JOBS = min(16, (os.cpu_count() or 1) * 4)
+
+class DependencyInstallError(Exception):
+    pass
+
+
+# -------------------------
+# Requirements
+# -------------------------
+class Requirement:
+    def __init__(self, text: str):
+        self.text = text.strip()
+        try:
+            parsed = PackagingRequirement(self.text)
+        except InvalidRequirement as e:
+            raise DependencyInstallError(f"Invalid requirement: {text!r} ({str(e).splitlines()[0]})")
+        self.name = normalize_name(parsed.name)
+        self.specifier = str(parsed.specifier)
+        self.marker = str(parsed.marker) if parsed.marker else ""
+        self._specifiers = parsed.specifier
+        self._marker = parsed.marker
+
+    @property
+    def pinned(self) -> Optional[str]:
+        if self.specifier.startswith("==") and "," not in self.specifier and "*" not in self.specifier:
+            return self.specifier[2:]
+        return None
+
+    def applies(self, python_version: str) -> bool:
+        """
+        Evaluate the environment marker for the target interpreter.
+        """
+        if self._marker is None:
+            return True
+        env = {"python_version": python_version, "python_full_version": f"{python_version}.0", "extra": ""}
+        try:
+            return self._marker.evaluate(env)
+        except (UndefinedComparison, UndefinedEnvironmentName):
+            return False
+
+    def allows(self, version: str) -> bool:
+        return self._specifiers.contains(version, prereleases=True)
+
+    def __repr__(self) -> str:
+        return f"Requirement({self.text!r})"
+
+
+def parse_requirements(dependencies: Iterable) -> list[Requirement]:
+    """
+    Every requirement, in order; several may name the same project
+    (e.g. `foo>=1` and `foo<2`) and all of them apply.
+    """
+    seen: dict[str, Requirement] = {}
+    for dep in dependencies or []:
+        if not isinstance(dep, str) or not dep.strip() or dep.strip().startswith("#"):
+            continue
+        req = Requirement(dep)
+        seen.setdefault(req.text, req)
+    return list(seen.values())
+
+
+def _requires_dist(entry: StoreEntry) -> list[Requirement]:
+    for item in entry.tree.iterdir():
+        if item.name.endswith(".dist-info"):
+            metadata = item / "METADATA"
+            if not metadata.is_file():
+                return []
+            headers = HeaderParser().parsestr(metadata.read_text(encoding="utf-8"))
+            return [Requirement(r) for r in headers.get_all("Requires-Dist") or []]
+    return []
+
+
+# -------------------------
+# Wheelhouses
+# -------------------------
+def wheelhouses(project_dir: Optional[Path] = None, cfg_data: Optional[dict] = None) -> list[Path]:
+    houses: list[Path] = []
+    configured = (cfg_data or {}).get("wheelhouse")
+    if configured:
+        path = Path(configured).expanduser()
+        if project_dir is not None and not path.is_absolute():
+            path = project_dir / path
+        houses.append(path)
+    for item in os.environ.get("LOLIPOP_WHEELHOUSE", "").split(os.pathsep):
+        if item:
+            houses.append(Path(item).expanduser())
+    houses.append(DOWNLOAD_CACHE)
+    return [h for h in houses if h.is_dir() or h == DOWNLOAD_CACHE]
+
+
+def _find(reqs: list[Requirement], houses: list[Path], py: str) -> Optional[Path]:
+    """
+    Newest compatible wheel every one of `reqs` (same project) allows,
+    wheelhouses in lookup order.
+    """
+    pinned = next((r.pinned for r in reqs if r.pinned), None)
+    for house in houses:
+        if not house.is_dir():
+            continue
+        for wheel in find_wheels(house, reqs[0].name, pinned, py):
+            version = parse_wheel_name(wheel.name)["version"]
+            if all(r.allows(version) for r in reqs):
+                return wheel
+    return None
+
+
+def _combined(reqs: list[Requirement]) -> str:
+    """
+    One requirement string for pip, e.g. "foo>=1,<2".
+    """
+    specifiers = sorted({part for r in reqs for part in r.specifier.split(",") if part})
+    return reqs[0].name + ",".join(specifiers)
+
+
+def _download(spec: str, env_path: Path, index_url: Optional[str]) -> Optional[str]:
+    """
+    Fetch one wheel (no deps: the resolver walks Requires-Dist itself)
+    using the environment's own pip, so tags match its interpreter.
+    Returns an error message or None.
+    """
+    DOWNLOAD_CACHE.mkdir(parents=True, exist_ok=True)
+    cmd = [
+        str(env_path / "bin" / "python"),
+        "-m", "pip", "download",
+        "--quiet", "--no-deps", "--only-binary=:all:",
+        "--dest", str(DOWNLOAD_CACHE),
+    ]
+    if index_url:
+        cmd += ["--index-url", index_url]
+    cmd.append(spec)
+    try:
+        subprocess.run(cmd, check=True, capture_output=True, text=True)
+    except FileNotFoundError as e:
+        return f"{spec}: {e}"
+    except subprocess.CalledProcessError as e:
+        lines = (e.stderr or "").strip().splitlines()
+        return f"{spec}: {lines[-1] if lines else 'pip download failed'}"
+    return None
+
+
+# -------------------------
+# Stamp
+# -------------------------
+def _stamp(requirements: list[Requirement], houses: list[Path], env_path: Path) -> str:
+    manifest = env_path / ENV_PACKAGES_FILE
+    try:
+        st = manifest.stat()
+        manifest_sig = [st.st_size, st.st_mtime_ns]
+    except OSError:
+        manifest_sig = None
+    payload = json.dumps(
+        {
+            "reqs": sorted(r.text for r in requirements),
+            "houses": [str(h) for h in houses],
+            "manifest": manifest_sig,
+        }
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _stamp_matches(env_path: Path, stamp: str) -> bool:
+    try:
+        data = json.loads((env_path / STAMP_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    return data.get("stamp") == stamp
+
+
+# -------------------------
+# Install
+# -------------------------
+PROJECT = "project"
+
+# re-selection rounds before giving up on a resolution
+MAX_ROUNDS = 100
+
+
+def _active(
+    constraints: dict[str, list[tuple[str, Requirement]]],
+    resolved: dict[str, StoreEntry],
+) -> dict[str, list[Requirement]]:
+    """
+    Requirements per project name, counting only sources still reachable
+    from the project through the currently chosen versions.
+    """
+    sources = {PROJECT}
+    active: dict[str, list[Requirement]] = {}
+    changed = True
+    while changed:
+        changed = False
+        for name, items in constraints.items():
+            reqs = [req for source, req in items if source in sources]
+            if reqs and name not in active:
+                active[name] = reqs
+                changed = True
+                if name in resolved:
+                    sources.add(f"{name}=={resolved[name].version}")
+            elif reqs:
+                active[name] = reqs
+    return active
+
+
+def _describe(name: str, constraints: dict, active: dict) -> str:
+    """
+    "foo: foo<2 (from project), foo>=2 (from bar==1.0)"
+    """
+    wanted = {id(r) for r in active.get(name, [])}
+    parts = [f"{req.text.split(';')[0].strip()} (from {source})"
+             for source, req in constraints.get(name, []) if id(req) in wanted]
+    if len(parts) > 1:
+        return f"{name}: no version satisfies all of " + ", ".join(parts)
+    return f"{name}: " + ", ".join(parts)
+
+
+def install_dependencies(
+    dependencies: Iterable,
+    env_path: Path,
+    project_dir: Optional[Path] = None,
+    cfg_data: Optional[dict] = None,
+    offline: bool = False,
+    jobs: int = DEFAULT_JOBS,
+) -> dict:
+    """
+    Install `dependencies` (and what they require) into `env_path`.
+
+    Returns {"installed": [...], "skipped": bool}. Raises
+    DependencyInstallError when something cannot be resolved.
+    """
+    requirements = parse_requirements(dependencies)
+    if not requirements:
+        return {"installed": [], "skipped": True}
+
+    houses = wheelhouses(project_dir, cfg_data)
+    stamp = _stamp(requirements, houses, env_path)
+    if _stamp_matches(env_path, stamp):
+        return {"installed": [], "skipped": True}
+
+    py = env_python_version(env_path)
+    index_url = os.environ.get("LOLIPOP_INDEX_URL") or (cfg_data or {}).get("index_url")
+
+    # project name -> [(source, requirement)]; source is PROJECT or the
+    # "name==version" of the package whose Requires-Dist it came from
+    constraints: dict[str, list[tuple[str, Requirement]]] = {}
+    resolved: dict[str, StoreEntry] = {}
+
+    def require(source: str, reqs: Iterable[Requirement]) -> None:
+        for req in reqs:
+            if req.applies(py):
+                constraints.setdefault(req.name, []).append((source, req))
+
+    require(PROJECT, requirements)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for _ in range(MAX_ROUNDS):
+            active = _active(constraints, resolved)
+            # unresolved names, and resolved ones a newer constraint excludes
+            todo = {
+                name: reqs for name, reqs in active.items()
+                if name not in resolved
+                or not all(r.allows(resolved[name].version) for r in reqs)
+            }
+            if not todo:
+                break
+
+            wheels = {name: _find(reqs, houses, py) for name, reqs in todo.items()}
+            missing = [name for name, w in wheels.items() if w is None]
+
+            # each constraint alone has a wheel, together none: a conflict,
+            # not something a download could fix
+            conflicts = [
+                n for n in missing
+                if len(todo[n]) > 1 and all(_find([r], houses, py) for r in todo[n])
+            ]
+            if conflicts:
+                raise DependencyInstallError(
+                    "Conflicting requirements: "
+                    + "; ".join(_describe(n, constraints, active) for n in conflicts)
+                )
+
+            if missing and offline:
+                raise DependencyInstallError(
+                    "Not in local wheelhouse (offline): "
+                    + "; ".join(_describe(n, constraints, active) for n in missing)
+                )
+
+            if missing:
+                specs = [_combined(todo[n]) for n in missing]
+                errors = [e for e in pool.map(lambda spec: _download(spec, env_path, index_url), specs) if e]
+                if errors:
+                    raise DependencyInstallError("Download failed: " + "; ".join(errors))
+                for name in missing:
+                    wheels[name] = _find(todo[name], houses, py)
+                still = [n for n, w in wheels.items() if w is None]
+                if still:
+                    raise DependencyInstallError(
+                        "No compatible wheel for: "
+                        + "; ".join(_describe(n, constraints, active) for n in still)
+                    )
+
+            try:
+                entries = list(pool.map(add_wheel, wheels.values()))
+            except PackageStoreError as e:
+                raise DependencyInstallError(str(e))
+
+            for entry in entries:
+                previous = resolved.get(entry.name)
+                if previous is not None:
+                    # the replaced version's own requirements no longer apply
+                    dropped = f"{previous.name}=={previous.version}"
+                    for name in constraints:
+                        constraints[name] = [c for c in constraints[name] if c[0] != dropped]
+                resolved[entry.name] = entry
+                require(f"{entry.name}=={entry.version}", _requires_dist(entry))
+        else:
+            raise DependencyInstallError(
+                "Could not resolve dependencies: versions keep changing for "
+                + ", ".join(sorted(todo))
+            )
+
+    # only what the project still (transitively) requires
+    active = _active(constraints, resolved)
+    resolved = {name: entry for name, entry in resolved.items() if name in active}
+
+    link_entries(list(resolved.values()), env_path)
+
+    (env_path / STAMP_FILE).write_text(
+        json.dumps({"stamp": _stamp(requirements, houses, env_path)}),
+        encoding="utf-8",
+    )
+
+    return {
+        "installed": sorted(f"{e.name}=={e.version}" for e in resolved.values()),
+        "skipped": False,
+    }
@@ -0,0 +1,269 @@
+"""
+Lolipop environment manifest
+
+Each environment carries a small `.lolipop-env.json` describing what it
+was built from:
+
+    {"name", "path", "interpreter", "version", "abi", "spec_hash",
+     "created_at", "last_used", "interpreter_stat", "pyvenv_stat"}
+
+Validation never spawns Python: it compares pyvenv.cfg and the base
+interpreter's stat against the manifest. If the interpreter binary
+changed in place (a patch upgrade), the environment is still accepted
+as long as the interpreter still resolves to the same major.minor.
+
+An environment is broken when:
+- pyvenv.cfg is missing
+- the interpreter or the venv's bin/python no longer resolves
+- it was built for a different Python than the spec asks for
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from lolipop.handlers import interpreters
+
+MANIFEST_FILE = ".lolipop-env.json"
+
+# last_used is rewritten at most this often (seconds)
+TOUCH_INTERVAL = 60
+
+_VERSION_RE = re.compile(r"python(\d+\.\d+)")
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)*")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _stat(path: Path) -> Optional[list]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+# -------------------------
+# pyvenv.cfg
+# -------------------------
+def read_pyvenv_cfg(env_path: Path) -> Dict[str, str]:
+    values: Dict[str, str] = {}
+    try:
+        text = (env_path / "pyvenv.cfg").read_text(encoding="utf-8")
+    except OSError:
+        return values
+    for line in text.splitlines():
+        key, sep, value = line.partition("=")
+        if sep:
+            values[key.strip().lower()] = value.strip()
+    return values
+
+
+def _interpreter(env_path: Path, cfg: Dict[str, str]) -> Optional[str]:
+    if cfg.get("executable"):
+        return cfg["executable"]
+    if cfg.get("home"):
+        version = cfg.get("version") or cfg.get("version_info") or ""
+        short = ".".join(version.split(".")[:2])
+        for name in (f"python{short}", "python3", "python"):
+            candidate = Path(cfg["home"]) / name
+            if candidate.exists():
+                return str(candidate)
+    python = env_path / "bin" / "python"
+    return os.path.realpath(python) if python.exists() else None
+
+
+def _abi(env_path: Path, version: Optional[str]) -> Optional[str]:
+    if not version:
+        return None
+    short = "".join(version.split(".")[:2])
+    free_threaded = any(env_path.glob("lib/python*t/site-packages"))
+    return f"cp{short}{'t' if free_threaded else ''}"
+
+
+def spec_hash(env_cfg: Optional[dict]) -> str:
+    env_cfg = env_cfg or {}
+    spec = {
+        "lang": env_cfg.get("lang", "python"),
+        "type": env_cfg.get("type", "venv"),
+        "version": str(env_cfg["version"]) if env_cfg.get("version") else None,
+    }
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def version_matches(actual: Optional[str], requested: Optional[str]) -> bool:
+    """
+    Whether version `actual` satisfies the spec `requested`, with the
+    same matcher interpreter selection uses ("3.11", "3.12.*",
+    ">=3.10,<3.13"); no request matches anything.
+    """
+    if not requested:
+        return True
+    match = _NUMBER_RE.match(actual or "")
+    if not match:
+        return False
+    try:
+        return interpreters.matches(match.group(0), str(requested))
+    except interpreters.InterpreterError:
+        return False
+
+
+# -------------------------
+# Manifest I/O
+# -------------------------
+def read_manifest(env_path: Path) -> Optional[dict]:
+    try:
+        data = json.loads((env_path / MANIFEST_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def write_manifest(env_path: Path, manifest: dict) -> None:
+    path = env_path / MANIFEST_FILE
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def build_manifest(
+    env_path: Path,
+    env_cfg: Optional[dict] = None,
+    previous: Optional[dict] = None,
+) -> dict:
+    cfg = read_pyvenv_cfg(env_path)
+    version = cfg.get("version") or cfg.get("version_info")
+    interpreter = _interpreter(env_path, cfg)
+    now = _now()
+    previous = previous or {}
+    if env_cfg is None and previous:
+        digest, requested = previous.get("spec_hash"), previous.get("requested_version")
+    else:
+        digest = spec_hash(env_cfg)
+        requested = str((env_cfg or {}).get("version") or "") or None
+    return {
+        "name": env_path.name,
+        "path": str(env_path),
+        "interpreter": interpreter,
+        "version": version,
+        "abi": _abi(env_path, version),
+        "spec_hash": digest,
+        "requested_version": requested,
+        "created_at": previous.get("created_at") or now,
+        "last_used": now,
+        "interpreter_stat": _stat(Path(interpreter)) if interpreter else None,
+        "pyvenv_stat": _stat(env_path / "pyvenv.cfg"),
+    }
+
+
+def record_environment(env_path: Path, env_cfg: Optional[dict] = None) -> dict:
+    """
+    Write a fresh manifest for a just-created (or adopted) environment.
+    """
+    manifest = build_manifest(env_path, env_cfg, read_manifest(env_path))
+    write_manifest(env_path, manifest)
+    return manifest
+
+
+# -------------------------
+# Validation
+# -------------------------
+def validate(env_path: Path, env_cfg: Optional[dict] = None) -> Tuple[bool, str]:
+    """
+    Cheap validity check (stats only). Returns (ok, reason). Refreshes
+    the manifest when it is missing or stale but the env is still good.
+    With `env_cfg` None only the env itself is checked, not the spec.
+    """
+    pyvenv_stat = _stat(env_path / "pyvenv.cfg")
+    if pyvenv_stat is None:
+        return False, "has no pyvenv.cfg"
+
+    manifest = read_manifest(env_path)
+    requested = (env_cfg or {}).get("version")
+
+    if manifest is None or manifest.get("pyvenv_stat") != pyvenv_stat:
+        # unknown or rebuilt outside lolipop: re-read pyvenv.cfg
+        manifest = build_manifest(env_path, env_cfg, manifest)
+        if not manifest["interpreter"]:
+            return False, "has no interpreter"
+        dirty = True
+    else:
+        dirty = False
+
+    interpreter = manifest.get("interpreter")
+    current = _stat(Path(interpreter)) if interpreter else None
+    if current is None:
+        return False, f"interpreter {interpreter} is gone"
+    if not (env_path / "bin" / "python").exists() and os.name != "nt":
+        return False, "bin/python no longer resolves"
+
+    if current != manifest.get("interpreter_stat"):
+        # replaced in place; fine unless it now is another minor version
+        match = _VERSION_RE.search(Path(os.path.realpath(interpreter)).name)
+        built = ".".join((manifest.get("version") or "").split(".")[:2])
+        if match and built and match.group(1) != built:
+            return False, f"interpreter changed from {built} to {match.group(1)}"
+        manifest["interpreter_stat"] = current
+        dirty = True
+
+    if not version_matches(manifest.get("version"), requested):
+        return False, f"uses Python {manifest.get('version')}, spec wants {requested}"
+
+    if env_cfg is not None and manifest.get("spec_hash") != spec_hash(env_cfg):
+        manifest["spec_hash"] = spec_hash(env_cfg)
+        manifest["requested_version"] = str(requested) if requested else None
+        dirty = True
+
+    if dirty:
+        try:
+            write_manifest(env_path, manifest)
+        except OSError:
+            pass
+    return True, "ok"
+
+
+def touch(env_path: Path) -> None:
+    manifest = read_manifest(env_path)
+    if manifest is None:
+        return
+    try:
+        last = datetime.fromisoformat(manifest.get("last_used") or "")
+        if (datetime.now(timezone.utc) - last).total_seconds() < TOUCH_INTERVAL:
+            return
+    except ValueError:
+        pass
+    manifest["last_used"] = _now()
+    try:
+        write_manifest(env_path, manifest)
+    except OSError:
+        pass
+
+
+# -------------------------
+# Listing
+# -------------------------
+def list_manifests(env_home: Path) -> list[dict]:
+    """
+    One entry per environment directory, from manifests only. Entries
+    without a manifest have only "name", "path" and "manifest": False.
+    """
+    if not env_home.is_dir():
+        return []
+    entries = []
+    for env_path in sorted(env_home.iterdir()):
+        if env_path.name.startswith(".") or not env_path.is_dir():
+            continue
+        manifest = read_manifest(env_path)
+        if manifest is None:
+            entries.append({"name": env_path.name, "path": str(env_path), "manifest": False})
+        else:
+            entries.append({**manifest, "name": env_path.name, "manifest": True})
+    return entries
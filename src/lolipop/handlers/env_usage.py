@@ -0,0 +1,384 @@
+"""
+Lolipop environment usage index
+
+Tracks how much disk each environment under LOLI_ENV_HOME takes, when
+it was last used and which tracked projects use it, so cold environments
+can be evicted (`lolipop env du`, `lolipop env prune`).
+
+Sizes are measured with a scandir walk, the parts of an env in parallel:
+every entry of site-packages is one part and everything else is a
+"base" part. Each part is cached with the mtime it was measured at, so
+a refresh only re-walks parts whose mtime changed (e.g. a newly
+installed package) instead of every venv. `refresh(full=True)` re-walks
+everything.
+
+Two sizes are kept per env:
+- size: disk blocks used by its files
+- exclusive: blocks of files not hardlinked elsewhere (template, package
+  store), i.e. what removing the env actually frees
+
+Last-used time comes from the env manifest (updated whenever run/init
+resolve the env). The base environment is never evicted.
+
+Set LOLIPOP_ENV_MAX_SIZE (e.g. 20G) to prune least-recently-used envs
+automatically after a new env is created. Size budgets are checked
+against exclusive sizes, since that is what eviction frees.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from lolipop.handlers import env_manifest
+from lolipop.handlers.environment import BASE_ENV_NAME, LOLI_ENV_HOME
+from lolipop.modules.app_support import get_lolipop_data_dir
+from lolipop.modules.profiler import span, traced
+
+INDEX_FILE = get_lolipop_data_dir(create=False) / "env_usage.json"
+INDEX_FORMAT = 1
+
+WALK_WORKERS = min(16, (os.cpu_count() or 1) * 4)
+
+_SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*$", re.IGNORECASE)
+_UNITS = {"": 1, "k": 1 << 10, "m": 1 << 20, "g": 1 << 30, "t": 1 << 40}
+
+
+class EnvUsageError(Exception):
+    pass
+
+
+def parse_size(value: str) -> int:
+    """
+    "500M", "1.5G", "2GB", "1024" -> bytes (binary units).
+    """
+    match = _SIZE_RE.match(value)
+    if not match:
+        raise EnvUsageError(f"Invalid size: {value!r} (use e.g. 500M or 10G)")
+    return int(float(match.group(1)) * _UNITS[match.group(2).lower()])
+
+
+# -------------------------
+# Measuring
+# -------------------------
+def _disk(st: os.stat_result) -> int:
+    blocks = getattr(st, "st_blocks", None)
+    return blocks * 512 if blocks is not None else st.st_size
+
+
+def _walk(top: str, skip: Optional[str] = None) -> Tuple[int, int]:
+    """
+    (size, exclusive) of a file or tree, without following symlinks.
+    `skip` is a directory path not descended into.
+    """
+    size = exclusive = 0
+    seen = set()
+    try:
+        st = os.lstat(top)
+    except OSError:
+        return 0, 0
+    if not stat.S_ISDIR(st.st_mode):
+        used = _disk(st)
+        return used, used if st.st_nlink <= 1 else 0
+
+    stack = [top]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.path != skip:
+                            stack.append(entry.path)
+                        continue
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if st.st_ino in seen:
+                    continue
+                seen.add(st.st_ino)
+                used = _disk(st)
+                size += used
+                if st.st_nlink <= 1:
+                    exclusive += used
+    return size, exclusive
+
+
+def _mtime(path: Path) -> Optional[int]:
+    try:
+        return path.lstat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _site_packages(env_path: Path) -> Optional[Path]:
+    found = sorted(env_path.glob("lib/python*/site-packages")) or sorted(
+        env_path.glob("Lib/site-packages")
+    )
+    return found[-1] if found else None
+
+
+def _parts(env_path: Path) -> Dict[str, Tuple[Optional[int], str, Optional[str]]]:
+    """
+    part key -> (signature mtime, path to walk, dir to skip)
+    """
+    site = _site_packages(env_path)
+    base_sig = max(
+        (m for m in (
+            _mtime(env_path),
+            _mtime(env_path / "bin"),
+            _mtime(env_path / "Scripts"),
+            _mtime(env_path / "include"),
+            _mtime(site.parent) if site else None,
+        ) if m is not None),
+        default=None,
+    )
+    parts = {"base": (base_sig, str(env_path), str(site) if site else None)}
+    if site is not None:
+        try:
+            with os.scandir(site) as entries:
+                for entry in entries:
+                    try:
+                        mtime = entry.stat(follow_symlinks=False).st_mtime_ns
+                    except OSError:
+                        continue
+                    parts[f"site/{entry.name}"] = (mtime, entry.path, None)
+        except OSError:
+            pass
+    return parts
+
+
+def measure_env(
+    env_path: Path,
+    previous: Optional[dict] = None,
+    pool: Optional[ThreadPoolExecutor] = None,
+) -> Tuple[dict, int]:
+    """
+    Per-part sizes of one env, reusing parts of `previous` whose mtime
+    is unchanged. Returns (parts, number of parts walked).
+    """
+    old = (previous or {}).get("parts") or {}
+    parts: Dict[str, dict] = {}
+    todo = []
+    for key, (mtime, path, skip) in _parts(env_path).items():
+        cached = old.get(key)
+        if cached and mtime is not None and cached.get("mtime_ns") == mtime:
+            parts[key] = cached
+        else:
+            todo.append((key, mtime, path, skip))
+
+    def walk(item):
+        key, mtime, path, skip = item
+        size, exclusive = _walk(path, skip)
+        return key, {"mtime_ns": mtime, "size": size, "exclusive": exclusive}
+
+    results = pool.map(walk, todo) if pool is not None else map(walk, todo)
+    for key, part in results:
+        parts[key] = part
+    return parts, len(todo)
+
+
+# -------------------------
+# Index
+# -------------------------
+def _load() -> dict:
+    try:
+        data = json.loads(INDEX_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("format") != INDEX_FORMAT:
+        return {}
+    return data.get("envs") or {}
+
+
+def _save(envs: dict) -> None:
+    tmp = INDEX_FILE.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        INDEX_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json.dumps({"format": INDEX_FORMAT, "envs": envs}), encoding="utf-8")
+        os.replace(tmp, INDEX_FILE)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+
+
+def _references() -> Dict[str, List[str]]:
+    """
+    env name -> names of tracked projects using it.
+    """
+    from lolipop.handlers.project_tracker import query_projects
+
+    refs: Dict[str, List[str]] = {}
+    for project in query_projects(fields=["name", "env_name"]):
+        refs.setdefault(project["env_name"] or BASE_ENV_NAME, []).append(project["name"])
+    return refs
+
+
+def _last_used(env_path: Path, manifest: Optional[dict]) -> Optional[str]:
+    if manifest and manifest.get("last_used"):
+        return manifest["last_used"]
+    mtime = _mtime(env_path / "pyvenv.cfg")
+    if mtime is None:
+        return None
+    return datetime.fromtimestamp(mtime / 1e9, timezone.utc).isoformat()
+
+
+@traced("env.usage", cat="env")
+def refresh(full: bool = False, env_home: Optional[Path] = None) -> List[dict]:
+    """
+    Bring the index up to date and return one entry per environment:
+    name, path, size, exclusive, last_used, python, projects.
+    """
+    env_home = env_home or LOLI_ENV_HOME
+    previous = {} if full else _load()
+    refs = _references()
+
+    names = []
+    if env_home.is_dir():
+        names = sorted(
+            p.name for p in env_home.iterdir()
+            if p.is_dir() and not p.name.startswith(".")
+        )
+
+    envs: Dict[str, dict] = {}
+    walked = 0
+    with ThreadPoolExecutor(max_workers=WALK_WORKERS) as pool:
+        for name in names:
+            env_path = env_home / name
+            with span("env.usage.measure", cat="env", env=name):
+                parts, count = measure_env(env_path, previous.get(name), pool)
+            walked += count
+            manifest = env_manifest.read_manifest(env_path)
+            envs[name] = {
+                "name": name,
+                "path": str(env_path),
+                "size": sum(p["size"] for p in parts.values()),
+                "exclusive": sum(p["exclusive"] for p in parts.values()),
+                "last_used": _last_used(env_path, manifest),
+                "python": (manifest or {}).get("version"),
+                "projects": sorted(refs.get(name, [])),
+                "parts": parts,
+            }
+
+    if walked or set(envs) != set(previous) or any(
+        envs[n]["last_used"] != previous.get(n, {}).get("last_used")
+        or envs[n]["projects"] != previous.get(n, {}).get("projects")
+        for n in envs
+    ):
+        _save(envs)
+
+    return [
+        {k: v for k, v in entry.items() if k != "parts"}
+        for entry in envs.values()
+    ]
+
+
+# -------------------------
+# Eviction
+# -------------------------
+def _epoch(value: Optional[str]) -> float:
+    if not value:
+        return 0.0
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def plan_prune(
+    envs: Iterable[dict],
+    max_size: Optional[int] = None,
+    older_than: Optional[float] = None,
+    unreferenced: bool = False,
+    keep: Iterable[str] = (),
+) -> List[dict]:
+    """
+    Envs to evict, least recently used first.
+
+    - unreferenced: only envs no tracked project uses are candidates
+      (alone: evict all of them)
+    - older_than: evict candidates last used before this epoch time
+    - max_size: then evict candidates, LRU first, until the exclusive
+      sizes of all envs add up to at most this. Apparent sizes would
+      count hardlinked files that eviction cannot free
+    """
+    envs = list(envs)
+    protected = {BASE_ENV_NAME, *keep}
+    candidates = sorted(
+        (e for e in envs if e["name"] not in protected
+         and not (unreferenced and e["projects"])),
+        key=lambda e: _epoch(e["last_used"]),
+    )
+
+    evict: List[dict] = []
+    if older_than is not None:
+        evict = [e for e in candidates if _epoch(e["last_used"]) < older_than]
+    elif unreferenced and max_size is None:
+        evict = list(candidates)
+
+    if max_size is not None:
+        total = sum(e["exclusive"] for e in envs) - sum(e["exclusive"] for e in evict)
+        for env in candidates:
+            if total <= max_size:
+                break
+            if env in evict:
+                continue
+            evict.append(env)
+            total -= env["exclusive"]
+
+    return sorted(evict, key=lambda e: _epoch(e["last_used"]))
+
+
+def prune(
+    max_size: Optional[int] = None,
+    older_than: Optional[float] = None,
+    unreferenced: bool = False,
+    dry_run: bool = False,
+    keep: Iterable[str] = (),
+) -> dict:
+    """
+    Evict environments chosen by plan_prune, then drop package store
+    entries only they used. Returns {"removed", "freed_bytes", "store"}.
+    """
+    envs = refresh()
+    evict = plan_prune(envs, max_size, older_than, unreferenced, keep)
+    freed = sum(e["exclusive"] for e in evict)
+    store = None
+
+    if not dry_run and evict:
+        for env in evict:
+            shutil.rmtree(env["path"], ignore_errors=True)
+        index = _load()
+        for env in evict:
+            index.pop(env["name"], None)
+        _save(index)
+
+        from lolipop.handlers.package_store import gc
+
+        store = gc()
+        freed += store["freed_bytes"]
+
+    return {"removed": evict, "freed_bytes": freed, "store": store}
+
+
+def auto_prune(keep: Iterable[str] = ()) -> Optional[dict]:
+    """
+    Prune to LOLIPOP_ENV_MAX_SIZE if it is set; never raises.
+    """
+    limit = os.environ.get("LOLIPOP_ENV_MAX_SIZE")
+    if not limit:
+        return None
+    try:
+        return prune(max_size=parse_size(limit), keep=keep)
+    except Exception:
+        return None
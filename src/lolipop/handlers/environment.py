@@ -2,14 +2,28 @@
 Lolipop environment handler
 
 Environment creation and management handler
+
+New venvs are cloned from a per-interpreter template venv (see
+venv_template) and fall back to `python -m venv` when cloning is not
+possible. Set LOLIPOP_NO_VENV_TEMPLATE=1 to always use `python -m venv`.
+
+Every env carries a manifest (see env_manifest). Existing envs are
+checked against it with a few stats before use; broken or mismatched
+ones are recreated. With LOLIPOP_ENV_MAX_SIZE set, creating an env
+evicts least recently used ones (see env_usage).
 """
 
 from __future__ import annotations
 
+import os
+import shutil
 import subprocess
 from pathlib import Path
-from typing import Dict
-from lolipop.modules.logger import info
+from typing import Dict, Optional
+
+from lolipop.handlers import env_manifest
+from lolipop.modules.logger import info, warn
+from lolipop.modules.profiler import span, traced
 
 LOLI_ENV_HOME = Path.home() / ".local" / "share" / "lolipop" / "envs"
 BASE_ENV_NAME = "lolipop-base"
@@ -28,25 +42,77 @@ def environment_exists(name: str) -> bool:
     return env_path(name).exists()
 
 
-def create_venv(name: str, python_version: str | None = None) -> Path:
+@traced("env.create", cat="env")
+def create_venv(
+    name: str,
+    python_version: str | None = None,
+    env_cfg: Optional[Dict] = None,
+) -> Path:
     path = env_path(name)
     path.parent.mkdir(parents=True, exist_ok=True)
 
-    python_cmd = "python3.11"
-    if python_version:
-        python_cmd = f"python{python_version}"
+    from lolipop.handlers.interpreters import InterpreterError, interpreter_path
 
     try:
-        subprocess.run(
-            [python_cmd, "-m", "venv", str(path)],
-            check=True,
-        )
-    except Exception as e:
+        python_cmd = interpreter_path(python_version)
+    except InterpreterError as e:
         raise EnvironmentError(f"Failed to create venv '{name}': {e}")
 
+    cloned = False
+    if not os.environ.get("LOLIPOP_NO_VENV_TEMPLATE"):
+        from lolipop.handlers.venv_template import clone_venv
+
+        try:
+            with span("env.clone", cat="env", python=python_cmd):
+                clone_venv(LOLI_ENV_HOME, python_cmd, path)
+            cloned = True
+        except Exception as e:
+            warn(f"Template clone failed ({e}), falling back to python -m venv")
+
+    if not cloned:
+        try:
+            with span("env.venv", cat="env", python=python_cmd):
+                subprocess.run(
+                    [python_cmd, "-m", "venv", str(path)],
+                    check=True,
+                )
+        except Exception as e:
+            raise EnvironmentError(f"Failed to create venv '{name}': {e}")
+
+    env_manifest.record_environment(path, env_cfg)
+
+    if os.environ.get("LOLIPOP_ENV_MAX_SIZE"):
+        from lolipop.handlers.env_usage import auto_prune
+
+        with span("env.auto_prune", cat="env"):
+            report = auto_prune(keep=[name])
+        for env in (report or {}).get("removed", []):
+            info(f"Evicted least recently used environment '{env['name']}'")
+
     return path
 
 
+def _usable(name: str, env_cfg: Optional[Dict]) -> bool:
+    """
+    True if env `name` exists and matches its manifest and `env_cfg`.
+    A broken or mismatched env is removed so it can be recreated.
+    """
+    path = env_path(name)
+    if not path.exists():
+        return False
+
+    with span("env.validate", cat="env"):
+        ok, reason = env_manifest.validate(path, env_cfg)
+    if ok:
+        env_manifest.touch(path)
+        return True
+
+    warn(f"Environment '{name}' {reason}, recreating it")
+    shutil.rmtree(path, ignore_errors=True)
+    return False
+
+
+@traced("env.resolve", cat="env")
 def resolve_environment(env_cfg: Dict) -> Path:
     """
     env_cfg example:
@@ -60,24 +126,25 @@ def resolve_environment(env_cfg: Dict) -> Path:
     if not name:
         raise EnvironmentError("Environment name is required")
 
-    if environment_exists(name):
-        return env_path(name)
-
     env_type = env_cfg.get("type", "venv")
     python_version = env_cfg.get("version")
 
     if env_type != "venv":
         raise EnvironmentError("Only venv environments are supported for now")
 
-    return create_venv(name, python_version)
+    if _usable(name, env_cfg):
+        return env_path(name)
+
+    return create_venv(name, python_version, env_cfg)
 
 
+@traced("env.resolve", cat="env")
 def create_base_environment() -> Path:
     """
     Ensure the lolipop-base environment exists.
     Returns the path to the base environment.
     """
-    if environment_exists(BASE_ENV_NAME):
+    if _usable(BASE_ENV_NAME, None):
         return env_path(BASE_ENV_NAME)
 
     info(f"Creating base environment '{BASE_ENV_NAME}'...")
@@ -0,0 +1,373 @@
+"""
+Lolipop event log
+
+Append-only, per-project history storage.
+
+Layout (one pair per project):
+- <name>.jsonl  one JSON event per line
+- <name>.idx    fixed-size (timestamp, offset) records, one per line of the log
+
+Recording an event is one small append to each file. The index lets
+time-range queries seek straight to the first matching line, and
+counting events is a stat() of the index.
+
+Writers (append, index rebuild, compaction) hold an exclusive flock on
+<name>.lock, so concurrent processes interleave whole appends and never
+lose events to a compaction running at the same time. Readers take no
+lock.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import re
+import struct
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single-writer only
+    fcntl = None
+
+# (epoch seconds, byte offset of the line in the .jsonl file)
+INDEX_RECORD = struct.Struct("<dQ")
+
+
+class EventLogError(Exception):
+    pass
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    max_events: keep at most this many (newest) events
+    max_age_days: drop events older than this
+    compact_slack: auto-compact only once the log holds this fraction
+                   more events than max_events, so compaction stays rare
+    """
+    max_events: Optional[int] = None
+    max_age_days: Optional[float] = None
+    compact_slack: float = 0.25
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        def _num(key: str, cast):
+            value = os.environ.get(key)
+            return cast(value) if value else None
+
+        return cls(
+            max_events=_num("LOLIPOP_HISTORY_MAX_EVENTS", int) or 10_000,
+            max_age_days=_num("LOLIPOP_HISTORY_MAX_AGE_DAYS", float),
+        )
+
+
+# ---------------------------------------------------------------------
+# Time helpers
+# ---------------------------------------------------------------------
+
+_RELATIVE = re.compile(r"^(\d+(?:\.\d+)?)([smhdw])$")
+_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+
+def parse_time(value: str) -> float:
+    """
+    Parse an ISO 8601 date/datetime or a relative age like '30m', '7d'
+    (meaning "that long ago") into epoch seconds.
+    """
+    value = value.strip()
+    match = _RELATIVE.match(value)
+    if match:
+        delta = timedelta(**{_UNITS[match.group(2)]: float(match.group(1))})
+        return (datetime.now(timezone.utc) - delta).timestamp()
+
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        raise EventLogError(f"Invalid time: {value!r} (use ISO 8601 or e.g. 7d)")
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _epoch(timestamp: str) -> float:
+    try:
+        return parse_time(timestamp)
+    except EventLogError:
+        return 0.0
+
+
+# ---------------------------------------------------------------------
+# Event log
+# ---------------------------------------------------------------------
+
+class EventLog:
+    def __init__(self, log_path: Path):
+        self.log_path = log_path
+        self.index_path = log_path.with_suffix(".idx")
+        self.lock_path = log_path.with_suffix(".lock")
+
+    def exists(self) -> bool:
+        return self.log_path.exists()
+
+    def __len__(self) -> int:
+        try:
+            return self.index_path.stat().st_size // INDEX_RECORD.size
+        except FileNotFoundError:
+            return 0
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    # -------------------------
+    # Write
+    # -------------------------
+    def append(
+        self,
+        action: str,
+        details: Optional[dict] = None,
+        timestamp: Optional[str] = None,
+    ) -> dict:
+        event = {
+            "timestamp": timestamp or datetime.now(timezone.utc).isoformat(),
+            "action": action,
+            "details": details or {},
+        }
+        self.extend([event])
+        return event
+
+    def extend(self, events: Iterable[dict]) -> None:
+        """
+        Append events in order; one write to the log, one to the index.
+        """
+        lines = [
+            (event, (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+            for event in events
+        ]
+        if not lines:
+            return
+
+        with self._locked():
+            self._ensure_index(locked=True)
+            records = []
+            with self.log_path.open("ab") as log:
+                offset = log.seek(0, os.SEEK_END)
+                for event, line in lines:
+                    records.append(INDEX_RECORD.pack(_epoch(event["timestamp"]), offset))
+                    offset += len(line)
+                log.write(b"".join(line for _, line in lines))
+
+            with self.index_path.open("ab") as idx:
+                idx.write(b"".join(records))
+
+    # -------------------------
+    # Index
+    # -------------------------
+    def _ensure_index(self, locked: bool = False) -> None:
+        """
+        Rebuild the index if it is missing or does not match the log
+        (e.g. a crash between the two appends). A reader that sees a
+        mismatch re-checks under the lock: it may just have caught a
+        writer between its two appends.
+        """
+        if self._index_current():
+            return
+        if locked:
+            self._rebuild_index()
+            return
+        with self._locked():
+            if not self._index_current():
+                self._rebuild_index()
+
+    def _index_current(self) -> bool:
+        if not self.log_path.exists():
+            return True
+
+        log_size = self.log_path.stat().st_size
+        try:
+            idx_size = self.index_path.stat().st_size
+        except FileNotFoundError:
+            idx_size = -1
+
+        if idx_size >= 0 and idx_size % INDEX_RECORD.size == 0:
+            if idx_size == 0 and log_size == 0:
+                return True
+            if idx_size:
+                with self.index_path.open("rb") as idx:
+                    idx.seek(idx_size - INDEX_RECORD.size)
+                    _, last_offset = INDEX_RECORD.unpack(idx.read(INDEX_RECORD.size))
+                with self.log_path.open("rb") as log:
+                    log.seek(last_offset)
+                    line = log.readline()
+                if line.endswith(b"\n") and last_offset + len(line) == log_size:
+                    return True
+        return False
+
+    def rebuild_index(self) -> None:
+        with self._locked():
+            self._rebuild_index()
+
+    def _rebuild_index(self) -> None:
+        records = []
+        with self.log_path.open("rb") as log:
+            offset = 0
+            for line in log:
+                if line.endswith(b"\n"):
+                    try:
+                        ts = json.loads(line)["timestamp"]
+                        records.append(INDEX_RECORD.pack(_epoch(ts), offset))
+                    except (ValueError, KeyError, TypeError):
+                        pass
+                offset += len(line)
+            # drop a torn trailing line so the next append starts clean
+            if offset and not line.endswith(b"\n"):
+                log.close()
+                os.truncate(self.log_path, offset - len(line))
+
+        tmp = self.index_path.with_suffix(".idx.tmp")
+        tmp.write_bytes(b"".join(records))
+        os.replace(tmp, self.index_path)
+
+    def _index(self) -> list[tuple[float, int]]:
+        self._ensure_index()
+        return self._read_index()
+
+    def _read_index(self) -> list[tuple[float, int]]:
+        try:
+            raw = self.index_path.read_bytes()
+        except FileNotFoundError:
+            return []
+        return list(INDEX_RECORD.iter_unpack(raw))
+
+    # -------------------------
+    # Read
+    # -------------------------
+    def query(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        actions: Optional[Iterable[str]] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[dict]:
+        """
+        Stream events in time order. `since`/`until` are epoch seconds,
+        `actions` filters on exact action names.
+        """
+        if not self.log_path.exists():
+            return
+
+        wanted = set(actions) if actions else None
+        start = 0
+        if since is not None:
+            index = self._index()
+            times = [t for t, _ in index]
+            pos = bisect.bisect_left(times, since)
+            if pos >= len(index):
+                return
+            start = index[pos][1]
+
+        emitted = 0
+        with self.log_path.open("rb") as log:
+            log.seek(start)
+            for line in log:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                ts = _epoch(event.get("timestamp", ""))
+                if since is not None and ts < since:
+                    continue
+                if until is not None and ts > until:
+                    break
+                if wanted and event.get("action") not in wanted:
+                    continue
+                yield event
+                emitted += 1
+                if limit is not None and emitted >= limit:
+                    return
+
+    def tail(self, count: int) -> list[dict]:
+        """
+        Last `count` events, seeking via the index.
+        """
+        index = self._index()
+        if not index or count <= 0:
+            return []
+        start = index[max(0, len(index) - count)][1]
+        events = []
+        with self.log_path.open("rb") as log:
+            log.seek(start)
+            for line in log:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    continue
+        return events
+
+    # -------------------------
+    # Retention / compaction
+    # -------------------------
+    def needs_compaction(self, policy: RetentionPolicy) -> bool:
+        if policy.max_events is None:
+            return False
+        return len(self) > policy.max_events * (1 + policy.compact_slack)
+
+    def compact(self, policy: RetentionPolicy) -> int:
+        """
+        Rewrite the log keeping only events allowed by `policy`.
+        Returns the number of dropped events.
+        """
+        with self._locked():
+            return self._compact(policy)
+
+    def _compact(self, policy: RetentionPolicy) -> int:
+        self._ensure_index(locked=True)
+        index = self._read_index()
+        if not index:
+            return 0
+
+        keep_from = 0
+        if policy.max_age_days is not None:
+            cutoff = (
+                datetime.now(timezone.utc) - timedelta(days=policy.max_age_days)
+            ).timestamp()
+            keep_from = bisect.bisect_left([t for t, _ in index], cutoff)
+        if policy.max_events is not None:
+            keep_from = max(keep_from, len(index) - policy.max_events)
+
+        if keep_from <= 0:
+            return 0
+
+        tmp = self.log_path.with_suffix(".jsonl.tmp")
+        with self.log_path.open("rb") as src, tmp.open("wb") as dst:
+            if keep_from < len(index):
+                src.seek(index[keep_from][1])
+                while chunk := src.read(1 << 20):
+                    dst.write(chunk)
+        os.replace(tmp, self.log_path)
+        self._rebuild_index()
+        return keep_from
+
+    def remove(self) -> None:
+        # the lock file stays: unlinking it would let two writers lock
+        # different inodes
+        with self._locked():
+            for path in (self.log_path, self.index_path):
+                path.unlink(missing_ok=True)
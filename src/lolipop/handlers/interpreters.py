@@ -0,0 +1,324 @@
+"""
+Lolipop interpreter discovery
+
+Finds Python interpreters once and remembers them, so creating an env
+for `3.11` is a dictionary lookup instead of spawning `python3.11` and
+hoping it is on PATH.
+
+Discovery scans PATH plus well-known install roots (pyenv, uv, asdf,
+conda, /opt, /usr/local, framework builds) and runs each candidate once
+to read its version. Results are cached in the data dir keyed on the
+binary's resolved path, size and mtime; a changed binary is re-probed.
+
+Version specs:
+    3.11            any 3.11.x
+    3.12.*          same as 3.12
+    >=3.10,<3.13    comparison clauses (==, !=, <, <=, >, >=, ~=)
+
+The highest matching final release wins; CPython is preferred, then
+search order. LOLIPOP_PYTHON_PATHS adds extra directories to scan.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from lolipop.modules.app_support import get_lolipop_data_dir
+from lolipop.modules.profiler import span, traced
+
+CACHE_FILE = get_lolipop_data_dir(create=False) / "interpreters.json"
+CACHE_FORMAT = 1
+
+# used when an env does not ask for a version
+DEFAULT_SPEC = "3.11"
+
+PROBE_TIMEOUT = 10
+PROBE_SCRIPT = (
+    "import sys;"
+    "print(sys.implementation.name, '.'.join(map(str, sys.version_info[:3])),"
+    " sys.version_info.releaselevel, getattr(sys, 'abiflags', ''))"
+)
+
+_NAME_RE = re.compile(r"^python(\d+(\.\d+)?t?)?$")
+_CLAUSE_RE = re.compile(r"^(==|!=|<=|>=|~=|<|>)?\s*(\d+(?:\.\d+)*)(\.\*)?$")
+
+# in-process cache: list of interpreter dicts, or None until loaded
+_interpreters: Optional[List[dict]] = None
+
+
+class InterpreterError(Exception):
+    pass
+
+
+# -------------------------
+# Version specs
+# -------------------------
+def _version(text: str) -> Tuple[int, ...]:
+    return tuple(int(p) for p in text.split("."))
+
+
+def _clause(version: Tuple[int, ...], op: str, target: Tuple[int, ...], wildcard: bool) -> bool:
+    if not op or op == "==" and wildcard:
+        return version[: len(target)] == target
+    if op == "==":
+        return version[: len(target)] == target and len(version) >= len(target)
+    if op == "!=":
+        return version[: len(target)] != target
+    if op == "~=":
+        return version >= target and version[: len(target) - 1] == target[:-1]
+    padded = version[: len(target)]
+    return {
+        "<": padded < target,
+        "<=": padded <= target,
+        ">": padded > target,
+        ">=": padded >= target,
+    }[op]
+
+
+def parse_spec(spec: Optional[str]) -> List[Tuple[str, Tuple[int, ...], bool]]:
+    if spec is None or not str(spec).strip():
+        return []
+    clauses = []
+    for part in str(spec).split(","):
+        match = _CLAUSE_RE.match(part.strip())
+        if not match:
+            raise InterpreterError(f"Invalid Python version spec: {spec}")
+        op, number, wildcard = match.groups()
+        clauses.append((op or "", _version(number), bool(wildcard)))
+    return clauses
+
+
+def matches(version: str, spec: Optional[str]) -> bool:
+    v = _version(version)
+    return all(_clause(v, op, t, w) for op, t, w in parse_spec(spec))
+
+
+# -------------------------
+# Discovery
+# -------------------------
+def _search_dirs() -> List[Path]:
+    home = Path.home()
+    dirs: List[Path] = []
+    extra = os.environ.get("LOLIPOP_PYTHON_PATHS", "")
+    dirs += [Path(p) for p in extra.split(os.pathsep) if p]
+    dirs += [Path(p) for p in os.environ.get("PATH", "").split(os.pathsep) if p]
+
+    pyenv_root = Path(os.environ.get("PYENV_ROOT") or home / ".pyenv")
+    roots = [
+        pyenv_root / "versions",
+        home / ".local" / "share" / "uv" / "python",
+        home / ".asdf" / "installs" / "python",
+        Path("/opt"),
+        Path("/Library/Frameworks/Python.framework/Versions"),
+    ]
+    for root in roots:
+        try:
+            children = sorted(root.iterdir(), reverse=True)
+        except OSError:
+            continue
+        dirs += [child / "bin" for child in children]
+
+    for conda in ("miniconda3", "miniconda", "anaconda3", "miniforge3", "mambaforge"):
+        dirs.append(home / conda / "bin")
+    dirs += [Path("/usr/local/bin"), Path("/opt/homebrew/bin"), Path("/usr/bin")]
+    return dirs
+
+
+def _candidates() -> List[Path]:
+    """
+    Executables named python, python3 or python3.X, in search order.
+    pyenv/asdf shims are skipped: they re-dispatch on every call.
+    """
+    seen = set()
+    found: List[Path] = []
+    for directory in _search_dirs():
+        if directory.name == "shims" or str(directory) in seen:
+            continue
+        seen.add(str(directory))
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            continue
+        with entries:
+            # most specific name first: python3.11 before python3 and python
+            names = sorted(
+                (e.name for e in entries if _NAME_RE.match(e.name)),
+                key=lambda n: (-len(n), n),
+            )
+        for name in names:
+            path = directory / name
+            if os.access(path, os.X_OK) and path.is_file():
+                found.append(path)
+    return found
+
+
+def _signature(path: str) -> Optional[list]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _probe(path: str) -> Optional[dict]:
+    try:
+        proc = subprocess.run(
+            [path, "-I", "-S", "-c", PROBE_SCRIPT],
+            capture_output=True,
+            text=True,
+            timeout=PROBE_TIMEOUT,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    parts = proc.stdout.split()
+    if proc.returncode != 0 or len(parts) < 3:
+        return None
+    return {
+        "implementation": parts[0],
+        "version": parts[1],
+        "releaselevel": parts[2],
+        "abiflags": parts[3] if len(parts) > 3 else "",
+    }
+
+
+@traced("python.discover", cat="env")
+def discover(previous: Optional[Dict[str, dict]] = None) -> List[dict]:
+    """
+    Scan for interpreters. Binaries already in `previous` (keyed on
+    resolved path) with an unchanged signature are not run again.
+    """
+    previous = previous or {}
+    by_real: Dict[str, dict] = {}
+    order: List[str] = []
+    for path in _candidates():
+        real = os.path.realpath(path)
+        if real in by_real:
+            continue
+        by_real[real] = {"path": str(path), "realpath": real, "signature": _signature(real)}
+        order.append(real)
+
+    def probe(real: str) -> None:
+        entry = by_real[real]
+        old = previous.get(real)
+        if old and old.get("signature") == entry["signature"] and old.get("version"):
+            data = {k: old.get(k) for k in ("implementation", "version", "releaselevel", "abiflags")}
+        else:
+            data = _probe(real)
+        if data:
+            entry.update(data)
+
+    with span("python.probe", cat="env", count=len(order)):
+        with ThreadPoolExecutor(max_workers=min(8, max(1, len(order)))) as pool:
+            list(pool.map(probe, order))
+
+    return [by_real[r] for r in order if by_real[r].get("version")]
+
+
+# -------------------------
+# Cache
+# -------------------------
+def _load_cache() -> Optional[List[dict]]:
+    try:
+        data = json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("format") != CACHE_FORMAT:
+        return None
+    return data.get("interpreters")
+
+
+def _save_cache(interpreters: List[dict]) -> None:
+    tmp = CACHE_FILE.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(
+            json.dumps({"format": CACHE_FORMAT, "interpreters": interpreters}, indent=2),
+            encoding="utf-8",
+        )
+        os.replace(tmp, CACHE_FILE)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+
+
+def refresh() -> List[dict]:
+    """
+    Rescan now, reusing probe results for unchanged binaries.
+    """
+    global _interpreters
+    previous = {i["realpath"]: i for i in (_interpreters or _load_cache() or [])}
+    _interpreters = discover(previous)
+    _save_cache(_interpreters)
+    return _interpreters
+
+
+def list_interpreters() -> List[dict]:
+    global _interpreters
+    if _interpreters is None:
+        cached = _load_cache()
+        if cached is None:
+            return refresh()
+        _interpreters = cached
+    return _interpreters
+
+
+# -------------------------
+# Lookup
+# -------------------------
+def _rank(interpreters: List[dict], spec: Optional[str]) -> List[dict]:
+    matching = [
+        (i, entry) for i, entry in enumerate(interpreters)
+        if matches(entry["version"], spec)
+    ]
+    matching.sort(
+        key=lambda pair: (
+            pair[1].get("releaselevel", "final") == "final",
+            _version(pair[1]["version"]),
+            pair[1].get("implementation") == "cpython",
+            not pair[1].get("abiflags"),
+            -pair[0],
+        ),
+        reverse=True,
+    )
+    return [entry for _, entry in matching]
+
+
+def _still_valid(entry: dict) -> bool:
+    # the path itself is what gets exec'd; it may be a symlink (venv,
+    # pyenv shim) removed while its target is still there
+    return (
+        os.path.exists(entry["path"])
+        and _signature(entry["realpath"]) == entry.get("signature")
+    )
+
+
+def find_interpreter(spec: Optional[str] = None) -> dict:
+    """
+    Best interpreter for `spec` (see module docstring). With no spec,
+    DEFAULT_SPEC is preferred and any interpreter accepted. Rescans once
+    when nothing usable matches.
+    """
+    parse_spec(spec)
+    specs = [spec] if spec else [DEFAULT_SPEC, None]
+
+    interpreters = list_interpreters()
+    for rescan in (False, True):
+        if rescan:
+            interpreters = refresh()
+        for s in specs:
+            for entry in _rank(interpreters, s):
+                if _still_valid(entry):
+                    return entry
+
+    raise InterpreterError(
+        f"No Python interpreter matches '{spec}'" if spec else "No Python interpreter found"
+    )
+
+
+def interpreter_path(spec: Optional[str] = None) -> str:
+    return find_interpreter(spec)["path"]
@@ -0,0 +1,204 @@
+"""
+Lolipop multi-project run
+
+Runs the `run` scripts of many tracked projects side by side
+(`lolipop run --all / --projects / --tag`).
+
+- Projects are selected from the registry by name glob and/or tag
+- Configs are loaded in parallel; environments are then resolved in
+  parallel per environment, with projects that share an environment
+  prepared one after another so they never create or install into it
+  concurrently
+- At most `parallel` projects run at once; task output is prefixed with
+  `project/task` and one project's failure does not stop the others
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from lolipop.handlers.run_context import prepare_run
+from lolipop.handlers.script_runner import (
+    PrefixedOutput,
+    ScriptExecutionError,
+    Task,
+    parse_tasks,
+    run_task_graph,
+    script_env,
+)
+from lolipop.modules.config_loader import LolipopConfig, load_project_config
+from lolipop.modules.profiler import span
+
+DEFAULT_PARALLEL = min(32, (os.cpu_count() or 1) * 4)
+
+
+class MultiRunError(Exception):
+    pass
+
+
+# -------------------------
+# Selection
+# -------------------------
+def select_projects(
+    projects: Iterable[dict],
+    patterns: Iterable[str] = (),
+    tags: Iterable[str] = (),
+    select_all: bool = False,
+) -> List[dict]:
+    """
+    Projects whose name matches any of `patterns` (globs) or that carry
+    any of `tags`; every project with `select_all`. Sorted by name.
+    """
+    patterns = list(patterns)
+    tags = set(tags)
+    selected = []
+    for project in projects:
+        name = project.get("name") or ""
+        if (
+            select_all
+            or any(fnmatch.fnmatchcase(name, p) for p in patterns)
+            or tags & set(project.get("tags") or [])
+        ):
+            selected.append(project)
+
+    unmatched = [
+        p for p in patterns
+        if not any(fnmatch.fnmatchcase(s.get("name") or "", p) for s in selected)
+    ]
+    if unmatched:
+        raise MultiRunError(f"No tracked project matches: {', '.join(unmatched)}")
+    return sorted(selected, key=lambda p: p.get("name") or "")
+
+
+# -------------------------
+# Preparation
+# -------------------------
+def _result(project: dict) -> dict:
+    return {
+        "name": project.get("name"),
+        "path": project.get("path"),
+        "status": "pending",
+        "seconds": 0.0,
+        "error": None,
+        "ctx": None,
+    }
+
+
+def prepare_projects(
+    projects: List[dict],
+    offline: bool = False,
+    parallel: int = DEFAULT_PARALLEL,
+) -> List[dict]:
+    results = [_result(p) for p in projects]
+    configs: Dict[int, LolipopConfig] = {}
+
+    def load(i: int) -> None:
+        try:
+            configs[i] = load_project_config(Path(results[i]["path"]))
+        except Exception as e:
+            results[i].update(status="error", error=str(e))
+
+    def prepare_group(indexes: List[int]) -> None:
+        for i in indexes:
+            cfg = configs[i]
+            try:
+                ctx = prepare_run(
+                    Path(results[i]["path"]),
+                    offline=offline,
+                    load_config=lambda _dir, cfg=cfg: cfg,
+                )
+            except Exception as e:
+                results[i].update(status="error", error=str(e))
+                continue
+            if not ctx["scripts"]:
+                results[i].update(status="skipped", error="no 'run' script")
+                continue
+            results[i]["ctx"] = ctx
+
+    with ThreadPoolExecutor(max_workers=max(1, parallel)) as pool:
+        with span("multi.load_configs", count=len(results)):
+            list(pool.map(load, range(len(results))))
+
+        groups: Dict[str, List[int]] = {}
+        for i, cfg in configs.items():
+            env_name = (cfg.environment or {}).get("name") or ""
+            groups.setdefault(env_name, []).append(i)
+
+        with span("multi.prepare", envs=len(groups)):
+            list(pool.map(prepare_group, groups.values()))
+
+    return results
+
+
+# -------------------------
+# Execution
+# -------------------------
+def _project_tasks(name: str, scripts) -> List[Task]:
+    tasks = parse_tasks([scripts] if isinstance(scripts, str) else scripts)
+    for task in tasks:
+        task.name = f"{name}/{task.name}"
+        task.deps = [f"{name}/{d}" for d in task.deps]
+    return tasks
+
+
+def run_projects(
+    results: List[dict],
+    parallel: int = DEFAULT_PARALLEL,
+    jobs: int = 1,
+    cancel: Optional[threading.Event] = None,
+    on_done: Optional[Callable[[dict], None]] = None,
+) -> List[dict]:
+    """
+    Run every prepared project (status "pending"), at most `parallel`
+    at a time and `jobs` tasks within each project. Fills in status
+    ("ok", "failed", "error", "cancelled") and seconds on each result.
+    """
+    cancel = cancel or threading.Event()
+    output = PrefixedOutput()
+
+    def run_one(result: dict) -> None:
+        if cancel.is_set():
+            result["status"] = "cancelled"
+            return
+        ctx = result["ctx"]
+        start = time.perf_counter()
+        try:
+            with span(f"project {result['name']}", cat="multi"):
+                run_task_graph(
+                    _project_tasks(result["name"], ctx["scripts"]),
+                    Path(ctx["project_dir"]),
+                    script_env(Path(ctx["env_path"])),
+                    jobs=jobs,
+                    cancel=cancel,
+                    output=output,
+                )
+            result["status"] = "cancelled" if cancel.is_set() else "ok"
+        except ScriptExecutionError as e:
+            result.update(status="failed", error=str(e))
+        except Exception as e:
+            # e.g. OSError from Popen: fail this project, keep the others going
+            result.update(status="error", error=str(e))
+        finally:
+            result["seconds"] = time.perf_counter() - start
+        if on_done is not None:
+            on_done(result)
+
+    pending = [r for r in results if r["status"] == "pending"]
+    with ThreadPoolExecutor(max_workers=max(1, parallel)) as pool:
+        futures = [pool.submit(run_one, r) for r in pending]
+        try:
+            for future in futures:
+                future.result()
+        except KeyboardInterrupt:
+            cancel.set()
+            for future in futures:
+                future.result()
+            raise
+
+    return results
@@ -0,0 +1,554 @@
+"""
+Lolipop package store
+
+Content-addressed store of unpacked wheels shared by all lolipop
+environments.
+
+Layout under <data dir>/store:
+- <sha256 of wheel>/tree/...   the unpacked wheel, never modified
+- <sha256 of wheel>/entry.json name, version, wheel file name
+- <sha256 of wheel>/refs/<id>  one file per environment using it
+
+Installing a package into an environment hardlinks its files from the
+store (copying only when linking is impossible), writes a fresh
+per-environment RECORD and INSTALLER, and generates console scripts.
+Each environment lists its linked entries in .lolipop-packages.json.
+Entries whose references are all gone are removed by `gc()`.
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import io
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import zipfile
+from pathlib import Path
+from typing import Iterable, Optional
+
+from lolipop.modules.app_support import get_lolipop_data_dir
+from lolipop.modules.fingerprint import file_digest
+
+STORE_DIR = get_lolipop_data_dir(create=False) / "store"
+ENV_PACKAGES_FILE = ".lolipop-packages.json"
+INSTALLER = "lolipop"
+
+_WHEEL_RE = re.compile(
+    r"^(?P<name>[^-]+)-(?P<version>[^-]+)(-(?P<build>\d[^-]*))?"
+    r"-(?P<py>[^-]+)-(?P<abi>[^-]+)-(?P<plat>[^-]+)\.whl$"
+)
+
+
+class PackageStoreError(Exception):
+    pass
+
+
+# -------------------------
+# Names and tags
+# -------------------------
+def normalize_name(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def parse_wheel_name(filename: str) -> dict:
+    match = _WHEEL_RE.match(filename)
+    if not match:
+        raise PackageStoreError(f"Not a wheel file name: {filename}")
+    info = match.groupdict()
+    info["project"] = normalize_name(info["name"])
+    return info
+
+
+def is_compatible(filename: str, python_version: str) -> bool:
+    """
+    Conservative tag check for the target interpreter ("3.11" style).
+    """
+    try:
+        tags = parse_wheel_name(filename)
+    except PackageStoreError:
+        return False
+
+    major, _, minor = python_version.partition(".")
+    minor = minor.split(".")[0]
+    nodot = f"{major}{minor}"
+
+    def py_tag_ok(tag: str) -> bool:
+        if tag in (f"py{major}", f"py{nodot}", f"cp{nodot}"):
+            return True
+        # abi3 wheels built for an older CPython 3.x also work
+        m = re.fullmatch(rf"cp{major}(\d+)", tag)
+        return bool(m and tags["abi"] == "abi3" and minor.isdigit() and int(m.group(1)) <= int(minor))
+
+    py_ok = any(py_tag_ok(t) for t in tags["py"].split("."))
+    abi_ok = any(a in ("none", "abi3", f"cp{nodot}") for a in tags["abi"].split("."))
+
+    plats = tags["plat"].split(".")
+    if "any" in plats:
+        return py_ok and abi_ok
+
+    machine = platform.machine().lower()
+    if machine == "amd64":
+        machine = "x86_64"
+    elif machine == "arm64" and sys.platform.startswith("linux"):
+        machine = "aarch64"
+    os_prefix = {"linux": "linux", "darwin": "macosx", "win32": "win"}.get(sys.platform, sys.platform)
+    plat_ok = any(
+        p.startswith(os_prefix) or (os_prefix == "linux" and p.startswith("manylinux"))
+        for p in plats
+    ) and any(machine in p or p.endswith("universal2") for p in plats)
+    return py_ok and abi_ok and plat_ok
+
+
+# -------------------------
+# Store entries
+# -------------------------
+class StoreEntry:
+    def __init__(self, key: str, root: Path):
+        self.key = key
+        self.root = root
+        self.tree = root / "tree"
+        self.refs = root / "refs"
+        self._meta: Optional[dict] = None
+
+    @property
+    def meta(self) -> dict:
+        if self._meta is None:
+            self._meta = json.loads((self.root / "entry.json").read_text(encoding="utf-8"))
+        return self._meta
+
+    @property
+    def name(self) -> str:
+        return self.meta["name"]
+
+    @property
+    def version(self) -> str:
+        return self.meta["version"]
+
+    def ref_count(self) -> int:
+        try:
+            return sum(1 for _ in os.scandir(self.refs))
+        except FileNotFoundError:
+            return 0
+
+    def size(self) -> int:
+        total = 0
+        for dirpath, _, files in os.walk(self.tree):
+            for f in files:
+                total += os.lstat(os.path.join(dirpath, f)).st_size
+        return total
+
+
+def _env_ref_id(env_path: Path) -> str:
+    return hashlib.sha1(str(env_path.resolve()).encode("utf-8")).hexdigest()[:16]
+
+
+def add_wheel(wheel: Path, store_dir: Optional[Path] = None) -> StoreEntry:
+    """
+    Unpack a wheel into the store, keyed by its sha256. Idempotent.
+    """
+    store_dir = store_dir or STORE_DIR
+    info = parse_wheel_name(wheel.name)
+    key = file_digest(wheel)
+    root = store_dir / key
+    entry = StoreEntry(key, root)
+    if (root / "entry.json").is_file():
+        return entry
+
+    tmp = store_dir / f".{key}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    try:
+        with zipfile.ZipFile(wheel) as zf:
+            for member in zf.namelist():
+                target = os.path.normpath(member)
+                if target.startswith("..") or os.path.isabs(target):
+                    raise PackageStoreError(f"Unsafe path in {wheel.name}: {member}")
+            zf.extractall(tmp / "tree")
+        (tmp / "refs").mkdir()
+        (tmp / "entry.json").write_text(
+            json.dumps(
+                {
+                    "name": info["project"],
+                    "version": info["version"],
+                    "wheel": wheel.name,
+                }
+            ),
+            encoding="utf-8",
+        )
+        try:
+            os.rename(tmp, root)
+        except OSError:
+            if not (root / "entry.json").is_file():
+                raise
+    except zipfile.BadZipFile as e:
+        raise PackageStoreError(f"Broken wheel {wheel}: {e}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    return entry
+
+
+def iter_entries(store_dir: Optional[Path] = None) -> Iterable[StoreEntry]:
+    store_dir = store_dir or STORE_DIR
+    if not store_dir.is_dir():
+        return
+    for item in os.scandir(store_dir):
+        if item.is_dir() and not item.name.startswith("."):
+            entry = StoreEntry(item.name, Path(item.path))
+            if (entry.root / "entry.json").is_file():
+                yield entry
+
+
+# -------------------------
+# Environment side
+# -------------------------
+def site_packages(env_path: Path) -> Path:
+    if os.name == "nt":
+        return env_path / "Lib" / "site-packages"
+    found = sorted(env_path.glob("lib/python*/site-packages"))
+    if not found:
+        raise PackageStoreError(f"No site-packages in {env_path}")
+    return found[-1]
+
+
+def env_python_version(env_path: Path) -> str:
+    match = re.search(r"python(\d+\.\d+)", site_packages(env_path).parent.name)
+    return match.group(1) if match else f"{sys.version_info[0]}.{sys.version_info[1]}"
+
+
+def _read_env_packages(env_path: Path) -> dict:
+    try:
+        return json.loads((env_path / ENV_PACKAGES_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_env_packages(env_path: Path, packages: dict) -> None:
+    path = env_path / ENV_PACKAGES_FILE
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(packages, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _link(src: str, dst: str) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _dist_info_dir(entry: StoreEntry) -> str:
+    for item in os.listdir(entry.tree):
+        if item.endswith(".dist-info"):
+            return item
+    raise PackageStoreError(f"No .dist-info in store entry {entry.key}")
+
+
+def _console_scripts(dist_info: Path) -> dict[str, str]:
+    ep = dist_info / "entry_points.txt"
+    if not ep.is_file():
+        return {}
+    scripts: dict[str, str] = {}
+    section = None
+    for line in ep.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line or line.startswith(("#", ";")):
+            continue
+        if line.startswith("["):
+            section = line.strip("[]").strip()
+            continue
+        if section == "console_scripts" and "=" in line:
+            name, _, target = line.partition("=")
+            scripts[name.strip()] = target.split("[")[0].strip()
+    return scripts
+
+
+_SCRIPT_TEMPLATE = """#!{python}
+# -*- coding: utf-8 -*-
+import re
+import sys
+from {module} import {root}
+if __name__ == "__main__":
+    sys.argv[0] = re.sub(r"(-script\\.pyw|\\.exe)?$", "", sys.argv[0])
+    sys.exit({func}())
+"""
+
+
+def _record_row(path: Path, rel: str) -> list[str]:
+    import base64
+
+    digest = hashlib.sha256(path.read_bytes()).digest()
+    encoded = base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+    return [rel, f"sha256={encoded}", str(path.stat().st_size)]
+
+
+def link_entry(entry: StoreEntry, env_path: Path) -> None:
+    """
+    Install a store entry into an environment by hardlinking.
+    Replaces any other version of the same project linked before.
+    """
+    link_entries([entry], env_path)
+
+
+def link_entries(entries: Iterable[StoreEntry], env_path: Path) -> None:
+    """
+    Link many entries, writing the environment's package list once.
+    """
+    env_path = env_path.resolve()
+    packages = _read_env_packages(env_path)
+    try:
+        for entry in entries:
+            previous = packages.get(entry.name)
+            if previous and previous.get("key") == entry.key:
+                continue
+            if previous:
+                _unlink(env_path, entry.name, packages, STORE_DIR)
+            _link_one(entry, env_path, packages)
+    finally:
+        _write_env_packages(env_path, packages)
+
+
+def _link_one(entry: StoreEntry, env_path: Path, packages: dict) -> None:
+    site = site_packages(env_path)
+    bin_dir = env_path / ("Scripts" if os.name == "nt" else "bin")
+    python = bin_dir / ("python.exe" if os.name == "nt" else "python")
+    dist_info = _dist_info_dir(entry)
+    data_dir = dist_info[: -len(".dist-info")] + ".data"
+
+    # store RECORD lists wheel-relative paths; build the installed one
+    store_record = entry.tree / dist_info / "RECORD"
+    installed: list[list[str]] = []
+    skip_record = {f"{dist_info}/RECORD", f"{dist_info}/INSTALLER"}
+    original = {}
+    if store_record.is_file():
+        with store_record.open(newline="", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if row:
+                    original[row[0]] = row
+
+    tree = str(entry.tree)
+    for dirpath, _, files in os.walk(tree):
+        rel_dir = os.path.relpath(dirpath, tree)
+        for name in files:
+            rel = name if rel_dir == "." else f"{rel_dir}/{name}".replace(os.sep, "/")
+            if rel in skip_record:
+                continue
+            src = os.path.join(dirpath, name)
+
+            if rel.startswith(f"{data_dir}/"):
+                _, kind, *rest = rel.split("/")
+                sub = "/".join(rest)
+                if kind in ("purelib", "platlib"):
+                    dest, record_rel = site / sub, sub
+                elif kind == "scripts":
+                    dest = bin_dir / sub
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    data = Path(src).read_bytes()
+                    if data.startswith(b"#!python"):
+                        data = f"#!{python}".encode() + data[len(b"#!python"):]
+                    dest.write_bytes(data)
+                    dest.chmod(0o755)
+                    installed.append(_record_row(dest, os.path.relpath(dest, site)))
+                    continue
+                elif kind == "headers":
+                    dest = env_path / "include" / "site" / entry.name / sub
+                    record_rel = os.path.relpath(dest, site)
+                else:  # data
+                    dest = env_path / sub
+                    record_rel = os.path.relpath(dest, site)
+            else:
+                dest, record_rel = site / rel, rel
+
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            if dest.exists() or dest.is_symlink():
+                dest.unlink()
+            _link(src, str(dest))
+            row = original.get(rel)
+            if row and len(row) >= 3 and row[1]:
+                installed.append([record_rel.replace(os.sep, "/"), row[1], row[2]])
+            else:
+                installed.append(_record_row(dest, record_rel.replace(os.sep, "/")))
+
+    for name, target in _console_scripts(entry.tree / dist_info).items():
+        module, _, func = target.partition(":")
+        script = bin_dir / name
+        script.write_text(
+            _SCRIPT_TEMPLATE.format(
+                python=python,
+                module=module.strip(),
+                root=func.strip().split(".")[0],
+                func=func.strip(),
+            ),
+            encoding="utf-8",
+        )
+        script.chmod(0o755)
+        installed.append(_record_row(script, os.path.relpath(script, site)))
+
+    # per-environment files, never shared with the store
+    installer = site / dist_info / "INSTALLER"
+    installer.write_text(f"{INSTALLER}\n", encoding="utf-8")
+    installed.append(_record_row(installer, f"{dist_info}/INSTALLER"))
+    installed.append([f"{dist_info}/RECORD", "", ""])
+
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="\n").writerows(installed)
+    (site / dist_info / "RECORD").write_text(buf.getvalue(), encoding="utf-8")
+
+    entry.refs.mkdir(exist_ok=True)
+    (entry.refs / _env_ref_id(env_path)).write_text(str(env_path), encoding="utf-8")
+
+    packages[entry.name] = {
+        "key": entry.key,
+        "version": entry.version,
+        "dist_info": dist_info,
+    }
+
+
+def unlink_package(env_path: Path, name: str, store_dir: Optional[Path] = None) -> bool:
+    """
+    Remove a store-linked package from an environment (files listed
+    in its installed RECORD) and drop the environment's reference.
+    """
+    env_path = env_path.resolve()
+    packages = _read_env_packages(env_path)
+    if not _unlink(env_path, name, packages, store_dir or STORE_DIR):
+        return False
+    _write_env_packages(env_path, packages)
+    return True
+
+
+def _unlink(env_path: Path, name: str, packages: dict, store_dir: Path) -> bool:
+    info = packages.pop(normalize_name(name), None)
+    if not info:
+        return False
+
+    site = site_packages(env_path)
+    record = site / info["dist_info"] / "RECORD"
+    if record.is_file():
+        with record.open(newline="", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if row:
+                    (site / row[0]).unlink(missing_ok=True)
+    shutil.rmtree(site / info["dist_info"], ignore_errors=True)
+
+    (store_dir / info["key"] / "refs" / _env_ref_id(env_path)).unlink(missing_ok=True)
+    return True
+
+
+# -------------------------
+# Wheelhouse
+# -------------------------
+def find_wheels(
+    wheelhouse: Path,
+    name: str,
+    version: Optional[str] = None,
+    python_version: Optional[str] = None,
+) -> list[Path]:
+    """
+    Compatible wheels for a project in a local wheelhouse, highest
+    version first (only `version` if given).
+    """
+    project = normalize_name(name)
+    candidates = []
+    for wheel in wheelhouse.glob("*.whl"):
+        try:
+            info = parse_wheel_name(wheel.name)
+        except PackageStoreError:
+            continue
+        if info["project"] != project:
+            continue
+        if version and info["version"] != version:
+            continue
+        if python_version and not is_compatible(wheel.name, python_version):
+            continue
+        candidates.append((_version_key(info["version"]), wheel))
+    return [wheel for _, wheel in sorted(candidates, reverse=True)]
+
+
+def find_wheel(
+    wheelhouse: Path,
+    name: str,
+    version: Optional[str] = None,
+    python_version: Optional[str] = None,
+) -> Optional[Path]:
+    """
+    Best matching wheel for a project in a local wheelhouse: exact
+    version if given, otherwise the highest version found.
+    """
+    wheels = find_wheels(wheelhouse, name, version, python_version)
+    return wheels[0] if wheels else None
+
+
+def _version_key(version: str) -> tuple:
+    parts = []
+    for piece in re.split(r"[.+-]", version):
+        parts.append((0, int(piece), "") if piece.isdigit() else (-1, 0, piece))
+    return tuple(parts)
+
+
+def install_from_wheelhouse(
+    env_path: Path,
+    requirements: Iterable[str],
+    wheelhouse: Path,
+) -> list[StoreEntry]:
+    """
+    Link pinned (`name==version`) or bare (`name`) requirements from a
+    local wheelhouse into an environment, fully offline.
+    """
+    py = env_python_version(env_path)
+    entries = []
+    for req in requirements:
+        name, _, version = req.partition("==")
+        wheel = find_wheel(wheelhouse, name.strip(), version.strip() or None, py)
+        if wheel is None:
+            raise PackageStoreError(f"No compatible wheel for '{req}' in {wheelhouse}")
+        entries.append(add_wheel(wheel))
+    link_entries(entries, env_path)
+    return entries
+
+
+# -------------------------
+# Garbage collection
+# -------------------------
+def _ref_alive(ref_file: Path, key: str) -> bool:
+    try:
+        env_path = Path(ref_file.read_text(encoding="utf-8").strip())
+    except OSError:
+        return False
+    info = next(
+        (p for p in _read_env_packages(env_path).values() if p.get("key") == key),
+        None,
+    )
+    if info is None:
+        return False
+    try:
+        return (site_packages(env_path) / info["dist_info"]).is_dir()
+    except PackageStoreError:
+        return False
+
+
+def gc(store_dir: Optional[Path] = None, dry_run: bool = False) -> dict:
+    """
+    Drop references from environments that no longer use an entry,
+    then remove entries without references.
+    """
+    removed, freed, stale = [], 0, 0
+    for entry in list(iter_entries(store_dir)):
+        if entry.refs.is_dir():
+            for ref in list(entry.refs.iterdir()):
+                if not _ref_alive(ref, entry.key):
+                    stale += 1
+                    if not dry_run:
+                        ref.unlink(missing_ok=True)
+        if entry.ref_count() == 0 or (dry_run and all(
+            not _ref_alive(r, entry.key) for r in entry.refs.iterdir()
+        )):
+            freed += entry.size()
+            removed.append(f"{entry.name}=={entry.version}")
+            if not dry_run:
+                shutil.rmtree(entry.root, ignore_errors=True)
+    return {"removed": removed, "freed_bytes": freed, "stale_refs": stale}
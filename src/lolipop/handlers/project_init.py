@@ -7,15 +7,24 @@ Handles initializing a project from a lolipop.yaml / loli.yaml configuration fil
 from pathlib import Path
 
 from lolipop.modules.config_loader import LolipopConfig
+from lolipop.handlers.dependency_installer import install_dependencies
 from lolipop.handlers.environment import (
     resolve_environment,
     create_base_environment,
 )
-from lolipop.handlers.script_runner import run_scripts
+from lolipop.handlers.script_runner import DEFAULT_JOBS, run_scripts
+from lolipop.handlers.step_state import StepState
 from lolipop.modules.logger import info, success
+from lolipop.modules.profiler import span
 
 
-def init_project(cfg: LolipopConfig, project_dir: Path) -> None:
+def init_project(
+    cfg: LolipopConfig,
+    project_dir: Path,
+    jobs: int = DEFAULT_JOBS,
+    force: bool = False,
+    offline: bool = False,
+) -> None:
     project_dir = project_dir.resolve()
 
     # Allow current or empty directory
@@ -38,23 +47,59 @@ def init_project(cfg: LolipopConfig, project_dir: Path) -> None:
         env_path = create_base_environment()
         info(f"No environment specified, using base environment")
 
+    # -------------------------
+    # Dependencies
+    # -------------------------
+    install_project_dependencies(cfg, project_dir, env_path, offline=offline)
+
     # -------------------------
     # Files
     # -------------------------
-    for rel_path, content in cfg.files.items():
-        file_path = project_dir / rel_path
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        file_path.write_text(str(content), encoding="utf-8")
-        info(f"Created file: {file_path}")
+    with span("init.files", count=len(cfg.files)):
+        for rel_path, content in cfg.files.items():
+            file_path = project_dir / rel_path
+            content = str(content)
+            # leave unchanged files alone so setup input fingerprints hold
+            if file_path.is_file() and file_path.read_bytes() == content.encode("utf-8"):
+                continue
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(content, encoding="utf-8")
+            info(f"Created file: {file_path}")
 
     # -------------------------
     # Setup
     # -------------------------
     if cfg.setup:
-        run_scripts(
-            scripts=cfg.setup,
-            project_dir=project_dir,
-            env_path=env_path,
-        )
+        with span("init.setup"):
+            skipped = run_scripts(
+                scripts=cfg.setup,
+                project_dir=project_dir,
+                env_path=env_path,
+                jobs=jobs,
+                state=StepState(project_dir, env_path, force=force),
+            )
+        if skipped:
+            info(f"Skipped {len(skipped)} unchanged setup step(s): {', '.join(skipped)}")
 
     success(f"Project '{project_name}' initialized successfully")
+
+
+def install_project_dependencies(
+    cfg: LolipopConfig,
+    project_dir: Path,
+    env_path: Path,
+    offline: bool = False,
+) -> None:
+    if not cfg.dependencies:
+        return
+
+    with span("deps.install", count=len(cfg.dependencies)):
+        result = install_dependencies(
+            cfg.dependencies,
+            env_path,
+            project_dir=project_dir,
+            cfg_data=cfg.data,
+            offline=offline,
+        )
+    if result["installed"]:
+        info(f"Installed {len(result['installed'])} package(s): {', '.join(result['installed'])}")
@@ -0,0 +1,89 @@
+"""
+Lolipop project install
+
+`lolipop install <git url>`: clone a repository through the mirror
+cache (see repo_cache), set it up like `lolipop init` when it carries a
+lolipop config, and register it for tracking.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional
+
+from lolipop.handlers import repo_cache
+from lolipop.handlers.project_init import init_project
+from lolipop.handlers.project_tracker import record_event, register_project
+from lolipop.handlers.script_runner import DEFAULT_JOBS
+from lolipop.modules.config_loader import (
+    CONFIG_FILENAMES,
+    load_project_config,
+    load_pyproject,
+)
+from lolipop.modules.logger import info
+from lolipop.modules.profiler import span, traced
+
+
+def default_directory(url: str) -> Path:
+    return Path.cwd() / repo_cache.repo_name(url)
+
+
+def has_config(project_dir: Path) -> bool:
+    """
+    Whether the project carries a lolipop config at all; a config that
+    exists but does not load is an error, not a missing config.
+    """
+    if any((project_dir / name).exists() for name in CONFIG_FILENAMES):
+        return True
+    return load_pyproject(project_dir / "pyproject.toml") is not None
+
+
+@traced("install.project")
+def install_project(
+    url: str,
+    directory: Optional[Path] = None,
+    branch: Optional[str] = None,
+    depth: Optional[int] = None,
+    filter_spec: Optional[str] = None,
+    shared: bool = False,
+    use_cache: bool = True,
+    timeout: Optional[float] = None,
+    jobs: int = DEFAULT_JOBS,
+    force: bool = False,
+    offline: bool = False,
+) -> dict:
+    """
+    Clone, initialize and register a project. Returns its registry
+    metadata.
+    """
+    project_dir = (directory or default_directory(url)).resolve()
+
+    info(f"Cloning {url} into {project_dir}")
+    repo_cache.clone(
+        url,
+        project_dir,
+        branch=branch,
+        depth=depth,
+        filter_spec=filter_spec,
+        shared=shared,
+        use_cache=use_cache,
+        timeout=timeout,
+    )
+
+    cfg = load_project_config(project_dir) if has_config(project_dir) else None
+
+    if cfg is not None:
+        with span("init.project"):
+            init_project(cfg, project_dir, jobs=jobs, force=force, offline=offline)
+    else:
+        info("No lolipop config in the repository; registering without setup")
+
+    metadata = register_project(project_dir, cfg)
+    record_event(metadata["name"], "install", {"url": url, "branch": branch})
+
+    if use_cache:
+        pruned = repo_cache.auto_prune(keep=[repo_cache.mirror_key(url)])
+        for mirror in (pruned or {}).get("removed", []):
+            info(f"Evicted least recently used mirror of {mirror['url']}")
+
+    return metadata
@@ -0,0 +1,413 @@
+"""
+Lolipop project registry
+
+Indexed single-file storage backend for the project tracker.
+
+Design goals:
+- One SQLite file instead of one JSON file per project
+- O(1) lookup by name (primary key) and by id (index)
+- Active project kept as a single pointer, not a flag on every record
+- One-time import of the legacy per-project JSON files
+- Filterable fields (git state, environment) mirrored into columns so
+  `query` filters, sorts and pages in SQL and streams only the
+  requested fields
+- Safe under many concurrent lolipop processes: WAL journal (readers
+  never block the writer), a busy timeout instead of "database is
+  locked" errors, and write transactions that take the write lock up
+  front (BEGIN IMMEDIATE) so read-modify-write sequences serialize
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Sequence
+
+SCHEMA_VERSION = 2
+
+# seconds a writer waits for another process's transaction to finish
+BUSY_TIMEOUT = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    name      TEXT PRIMARY KEY,
+    id        TEXT NOT NULL,
+    path      TEXT NOT NULL,
+    last_seen TEXT,
+    data      TEXT NOT NULL,
+    has_git   INTEGER NOT NULL DEFAULT 0,
+    dirty     INTEGER NOT NULL DEFAULT 0,
+    env_name  TEXT
+);
+CREATE INDEX IF NOT EXISTS projects_id ON projects(id);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# v1 -> v2: mirror filterable fields into columns
+MIGRATE_V2 = """
+ALTER TABLE projects ADD COLUMN has_git INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE projects ADD COLUMN dirty INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE projects ADD COLUMN env_name TEXT;
+UPDATE projects SET
+    has_git  = coalesce(json_extract(data, '$.git.initialized'), 0),
+    dirty    = coalesce(json_extract(data, '$.git.dirty'), 0),
+    env_name = json_extract(data, '$.environment.name');
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS projects_last_seen ON projects(last_seen);
+CREATE INDEX IF NOT EXISTS projects_env ON projects(env_name);
+"""
+
+# fields `query` can return without decoding the JSON record
+COLUMNS = ("name", "id", "path", "last_seen", "has_git", "dirty", "env_name")
+SORT_KEYS = ("name", "path", "last_seen")
+
+ACTIVE_KEY = "active_project"
+MIGRATED_KEY = "json_migrated"
+
+
+class RegistryError(Exception):
+    pass
+
+
+def _statements(script: str) -> list[str]:
+    return [s.strip() for s in script.split(";") if s.strip()]
+
+
+class ProjectRegistry:
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._depth = 0
+
+    # -------------------------
+    # Connection
+    # -------------------------
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT)
+                try:
+                    if conn.execute("PRAGMA journal_mode").fetchone()[0] != "wal":
+                        conn.execute("PRAGMA journal_mode = WAL")
+                except sqlite3.OperationalError:
+                    # busy switching; the mode is persistent, a later open sets it
+                    pass
+                conn.execute("PRAGMA synchronous = NORMAL")
+                self._conn = conn
+                if self._schema_version(conn) != str(SCHEMA_VERSION):
+                    self._init_schema()
+            except sqlite3.Error as e:
+                self._conn = None
+                raise RegistryError(f"Cannot open registry {self.db_path}: {e}")
+        return self._conn
+
+    @staticmethod
+    def _schema_version(conn: sqlite3.Connection) -> Optional[str]:
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return row[0] if row else None
+
+    def _init_schema(self) -> None:
+        # under the write lock: concurrent first opens create/migrate once
+        with self.transaction() as conn:
+            for statement in _statements(SCHEMA):
+                conn.execute(statement)
+            self._migrate_schema(conn)
+            for statement in _statements(INDEXES):
+                conn.execute(statement)
+            conn.execute(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES ('schema', ?)",
+                (str(SCHEMA_VERSION),),
+            )
+
+    @staticmethod
+    def _migrate_schema(conn: sqlite3.Connection) -> None:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(projects)")}
+        if "env_name" not in columns:
+            for statement in _statements(MIGRATE_V2):
+                conn.execute(statement)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Write transaction holding the database write lock from the start.
+        Nests: inner blocks join the outermost transaction.
+        """
+        conn = self.conn
+        if self._depth:
+            self._depth += 1
+            try:
+                yield conn
+            finally:
+                self._depth -= 1
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        self._depth = 1
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+        finally:
+            self._depth = 0
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # -------------------------
+    # Meta
+    # -------------------------
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: Optional[str]) -> None:
+        with self.transaction():
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)",
+                (key, value),
+            )
+
+    # -------------------------
+    # Records
+    # -------------------------
+    def _decode(self, data: str, active: Optional[str]) -> dict:
+        project = json.loads(data)
+        project["active"] = project.get("name") == active
+        return project
+
+    @staticmethod
+    def _row(metadata: dict) -> tuple:
+        stored = {k: v for k, v in metadata.items() if k != "active"}
+        git = metadata.get("git") or {}
+        env = metadata.get("environment") or {}
+        return (
+            metadata["name"],
+            metadata.get("id") or "",
+            metadata.get("path") or "",
+            metadata.get("last_seen"),
+            json.dumps(stored, ensure_ascii=False),
+            int(bool(git.get("initialized"))),
+            int(bool(git.get("dirty"))),
+            env.get("name"),
+        )
+
+    def get(self, name: str) -> Optional[dict]:
+        row = self.conn.execute(
+            "SELECT data FROM projects WHERE name = ?", (name,)
+        ).fetchone()
+        if not row:
+            return None
+        return self._decode(row[0], self.active_name())
+
+    def get_by_id(self, pid: str) -> Optional[dict]:
+        row = self.conn.execute(
+            "SELECT data FROM projects WHERE id = ? LIMIT 1", (pid,)
+        ).fetchone()
+        if not row:
+            return None
+        return self._decode(row[0], self.active_name())
+
+    def put(self, metadata: dict) -> None:
+        self.put_many([metadata])
+
+    def put_many(self, projects: Iterable[dict]) -> None:
+        """
+        Insert or replace many projects in a single transaction.
+        """
+        with self.transaction():
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO projects"
+                "(name, id, path, last_seen, data, has_git, dirty, env_name) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._row(p) for p in projects),
+            )
+
+    def delete(self, name: str) -> bool:
+        with self.transaction():
+            cur = self.conn.execute("DELETE FROM projects WHERE name = ?", (name,))
+            if self.active_name() == name:
+                self.conn.execute("DELETE FROM meta WHERE key = ?", (ACTIVE_KEY,))
+        return cur.rowcount > 0
+
+    def iter_all(self) -> Iterator[dict]:
+        active = self.active_name()
+        for (data,) in self.conn.execute("SELECT data FROM projects ORDER BY name"):
+            yield self._decode(data, active)
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+
+    def query(
+        self,
+        fields: Optional[Sequence[str]] = None,
+        name_glob: Optional[str] = None,
+        has_git: Optional[bool] = None,
+        dirty: Optional[bool] = None,
+        env_name: Optional[str] = None,
+        seen_after: Optional[str] = None,
+        seen_before: Optional[str] = None,
+        sort: str = "name",
+        descending: bool = False,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Iterator[dict]:
+        """
+        Stream projects matching the filters, one page at a time from
+        SQLite. `fields` selects what each result holds: columns are read
+        directly, "active" is computed, and any other top-level field is
+        extracted from the stored record without decoding all of it.
+        None returns full records.
+        """
+        if sort not in SORT_KEYS:
+            raise RegistryError(f"Cannot sort by {sort!r} (use {', '.join(SORT_KEYS)})")
+
+        where, params = [], []
+        if name_glob:
+            where.append("name GLOB ?")
+            params.append(name_glob)
+        if has_git is not None:
+            where.append("has_git = ?")
+            params.append(int(has_git))
+        if dirty is not None:
+            where.append("dirty = ?")
+            params.append(int(dirty))
+        if env_name is not None:
+            where.append("env_name = ?")
+            params.append(env_name)
+        if seen_after:
+            where.append("last_seen >= ?")
+            params.append(seen_after)
+        if seen_before:
+            where.append("last_seen < ?")
+            params.append(seen_before)
+
+        fields = list(fields) if fields else None
+        select_params: list = []
+        if fields is None:
+            select = ["data"]
+        else:
+            select = ["name"]
+            for field in fields:
+                if field in COLUMNS:
+                    select.append(field)
+                elif field != "active":
+                    select.append("json_array(json_extract(data, ?))")
+                    select_params.append(f'$."{field}"')
+
+        sql = f"SELECT {', '.join(select)} FROM projects"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {sort} {'DESC' if descending else 'ASC'}, name"
+        sql += " LIMIT ? OFFSET ?"
+        params = select_params + params + [-1 if limit is None else limit, max(0, offset)]
+
+        active = self.active_name()
+        for row in self.conn.execute(sql, params):
+            if fields is None:
+                yield self._decode(row[0], active)
+                continue
+            values = iter(row[1:])
+            item = {}
+            for field in fields:
+                if field == "active":
+                    item[field] = row[0] == active
+                elif field in COLUMNS:
+                    value = next(values)
+                    item[field] = bool(value) if field in ("has_git", "dirty") else value
+                else:
+                    raw = next(values)
+                    item[field] = json.loads(raw)[0] if raw is not None else None
+            yield item
+
+    # -------------------------
+    # Active pointer
+    # -------------------------
+    def active_name(self) -> Optional[str]:
+        return self.get_meta(ACTIVE_KEY)
+
+    def set_active(self, name: str, last_seen: Optional[str] = None) -> None:
+        with self.transaction():
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)",
+                (ACTIVE_KEY, name),
+            )
+            if last_seen is not None:
+                self._touch(name, last_seen)
+
+    def touch(self, name: str, last_seen: str) -> bool:
+        """
+        Update last_seen in place. Returns False if the project is unknown.
+        """
+        with self.transaction():
+            return self._touch(name, last_seen)
+
+    def _touch(self, name: str, last_seen: str) -> bool:
+        cur = self.conn.execute(
+            "UPDATE projects SET last_seen = ?, "
+            "data = json_set(data, '$.last_seen', ?) WHERE name = ?",
+            (last_seen, last_seen, name),
+        )
+        return cur.rowcount > 0
+
+    # -------------------------
+    # Migration
+    # -------------------------
+    def migrate_json_dir(self, tracking_dir: Path) -> int:
+        """
+        Import legacy <name>.json tracking files once.
+        Returns the number of imported projects.
+        """
+        if self.get_meta(MIGRATED_KEY):
+            return 0
+
+        projects = []
+        active = None
+        if tracking_dir.is_dir():
+            for file in sorted(tracking_dir.glob("*.json")):
+                try:
+                    data = json.loads(file.read_text(encoding="utf-8"))
+                except (OSError, ValueError):
+                    continue
+                if not isinstance(data, dict) or not data.get("name"):
+                    continue
+                if data.get("active"):
+                    active = data["name"]
+                projects.append(data)
+
+        with self.transaction():
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO projects"
+                "(name, id, path, last_seen, data, has_git, dirty, env_name) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._row(p) for p in projects),
+            )
+            if active and not self.active_name():
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)",
+                    (ACTIVE_KEY, active),
+                )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES (?, '1')",
+                (MIGRATED_KEY,),
+            )
+
+        return len(projects)
@@ -0,0 +1,216 @@
+"""
+Lolipop project scanner
+
+Discovers projects under a root directory and registers them in bulk.
+
+- Walks with os.scandir, pruning VCS internals, dependency and venv dirs
+- A directory is a project if it has a lolipop/loli config, a
+  pyproject.toml with [tool.lolipop], or a .git entry
+- Projects are inspected (config, git, hashes) on a bounded thread pool
+  and saved with a single registry write
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+from lolipop.handlers.project_tracker import (
+    build_project_metadata,
+    list_projects,
+    register_projects,
+)
+from lolipop.modules.config_loader import LolipopConfigError, load_project_config
+
+CONFIG_NAMES = ("lolipop.yaml", "lolipop.yml", "loli.yaml", "loli.yml")
+
+PRUNE_DIRS = {
+    ".git",
+    ".hg",
+    ".svn",
+    "node_modules",
+    "__pycache__",
+    ".venv",
+    "venv",
+    ".tox",
+    ".nox",
+    ".mypy_cache",
+    ".pytest_cache",
+    ".ruff_cache",
+    "site-packages",
+    ".eggs",
+}
+
+DEFAULT_JOBS = min(32, (os.cpu_count() or 1) * 4)
+
+
+class ScanError(Exception):
+    pass
+
+
+# -------------------------
+# Discovery
+# -------------------------
+def _has_tool_lolipop(pyproject: str) -> bool:
+    # cheap byte search instead of a full TOML parse
+    try:
+        with open(pyproject, "rb") as f:
+            return b"[tool.lolipop" in f.read()
+    except OSError:
+        return False
+
+
+def _is_ignored(rel_path: str, name: str, ignore: tuple[str, ...]) -> bool:
+    return any(
+        fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(rel_path, pattern)
+        for pattern in ignore
+    )
+
+
+def discover_projects(
+    root: Path,
+    max_depth: Optional[int] = None,
+    ignore: Iterable[str] = (),
+) -> Iterator[Path]:
+    """
+    Yield project directories under `root` (root included), depth-first.
+    `max_depth` counts levels below root; `ignore` holds fnmatch globs
+    matched against directory names and root-relative paths.
+    """
+    root = root.resolve()
+    if not root.is_dir():
+        raise ScanError(f"Not a directory: {root}")
+
+    ignore = tuple(ignore)
+    stack: list[tuple[str, int]] = [(str(root), 0)]
+
+    while stack:
+        directory, depth = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue
+
+        names = {e.name for e in entries}
+
+        if "pyvenv.cfg" in names:
+            continue  # a virtualenv, not a project
+
+        if (
+            ".git" in names
+            or any(n in names for n in CONFIG_NAMES)
+            or ("pyproject.toml" in names
+                and _has_tool_lolipop(os.path.join(directory, "pyproject.toml")))
+        ):
+            yield Path(directory)
+
+        if max_depth is not None and depth >= max_depth:
+            continue
+
+        children = []
+        for entry in entries:
+            if entry.name in PRUNE_DIRS:
+                continue
+            try:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+            except OSError:
+                continue
+            if ignore:
+                rel = os.path.relpath(entry.path, root)
+                if _is_ignored(rel, entry.name, ignore):
+                    continue
+            children.append((entry.path, depth + 1))
+
+        # reversed so the walk visits children in scandir order
+        stack.extend(reversed(children))
+
+
+# -------------------------
+# Registration
+# -------------------------
+def inspect_project(
+    project_dir: Path,
+    existing: Optional[dict] = None,
+) -> tuple[dict, Optional[str]]:
+    """
+    Build registry metadata for one directory. `existing` is its current
+    record, if any, so unchanged tracked files are not re-hashed.
+    Returns (metadata, warning); a broken config still registers the
+    project, without config data.
+    """
+    warning = None
+    try:
+        cfg = load_project_config(project_dir)
+    except LolipopConfigError as e:
+        cfg = None
+        if any((project_dir / n).exists() for n in CONFIG_NAMES):
+            warning = f"{project_dir}: {e}"
+    return build_project_metadata(project_dir, cfg, existing), warning
+
+
+def scan_and_register(
+    root: Path,
+    max_depth: Optional[int] = None,
+    ignore: Iterable[str] = (),
+    jobs: int = DEFAULT_JOBS,
+    on_found: Optional[Callable[[Path], None]] = None,
+    on_inspected: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Discover and register every project under `root`.
+
+    Returns a report: {"registered": [...], "duplicates": [...], "warnings": [...]}.
+    Duplicate project names keep the first directory found.
+    """
+    found = []
+    for project_dir in discover_projects(root, max_depth=max_depth, ignore=ignore):
+        found.append(project_dir)
+        if on_found:
+            on_found(project_dir)
+
+    known = {p.get("path"): p for p in list_projects()} if found else {}
+
+    results: dict[Path, dict] = {}
+    warnings = []
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = {
+            pool.submit(inspect_project, d, known.get(str(d.resolve()))): d
+            for d in found
+        }
+        for future in as_completed(futures):
+            project_dir = futures[future]
+            try:
+                metadata, warning = future.result()
+            except Exception as e:
+                warnings.append(f"{project_dir}: {e}")
+                continue
+            if warning:
+                warnings.append(warning)
+            results[project_dir] = metadata
+            if on_inspected:
+                on_inspected(metadata)
+
+    # keep discovery order so duplicate handling is deterministic
+    by_name: dict[str, dict] = {}
+    duplicates = []
+    for project_dir in found:
+        metadata = results.get(project_dir)
+        if metadata is None:
+            continue
+        if metadata["name"] in by_name:
+            duplicates.append(metadata)
+            continue
+        by_name[metadata["name"]] = metadata
+
+    registered = register_projects(by_name.values()) if by_name else []
+
+    return {
+        "registered": registered,
+        "duplicates": duplicates,
+        "warnings": warnings,
+    }
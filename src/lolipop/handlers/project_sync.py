@@ -0,0 +1,218 @@
+"""
+Lolipop project sync
+
+Brings many tracked git projects up to date at once
+(`lolipop project sync`):
+
+- fetch from the branch's remote
+- fast-forward the current branch to its upstream (never merges or
+  rebases: diverged branches are reported and left alone)
+- refresh branch, commit and dirty state
+
+Repositories are synced in parallel threads (the work is almost all
+waiting on git and the network), each with an overall deadline shared
+by its git commands. Git never prompts for credentials here. The
+registry is updated with every project's new git state in a single
+write at the end. Any remote git can fetch from works, including local
+bare repos over file://.
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from lolipop.clients.git_client import GitClient, GitError, GitTimeout
+from lolipop.modules.profiler import span
+
+DEFAULT_PARALLEL = 16
+DEFAULT_TIMEOUT = 60.0
+
+
+class SyncError(Exception):
+    pass
+
+
+class _Deadline:
+    def __init__(self, seconds: float):
+        self.end = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        left = self.end - time.monotonic()
+        if left <= 0:
+            raise GitTimeout("timed out")
+        return left
+
+
+def select_projects(patterns: List[str], tags: List[str]) -> List[dict]:
+    """
+    Tracked projects matching name globs and/or tags; every git project
+    when neither is given.
+    """
+    from lolipop.handlers import multi_run
+    from lolipop.handlers.project_tracker import list_projects, query_projects
+
+    if not patterns and not tags:
+        return list(query_projects(has_git=True, sort="name"))
+    try:
+        return multi_run.select_projects(list_projects(), patterns, tags)
+    except multi_run.MultiRunError as e:
+        raise SyncError(str(e))
+
+
+def _result(project: dict) -> dict:
+    git = project.get("git") or {}
+    return {
+        "name": project.get("name"),
+        "path": project.get("path"),
+        "status": "pending",
+        "branch": git.get("branch"),
+        "old_commit": git.get("commit"),
+        "commit": git.get("commit"),
+        "dirty": git.get("dirty"),
+        "ahead": None,
+        "behind": None,
+        "seconds": 0.0,
+        "error": None,
+    }
+
+
+def _first_error(message: str) -> str:
+    lines = [line for line in message.splitlines() if line.strip()]
+    fatal = [line for line in lines if line.startswith(("fatal:", "error:"))]
+    return (fatal or lines or ["git failed"])[0]
+
+
+def _upstream(git: GitClient, deadline: _Deadline) -> Optional[str]:
+    try:
+        return git.run_git(
+            "rev-parse", "--abbrev-ref", "--symbolic-full-name", "@{upstream}",
+            timeout=deadline.remaining(), interactive=False,
+        )
+    except GitTimeout:
+        raise
+    except GitError:
+        return None
+
+
+def sync_project(
+    project: dict,
+    timeout: float = DEFAULT_TIMEOUT,
+    fetch: bool = True,
+    pull: bool = True,
+) -> dict:
+    """
+    Sync one project. Status is one of: updated, up-to-date, ahead,
+    diverged, no-upstream, detached, fetched, refreshed, skipped,
+    timeout, failed.
+    """
+    result = _result(project)
+    start = time.perf_counter()
+    deadline = _Deadline(timeout)
+
+    try:
+        with span(f"sync {result['name']}", cat="git"):
+            try:
+                git = GitClient(Path(result["path"]))
+            except GitError:
+                result.update(status="skipped", error="not a git repository")
+                return result
+
+            before = git.info(check_dirty=False)
+            result["old_commit"] = before.get("commit")
+            status = "refreshed"
+
+            if fetch and before.get("remote"):
+                git.run_git("fetch", "--quiet", "--prune", timeout=deadline.remaining(), interactive=False)
+                status = "fetched"
+
+            if pull:
+                status = _fast_forward(git, before, result, deadline)
+
+            after = git.info(check_dirty=False)
+            dirty = git.run_git("status", "--porcelain", timeout=deadline.remaining(), interactive=False)
+            result.update(
+                status=status,
+                branch=after.get("branch"),
+                commit=after.get("commit"),
+                dirty=bool(dirty),
+                remote=after.get("remote"),
+            )
+    except GitTimeout:
+        result.update(status="timeout", error=f"exceeded {timeout:.0f}s")
+    except GitError as e:
+        result.update(status="failed", error=_first_error(str(e)))
+    finally:
+        result["seconds"] = time.perf_counter() - start
+
+    return result
+
+
+def _fast_forward(git: GitClient, before: dict, result: dict, deadline: _Deadline) -> str:
+    # both info() backends report a detached HEAD as branch "HEAD"
+    if before.get("branch") in (None, "HEAD"):
+        return "detached"
+    upstream = _upstream(git, deadline)
+    if not upstream:
+        return "no-upstream"
+
+    counts = git.run_git(
+        "rev-list", "--left-right", "--count", f"HEAD...{upstream}",
+        timeout=deadline.remaining(), interactive=False,
+    ).split()
+    ahead, behind = int(counts[0]), int(counts[1])
+    result.update(ahead=ahead, behind=behind)
+
+    if behind == 0:
+        return "ahead" if ahead else "up-to-date"
+    if ahead:
+        return "diverged"
+
+    # fetch already ran: merge the upstream instead of pulling again
+    git.run_git("merge", "--ff-only", "--quiet", upstream, timeout=deadline.remaining(), interactive=False)
+    return "updated"
+
+
+def sync_projects(
+    projects: List[dict],
+    parallel: int = DEFAULT_PARALLEL,
+    timeout: float = DEFAULT_TIMEOUT,
+    fetch: bool = True,
+    pull: bool = True,
+    on_done: Optional[Callable[[dict], None]] = None,
+) -> List[dict]:
+    """
+    Sync every project (at most `parallel` at once) and write the new
+    git state of all reachable ones to the registry in one batch.
+    """
+    from lolipop.handlers.project_tracker import event_log, update_git_state
+
+    def run(project: dict) -> dict:
+        result = sync_project(project, timeout=timeout, fetch=fetch, pull=pull)
+        if on_done is not None:
+            on_done(result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, parallel)) as pool:
+        results = list(pool.map(run, projects))
+
+    updates: Dict[str, dict] = {}
+    for r in results:
+        if r["status"] in ("skipped", "timeout", "failed"):
+            continue
+        updates[r["name"]] = {"branch": r["branch"], "commit": r["commit"], "dirty": r["dirty"]}
+        if r.get("remote") is not None:
+            updates[r["name"]]["remote"] = r["remote"]
+
+    with span("sync.registry", cat="tracking", count=len(updates)):
+        update_git_state(updates)
+
+    for r in results:
+        if r["status"] == "updated":
+            event_log(r["name"]).append(
+                "sync", {"from": r["old_commit"], "to": r["commit"], "branch": r["branch"]}
+            )
+
+    return results
@@ -5,6 +5,7 @@ Central registry for all Lolipop projects.
 
 Design goals:
 - Global, per-user storage
+- Indexed single-file registry (see project_registry)
 - Install-method independent (brew / pip / source)
 - Git is scanned, never enforced
 - No internal implementation details recorded
@@ -13,25 +14,76 @@ Design goals:
 
 from __future__ import annotations
 
-import json
 import hashlib
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Optional, Any
+from typing import Iterable, Iterator, Optional, Any
 
 from lolipop.clients.git_client import GitClient, GitError
+from lolipop.handlers import env_manifest
+from lolipop.handlers.environment import BASE_ENV_NAME, env_path
+from lolipop.handlers.event_log import EventLog, RetentionPolicy
+from lolipop.handlers.project_registry import ProjectRegistry
 from lolipop.modules.logger import warn
 from lolipop.modules.app_support import get_lolipop_data_dir
+from lolipop.modules.fingerprint import fingerprint_file
+from lolipop.modules.profiler import span, traced
 
 # ---------------------------------------------------------------------
 # Paths
 # ---------------------------------------------------------------------
 
-APP_SUPPORT = get_lolipop_data_dir()
+APP_SUPPORT = get_lolipop_data_dir(create=False)
 ASSETS_DIR = APP_SUPPORT / ".assets"
-TRACKING_DIR = ASSETS_DIR / "tracking"
+TRACKING_DIR = ASSETS_DIR / "tracking"  # legacy per-project JSON files
+REGISTRY_FILE = ASSETS_DIR / "registry.db"
+HISTORY_DIR = ASSETS_DIR / "history"
 
-TRACKING_DIR.mkdir(parents=True, exist_ok=True)
+HISTORY_MIGRATED_KEY = "history_migrated"
+
+# always fingerprinted; `track_files:` in the config adds names or globs
+TRACKED_FILES = ("lolipop.yaml", "loli.yaml", "pyproject.toml", "requirements.txt")
+
+_registry: Optional[ProjectRegistry] = None
+
+
+def get_registry() -> ProjectRegistry:
+    """
+    Open the registry on first use (never at import time) and import
+    legacy JSON tracking files the first time.
+    """
+    global _registry
+    if _registry is None:
+        with span("tracking.open", cat="tracking"):
+            _registry = ProjectRegistry(REGISTRY_FILE)
+            _registry.migrate_json_dir(TRACKING_DIR)
+            _migrate_history(_registry)
+    return _registry
+
+
+def _migrate_history(registry: ProjectRegistry) -> None:
+    """
+    Move inline `history` lists out of registry records into event logs.
+    """
+    if registry.get_meta(HISTORY_MIGRATED_KEY):
+        return
+
+    with registry.transaction():
+        # re-checked under the write lock: only one process migrates
+        if registry.get_meta(HISTORY_MIGRATED_KEY):
+            return
+        moved = []
+        for project in registry.iter_all():
+            history = project.pop("history", None)
+            if history is None:
+                continue
+            if history:
+                event_log(project["name"]).extend(history)
+            moved.append(project)
+
+        if moved:
+            registry.put_many(moved)
+        registry.set_meta(HISTORY_MIGRATED_KEY, "1")
 
 # ---------------------------------------------------------------------
 # Helpers
@@ -43,13 +95,60 @@ def _now() -> str:
 def _hash(value: str) -> str:
     return hashlib.sha256(value.encode("utf-8")).hexdigest()[:12]
 
-def _file_hash(path: Path) -> Optional[str]:
-    if not path.exists() or not path.is_file():
-        return None
-    try:
-        return _hash(path.read_text(encoding="utf-8"))
-    except Exception:
-        return None
+# ---------------------------------------------------------------------
+# Tracked file fingerprints
+# ---------------------------------------------------------------------
+
+def tracked_files(project_dir: Path, cfg: Optional[Any] = None) -> list[str]:
+    """
+    Paths (relative, posix) whose content the registry keeps track of.
+    Plain names are always listed; glob patterns list what they match.
+    """
+    extra = cfg.data.get("track_files") if cfg else None
+    if isinstance(extra, str):
+        extra = [extra]
+
+    names = list(TRACKED_FILES)
+    for pattern in extra or []:
+        pattern = str(pattern)
+        if any(c in pattern for c in "*?["):
+            names.extend(
+                p.relative_to(project_dir).as_posix()
+                for p in sorted(project_dir.glob(pattern))
+                if p.is_file()
+            )
+        else:
+            names.append(pattern)
+    return list(dict.fromkeys(names))
+
+def fingerprint_tracked(
+    project_dir: Path,
+    names: Iterable[str],
+    previous: Optional[dict] = None,
+) -> dict:
+    """
+    {name: fingerprint} for the names that exist. Unchanged files (same
+    size, mtime and inode as in `previous`) are not read again.
+    """
+    previous = previous or {}
+    result = {}
+    for name in names:
+        try:
+            fp = fingerprint_file(project_dir / name, previous.get(name))
+        except OSError:
+            fp = None
+        if fp is not None:
+            result[name] = fp
+    return result
+
+def _short_hashes(names: Iterable[str], fingerprints: dict) -> dict:
+    return {
+        name: fingerprints[name]["sha256"][:12] if name in fingerprints else None
+        for name in names
+    }
+
+def _changed(old: dict, new: dict) -> list[str]:
+    return sorted(k for k in old.keys() | new.keys() if old.get(k) != new.get(k))
 
 # ---------------------------------------------------------------------
 # Project identity
@@ -65,7 +164,11 @@ def project_id(project_dir: Path, git_remote: Optional[str]) -> str:
         return _hash(git_remote)
     return _hash(str(project_dir.resolve()))
 
+def event_log(project_name: str) -> EventLog:
+    return EventLog(HISTORY_DIR / f"{project_name}.jsonl")
+
 def tracking_file(project_name: str) -> Path:
+    # legacy location, only read by the one-time migration
     return TRACKING_DIR / f"{project_name}.json"
 
 # ---------------------------------------------------------------------
@@ -73,45 +176,45 @@ def tracking_file(project_name: str) -> Path:
 # ---------------------------------------------------------------------
 
 def load_project(project_name: str) -> Optional[dict]:
-    path = tracking_file(project_name)
-    if not path.exists():
-        return None
-    return json.loads(path.read_text(encoding="utf-8"))
+    return get_registry().get(project_name)
+
+def load_project_by_id(pid: str) -> Optional[dict]:
+    return get_registry().get_by_id(pid)
 
 def save_project(metadata: dict) -> None:
-    path = tracking_file(metadata["name"])
-    path.write_text(
-        json.dumps(metadata, indent=2, ensure_ascii=False),
-        encoding="utf-8",
-    )
+    get_registry().put(metadata)
 
 def list_projects() -> list[dict]:
-    return [
-        json.loads(p.read_text(encoding="utf-8"))
-        for p in TRACKING_DIR.glob("*.json")
-    ]
+    return list(get_registry().iter_all())
+
+def query_projects(**filters: Any) -> Iterator[dict]:
+    """
+    Filtered, projected, paginated listing (see ProjectRegistry.query).
+    """
+    return get_registry().query(**filters)
 
 # ---------------------------------------------------------------------
 # Registration
 # ---------------------------------------------------------------------
 
-def register_project(
+def project_name_for(project_dir: Path, cfg: Optional[Any] = None) -> str:
+    return cfg.name if cfg and getattr(cfg, "name", None) else project_dir.name
+
+@traced("tracking.scan", cat="tracking")
+def build_project_metadata(
     project_dir: Path,
     cfg: Optional[Any] = None,
-    activate: bool = True,
+    existing: Optional[dict] = None,
 ) -> dict:
     """
-    Register or update a project.
+    Scan a project (git, config files) and build its registry record.
 
-    - Does not require lolipop.yaml
-    - Scans Git if present
-    - Preserves historical metadata
+    Touches only the project directory, never the registry, so it is
+    safe to call from worker threads (see register_projects).
     """
 
     project_dir = project_dir.resolve()
-    name = cfg.name if cfg and getattr(cfg, "name", None) else project_dir.name
-
-    existing = load_project(name)
+    name = project_name_for(project_dir, cfg)
 
     # -------------------------
     # Git scan (never force)
@@ -145,22 +248,29 @@ def register_project(
     # Config file hashes
     # -------------------------
 
-    config_files = {
-        "lolipop.yaml": _file_hash(project_dir / "lolipop.yaml"),
-        "loli.yaml": _file_hash(project_dir / "loli.yaml"),
-        "pyproject.toml": _file_hash(project_dir / "pyproject.toml"),
-        "requirements.txt": _file_hash(project_dir / "requirements.txt"),
-    }
+    with span("tracking.hash", cat="tracking"):
+        names = tracked_files(project_dir, cfg)
+        fingerprints = fingerprint_tracked(
+            project_dir, names, (existing or {}).get("file_fingerprints")
+        )
+        config_files = _short_hashes(names, fingerprints)
+
+    if existing:
+        changed = _changed(existing.get("config_files") or {}, config_files)
+    else:
+        changed = sorted(fingerprints)
 
     # -------------------------
     # Environment
     # -------------------------
 
     env_cfg = cfg.environment if cfg and hasattr(cfg, "environment") else {}
+    env_name = env_cfg.get("name") if isinstance(env_cfg, dict) else None
+    manifest = env_manifest.read_manifest(env_path(env_name or BASE_ENV_NAME))
     environment = {
-        "name": env_cfg.get("name") if isinstance(env_cfg, dict) else None,
-        "path": str(env_cfg.get("path")) if isinstance(env_cfg, dict) else None,
-        "python_version": None,
+        "name": env_name,
+        "path": manifest["path"] if manifest else None,
+        "python_version": manifest.get("version") if manifest else None,
     }
 
     # -------------------------
@@ -172,20 +282,17 @@ def register_project(
         "name": name,
         "path": str(project_dir),
 
-        "created_at": (
-            existing["created_at"]
-            if existing and "created_at" in existing
-            else _now()
-        ),
+        "created_at": _now(),
         "last_seen": _now(),
 
         "active": False,
-        "opened_in_vscode": existing.get("opened_in_vscode", False)
-        if existing else False,
+        "opened_in_vscode": False,
 
         "environment": environment,
         "git": git_info,
         "config_files": config_files,
+        "file_fingerprints": fingerprints,
+        "changed_since_last_seen": changed,
 
         "project_metadata": {
             "version": cfg.data.get("version") if cfg else None,
@@ -194,87 +301,202 @@ def register_project(
         },
 
         "dependencies": cfg.data.get("dependencies", []) if cfg else [],
+        "tags": _tags(cfg),
 
-        "features": existing.get("features", {}) if existing else {},
-        "templates_used": existing.get("templates_used", []) if existing else [],
-
-        "history": (
-            existing.get("history", [])
-            if existing
-            else []
-        ),
+        "features": {},
+        "templates_used": [],
     }
 
-    if not existing:
-        metadata["history"].append(
-            {
-                "timestamp": _now(),
-                "action": "init",
-                "details": {},
-            }
-        )
+    if existing:
+        _carry_over(metadata, existing)
+
+    return metadata
+
+def _tags(cfg: Optional[Any]) -> list[str]:
+    tags = cfg.data.get("tags") if cfg else None
+    if isinstance(tags, str):
+        tags = [tags]
+    return sorted({str(t) for t in tags or []})
+
+def _carry_over(metadata: dict, existing: dict) -> None:
+    """
+    Preserve historical fields of an already tracked project.
+    """
+    if "created_at" in existing:
+        metadata["created_at"] = existing["created_at"]
+    metadata["opened_in_vscode"] = existing.get("opened_in_vscode", False)
+    metadata["features"] = existing.get("features", {})
+    metadata["templates_used"] = existing.get("templates_used", [])
+
+@traced("tracking.register", cat="tracking")
+def register_project(
+    project_dir: Path,
+    cfg: Optional[Any] = None,
+    activate: bool = True,
+) -> dict:
+    """
+    Register or update a project.
+
+    - Does not require lolipop.yaml
+    - Scans Git if present
+    - Preserves historical metadata
+    """
+
+    project_dir = project_dir.resolve()
+    name = project_name_for(project_dir, cfg)
+
+    existing = load_project(name)
+    metadata = build_project_metadata(project_dir, cfg, existing)
+
+    registry = get_registry()
+    with registry.transaction():
+        # another process may have registered or touched it meanwhile
+        current = registry.get(name)
+        if current:
+            _carry_over(metadata, current)
+        registry.put(metadata)
+        if activate:
+            registry.set_active(name, last_seen=metadata["last_seen"])
 
-    save_project(metadata)
+    if not current:
+        event_log(name).append("init")
 
     if activate:
-        set_active_project(name)
+        metadata["active"] = True
 
     return metadata
 
+@traced("tracking.register_many", cat="tracking")
+def register_projects(projects: Iterable[dict]) -> list[dict]:
+    """
+    Save many records built by build_project_metadata in one registry
+    write. Existing projects keep their historical fields.
+    """
+    registry = get_registry()
+    projects = list(projects)
+
+    new_names = []
+    with registry.transaction():
+        for metadata in projects:
+            existing = registry.get(metadata["name"])
+            if existing:
+                _carry_over(metadata, existing)
+            else:
+                new_names.append(metadata["name"])
+
+        registry.put_many(projects)
+
+    for name in new_names:
+        event_log(name).append("init")
+
+    return projects
+
+@traced("tracking.update_git", cat="tracking")
+def update_git_state(updates: dict[str, dict]) -> int:
+    """
+    Merge fresh git fields (branch, commit, dirty, ...) into the records
+    of many projects in one registry write. Returns how many were found.
+    """
+    registry = get_registry()
+    now = _now()
+    records = []
+    with registry.transaction():
+        for name, git in updates.items():
+            record = registry.get(name)
+            if not record:
+                continue
+            record["git"] = {**(record.get("git") or {}), **git, "initialized": True}
+            record["last_seen"] = now
+            records.append(record)
+        registry.put_many(records)
+    return len(records)
+
 # ---------------------------------------------------------------------
 # State management
 # ---------------------------------------------------------------------
 
+@traced("tracking.activate", cat="tracking")
 def set_active_project(project_name: str):
     """
     Marks exactly one project as active.
     """
-    for file in TRACKING_DIR.glob("*.json"):
-        data = json.loads(file.read_text(encoding="utf-8"))
-        data["active"] = data["name"] == project_name
-        data["last_seen"] = _now()
-        file.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    get_registry().set_active(project_name, last_seen=_now())
 
 def get_active_project() -> Optional[dict]:
-    for project in list_projects():
-        if project.get("active"):
-            return project
-    return None
+    registry = get_registry()
+    name = registry.active_name()
+    return registry.get(name) if name else None
+
+def changed_since_last_seen(project_name: str) -> Optional[list[str]]:
+    """
+    Tracked files whose content differs from the last registration
+    (stat-first, so unchanged files are not read). None if the project
+    is not tracked.
+    """
+    data = load_project(project_name)
+    if not data:
+        return None
+    project_dir = Path(data["path"])
+    names = list(data.get("config_files") or {}) or list(TRACKED_FILES)
+    fingerprints = fingerprint_tracked(project_dir, names, data.get("file_fingerprints"))
+    return _changed(data.get("config_files") or {}, _short_hashes(names, fingerprints))
 
 # ---------------------------------------------------------------------
 # History / events
 # ---------------------------------------------------------------------
 
+@traced("tracking.event", cat="tracking")
 def record_event(
     project_name: str,
     action: str,
     details: Optional[dict] = None,
 ):
-    data = load_project(project_name)
-    if not data:
+    """
+    Append one event to the project's log; never rewrites past history.
+    """
+    now = _now()
+    if not get_registry().touch(project_name, now):
         warn(f"Project '{project_name}' not found in tracking")
         return
 
-    data["last_seen"] = _now()
-    data.setdefault("history", []).append(
-        {
-            "timestamp": _now(),
-            "action": action,
-            "details": details or {},
-        }
+    log = event_log(project_name)
+    log.append(action, details, timestamp=now)
+
+    policy = RetentionPolicy.from_env()
+    if log.needs_compaction(policy):
+        log.compact(policy)
+
+def project_history(
+    project_name: str,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    actions: Optional[Iterable[str]] = None,
+    limit: Optional[int] = None,
+) -> Iterator[dict]:
+    """
+    Stream a project's events in time order (see EventLog.query).
+    """
+    return event_log(project_name).query(
+        since=since, until=until, actions=actions, limit=limit
     )
 
-    save_project(data)
+def compact_history(
+    project_name: str,
+    policy: Optional[RetentionPolicy] = None,
+) -> int:
+    return event_log(project_name).compact(policy or RetentionPolicy.from_env())
 
 # ---------------------------------------------------------------------
 # VS Code integration hooks (passive)
 # ---------------------------------------------------------------------
 
 def mark_opened_in_vscode(project_name: str, opened: bool = True):
-    data = load_project(project_name)
-    if not data:
-        return
+    registry = get_registry()
+    with registry.transaction():
+        data = registry.get(project_name)
+        if not data:
+            return
 
-    data["opened_in_vscode"] = opened
-    data["last_seen"] = _now()
-    save_project(data)
+        data["opened_in_vscode"] = opened
+        data["last_seen"] = _now()
+        registry.put(data)
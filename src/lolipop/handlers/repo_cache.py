@@ -0,0 +1,467 @@
+"""
+Lolipop repository cache
+
+Local bare mirrors of the git repositories `lolipop install` clones, so
+installing the same repo (or a fork of it) again only transfers what
+changed upstream.
+
+Layout under <data dir>/mirrors:
+- <name>-<url hash>.git   bare mirror: the remote's branches and tags
+- <name>-<url hash>.json  url, created / last used times, borrowers
+- <name>-<url hash>.lock  flock held while the mirror is used or changed
+
+Installing:
+- the mirror is created with a bare clone on first use and updated with
+  a fetch afterwards: only new objects cross the network
+- a new mirror borrows objects (alternates) from existing mirrors of
+  repositories with the same name, so a fork only fetches the commits
+  it adds
+- the workspace is cloned from the mirror with hardlinked objects, so it
+  does not depend on the cache; with shared=True it borrows the
+  mirror's objects instead (nothing copied, the mirror records it as a
+  borrower)
+- depth / filter give a shallow / partial workspace, cloned from the
+  mirror over file://; the mirror itself always stays complete
+- origin of the workspace is the real url, so later fetches and lazy
+  partial-clone fetches go upstream
+
+Eviction removes least recently used mirrors (`lolipop cache prune`, or
+LOLIPOP_MIRROR_MAX_SIZE after each install). Borrowers of an
+evicted mirror are repacked first so they own every object they used.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from lolipop.clients.git_client import GitClient, GitError, run_git_in
+from lolipop.modules.app_support import get_lolipop_data_dir
+from lolipop.modules.logger import info, warn
+from lolipop.modules.profiler import span, traced
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single-writer only
+    fcntl = None
+
+MIRROR_DIR = get_lolipop_data_dir(create=False) / "mirrors"
+
+FETCH_REFSPECS = ("+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*")
+
+
+class RepoCacheError(Exception):
+    pass
+
+
+# -------------------------
+# Urls and keys
+# -------------------------
+def _is_remote(url: str) -> bool:
+    return bool(re.match(r"^[a-zA-Z][a-zA-Z0-9+.-]*://", url) or re.match(r"^[^/:]+@[^/:]+:", url))
+
+
+def clone_url(url: str) -> str:
+    """
+    `url` as git should be given it: local paths made absolute.
+    """
+    url = url.strip()
+    return url if _is_remote(url) else str(Path(url).expanduser().resolve())
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form used for cache keys: no trailing slash or .git,
+    lower-case scheme and host, local paths made absolute.
+    """
+    url = url.strip().rstrip("/")
+    if url.endswith(".git"):
+        url = url[:-4]
+    match = re.match(r"^([a-zA-Z][a-zA-Z0-9+.-]*)://([^/]*)(.*)$", url)
+    if match:
+        scheme, host, path = match.groups()
+        return f"{scheme.lower()}://{host.lower()}{path}"
+    if re.match(r"^[^/:]+@[^/:]+:", url):  # scp-like user@host:path
+        return url
+    return str(Path(url).expanduser().resolve())
+
+
+def repo_name(url: str) -> str:
+    name = re.split(r"[/:]", normalize_url(url))[-1]
+    return re.sub(r"[^A-Za-z0-9._-]", "-", name) or "repo"
+
+
+def mirror_key(url: str) -> str:
+    digest = hashlib.sha1(normalize_url(url).encode("utf-8")).hexdigest()[:12]
+    return f"{repo_name(url)}-{digest}"
+
+
+def mirror_path(key: str) -> Path:
+    return MIRROR_DIR / f"{key}.git"
+
+
+def _meta_path(key: str) -> Path:
+    return MIRROR_DIR / f"{key}.json"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# -------------------------
+# Metadata
+# -------------------------
+def _read_meta(key: str) -> Optional[dict]:
+    try:
+        data = json.loads(_meta_path(key).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _write_meta(key: str, meta: dict) -> None:
+    path = _meta_path(key)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+@contextmanager
+def _locked(key: str) -> Iterator[None]:
+    MIRROR_DIR.mkdir(parents=True, exist_ok=True)
+    fd = os.open(MIRROR_DIR / f"{key}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _alternates(repo: Path) -> List[str]:
+    """
+    Object dirs a repo borrows from (bare or non-bare repo path).
+    """
+    git_dir = repo / ".git" if (repo / ".git").is_dir() else repo
+    try:
+        text = (git_dir / "objects" / "info" / "alternates").read_text(encoding="utf-8")
+    except OSError:
+        return []
+    return [line.strip() for line in text.splitlines() if line.strip() and not line.startswith("#")]
+
+
+def _add_borrower(key: str, borrower: Path) -> None:
+    meta = _read_meta(key)
+    if meta is None:
+        return
+    borrowers = set(meta.get("borrowers", []))
+    borrowers.add(str(borrower))
+    meta["borrowers"] = sorted(borrowers)
+    _write_meta(key, meta)
+
+
+# -------------------------
+# Mirrors
+# -------------------------
+def _family(url: str, key: str) -> List[str]:
+    """
+    Keys of other cached mirrors of a repository with the same name
+    (likely forks sharing history).
+    """
+    name = repo_name(url)
+    if not MIRROR_DIR.is_dir():
+        return []
+    return sorted(
+        p.stem for p in MIRROR_DIR.glob(f"{name}-*.git")
+        if p.stem != key and p.stem.rsplit("-", 1)[0] == name and _read_meta(p.stem)
+    )
+
+
+def _create_mirror(url: str, key: str, timeout: Optional[float]) -> None:
+    path = mirror_path(key)
+    tmp = path.with_name(f".{key}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+
+    with ExitStack() as stack:
+        lenders = _family(url, key)
+        for lender in lenders:  # sorted: a fixed lock order
+            stack.enter_context(_locked(lender))
+        lenders = [k for k in lenders if mirror_path(k).is_dir()]
+        references = [opt for k in lenders for opt in ("--reference", str(mirror_path(k)))]
+        if lenders:
+            info(f"Borrowing objects from cached {', '.join(lenders)}")
+
+        try:
+            run_git_in(
+                # --no-local: a local path source would be copied
+                # wholesale, ignoring --reference
+                MIRROR_DIR, "clone", "--quiet", "--bare", "--no-local", *references, url, str(tmp),
+                timeout=timeout,
+            )
+        except GitError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        for i, refspec in enumerate(FETCH_REFSPECS):
+            run_git_in(tmp, "config", "--add" if i else "--replace-all", "remote.origin.fetch", refspec)
+        run_git_in(tmp, "config", "uploadpack.allowFilter", "true")
+        os.replace(tmp, path)
+
+        for lender in lenders:
+            _add_borrower(lender, path)
+
+    now = _now()
+    _write_meta(key, {
+        "url": url,
+        "key": key,
+        "created_at": now,
+        "last_used": now,
+        "borrowers": [],
+    })
+
+
+def _ensure_mirror(url: str, key: str, timeout: Optional[float]) -> None:
+    path = mirror_path(key)
+    if not (path / "HEAD").exists() or _read_meta(key) is None:
+        shutil.rmtree(path, ignore_errors=True)
+        with span("mirror.create", cat="git"):
+            _create_mirror(url, key, timeout)
+        return
+    try:
+        with span("mirror.fetch", cat="git"):
+            run_git_in(path, "fetch", "--quiet", "--prune", "origin", timeout=timeout)
+    except GitError as e:
+        # offline / remote down: the cached copy is still a valid source
+        reason = (str(e).splitlines() or ["git fetch failed"])[0]
+        warn(f"Could not update the cached mirror ({reason}); using it as is")
+
+
+@traced("mirror.clone", cat="git")
+def clone(
+    url: str,
+    dest: Path,
+    branch: Optional[str] = None,
+    depth: Optional[int] = None,
+    filter_spec: Optional[str] = None,
+    shared: bool = False,
+    use_cache: bool = True,
+    timeout: Optional[float] = None,
+) -> GitClient:
+    """
+    Clone `url` into `dest` through its mirror (created or updated
+    first). With use_cache=False clone straight from the url.
+    """
+    dest = dest.resolve()
+    if dest.exists() and any(dest.iterdir()):
+        raise RepoCacheError(f"{dest} already exists and is not empty")
+    url = clone_url(url)
+    options: List[str] = []
+    if branch:
+        options += ["--branch", branch]
+    if depth:
+        options += ["--depth", str(depth)]
+    if filter_spec:
+        options += ["--filter", filter_spec]
+
+    if not use_cache:
+        return GitClient.clone(url, dest, *options, timeout=timeout)
+
+    key = mirror_key(url)
+    path = mirror_path(key)
+    with _locked(key):
+        # fetch and clone under one lock: eviction can't remove the
+        # mirror in between
+        _ensure_mirror(url, key, timeout)
+
+        if depth or filter_spec:
+            source = path.as_uri()  # file:// so depth / filter apply
+        elif shared:
+            source = str(path)
+            options.append("--shared")
+        else:
+            source = str(path)
+            options.append("--local")
+            if _alternates(path):
+                # would inherit the family's alternates: copy instead
+                options.append("--dissociate")
+
+        client = GitClient.clone(source, dest, *options, timeout=timeout)
+        client.run_git("remote", "set-url", "origin", url)
+
+        meta = _read_meta(key) or {}
+        meta["last_used"] = _now()
+        _write_meta(key, meta)
+        if shared:
+            _add_borrower(key, dest)
+
+    return client
+
+
+# -------------------------
+# Listing and eviction
+# -------------------------
+def _disk_usage(path: Path) -> int:
+    try:
+        out = run_git_in(path, "count-objects", "-v")
+    except GitError:
+        return 0
+    stats = dict(line.split(": ", 1) for line in out.splitlines() if ": " in line)
+    kib = sum(int(stats.get(k, 0)) for k in ("size", "size-pack", "size-garbage"))
+    return kib * 1024
+
+
+def _live_borrowers(meta: dict, key: str) -> List[str]:
+    objects = str(mirror_path(key) / "objects")
+    return [
+        b for b in meta.get("borrowers", [])
+        if Path(b).is_dir() and any(
+            os.path.realpath(a) == os.path.realpath(objects) for a in _alternates(Path(b))
+        )
+    ]
+
+
+def list_mirrors() -> List[dict]:
+    """
+    One entry per cached mirror: key, url, path, size, created_at,
+    last_used, borrowers (repos still borrowing its objects).
+    """
+    if not MIRROR_DIR.is_dir():
+        return []
+    mirrors = []
+    for meta_file in sorted(MIRROR_DIR.glob("*.json")):
+        key = meta_file.stem
+        meta = _read_meta(key)
+        path = mirror_path(key)
+        if meta is None or not path.is_dir():
+            continue
+        mirrors.append({
+            "key": key,
+            "url": meta.get("url"),
+            "path": str(path),
+            "size": _disk_usage(path),
+            "created_at": meta.get("created_at"),
+            "last_used": meta.get("last_used"),
+            "borrowers": _live_borrowers(meta, key),
+        })
+    return mirrors
+
+
+def _detach(borrower: Path, objects: str) -> None:
+    """
+    Make `borrower` own every object it used from `objects`, then stop
+    borrowing from it.
+    """
+    run_git_in(borrower, "repack", "-a", "-d", "-q")
+    git_dir = borrower / ".git" if (borrower / ".git").is_dir() else borrower
+    alternates = git_dir / "objects" / "info" / "alternates"
+    keep = [a for a in _alternates(borrower) if os.path.realpath(a) != os.path.realpath(objects)]
+    if keep:
+        alternates.write_text("".join(f"{a}\n" for a in keep), encoding="utf-8")
+    else:
+        alternates.unlink(missing_ok=True)
+
+
+def evict(key: str) -> None:
+    """
+    Remove one mirror, detaching its borrowers first.
+    """
+    path = mirror_path(key)
+    with _locked(key):
+        meta = _read_meta(key) or {}
+        objects = str(path / "objects")
+        for borrower in _live_borrowers(meta, key):
+            with span("mirror.detach", cat="git"):
+                _detach(Path(borrower), objects)
+        for lender in _alternates(path):
+            lender_key = Path(lender).parent.stem
+            if Path(lender).parent.parent == MIRROR_DIR:
+                with _locked(lender_key):
+                    lender_meta = _read_meta(lender_key)
+                    if lender_meta is not None:
+                        lender_meta["borrowers"] = [
+                            b for b in lender_meta.get("borrowers", []) if b != str(path)
+                        ]
+                        _write_meta(lender_key, lender_meta)
+        shutil.rmtree(path, ignore_errors=True)
+        _meta_path(key).unlink(missing_ok=True)
+
+
+def _epoch(value: Optional[str]) -> float:
+    if not value:
+        return 0.0
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def plan_prune(
+    mirrors: Iterable[dict],
+    max_size: Optional[int] = None,
+    older_than: Optional[float] = None,
+    keep: Iterable[str] = (),
+) -> List[dict]:
+    """
+    Mirrors to evict, least recently used first: those last used before
+    `older_than` (epoch seconds), then more until the total fits
+    `max_size`. Without either limit, all of them.
+    """
+    mirrors = list(mirrors)
+    protected = set(keep)
+    candidates = sorted(
+        (m for m in mirrors if m["key"] not in protected),
+        key=lambda m: _epoch(m["last_used"]),
+    )
+    if max_size is None and older_than is None:
+        return candidates
+
+    evict_list = []
+    if older_than is not None:
+        evict_list = [m for m in candidates if _epoch(m["last_used"]) < older_than]
+    if max_size is not None:
+        total = sum(m["size"] for m in mirrors) - sum(m["size"] for m in evict_list)
+        for mirror in candidates:
+            if total <= max_size:
+                break
+            if mirror in evict_list:
+                continue
+            evict_list.append(mirror)
+            total -= mirror["size"]
+    return sorted(evict_list, key=lambda m: _epoch(m["last_used"]))
+
+
+def prune(
+    max_size: Optional[int] = None,
+    older_than: Optional[float] = None,
+    dry_run: bool = False,
+    keep: Iterable[str] = (),
+) -> dict:
+    """
+    Evict mirrors chosen by plan_prune. Returns {"removed", "freed_bytes"}.
+    """
+    chosen = plan_prune(list_mirrors(), max_size, older_than, keep)
+    if not dry_run:
+        for mirror in chosen:
+            evict(mirror["key"])
+    return {"removed": chosen, "freed_bytes": sum(m["size"] for m in chosen)}
+
+
+def auto_prune(keep: Iterable[str] = ()) -> Optional[dict]:
+    """
+    Prune to LOLIPOP_MIRROR_MAX_SIZE if it is set; never raises.
+    """
+    limit = os.environ.get("LOLIPOP_MIRROR_MAX_SIZE")
+    if not limit:
+        return None
+    from lolipop.handlers.env_usage import parse_size
+
+    try:
+        return prune(max_size=parse_size(limit), keep=keep)
+    except Exception:
+        return None
@@ -0,0 +1,91 @@
+"""
+Lolipop run context
+
+Resolves everything `lolipop run` needs before executing anything, in
+two steps:
+
+- resolve_run: project dir and config. Read-only, so the daemon can
+  answer it from its caches; the result is plain JSON-serializable data
+- prepare_environment: environment creation and dependency installs.
+  Always runs in the client process: it can take minutes and must not
+  block the daemon's single request loop, nor race a daemon doing the
+  same work for a client that gave up waiting
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable, Optional
+
+from lolipop.modules.config_loader import LolipopConfig, load_project_config
+
+
+def resolve_run(
+    target: Path,
+    load_config: Optional[Callable[[Path], LolipopConfig]] = None,
+) -> dict:
+    target_path = target.resolve()
+    is_file = target_path.is_file()
+
+    project_dir = target_path.parent if is_file else target_path
+    cfg = (load_config or load_project_config)(project_dir)
+
+    return {
+        "target": str(target_path),
+        "is_file": is_file,
+        "project_dir": str(project_dir),
+        "name": cfg.name,
+        "scripts": cfg.scripts.get("run"),
+        "config_source": cfg.source,
+        "config_data": cfg.data,
+        "config_path": str(cfg.path) if cfg.path else None,
+        "watch_ignore": list((cfg.data.get("watch") or {}).get("ignore") or []),
+    }
+
+
+def prepare_environment(ctx: dict, offline: bool = False) -> dict:
+    """
+    Create/validate the environment and install dependencies for a
+    resolved run context; returns it with env_path and python_cmd.
+    """
+    from lolipop.handlers.environment import resolve_environment, create_base_environment
+    from lolipop.handlers.project_init import install_project_dependencies
+
+    cfg = LolipopConfig(
+        source=ctx["config_source"],
+        data=ctx["config_data"],
+        path=Path(ctx["config_path"]) if ctx["config_path"] else None,
+    )
+    project_dir = Path(ctx["project_dir"])
+
+    # -------------------------
+    # Environment
+    # -------------------------
+    env_cfg = cfg.environment or {}
+    env_path = (
+        resolve_environment(env_cfg)
+        if env_cfg.get("name")
+        else create_base_environment()
+    )
+
+    install_project_dependencies(cfg, project_dir, env_path, offline=offline)
+
+    lang = env_cfg.get("lang", "python")
+
+    if lang != "python":
+        raise RuntimeError(f"Unsupported language: {lang}")
+
+    return {
+        **ctx,
+        "env_path": str(env_path),
+        # the env's own interpreter; no PATH lookup needed
+        "python_cmd": str(env_path / "bin" / "python"),
+    }
+
+
+def prepare_run(
+    target: Path,
+    offline: bool = False,
+    load_config: Optional[Callable[[Path], LolipopConfig]] = None,
+) -> dict:
+    return prepare_environment(resolve_run(target, load_config), offline=offline)
@@ -2,42 +2,373 @@
 Script runner for lolipop
 
 Handles running scripts defined in the project configuration
+
+A script list is either a flat list of commands, run one after another
+exactly as before, or a task graph:
+
+    scripts:
+      run:
+        - name: codegen
+          run: make gen
+        - parallel:               # members run concurrently
+            - name: lint
+              run: ruff check .
+            - pytest -q
+        - name: assets
+          run: npm run build
+          depends_on: [codegen]   # explicit deps replace "after previous"
+
+Each entry depends on the previous entry (all members of a previous
+parallel group) unless it declares `depends_on`. Graph tasks run with
+a job limit, line-prefixed output, and fail-fast cancellation that
+kills each running task's whole process group.
 """
 
 from __future__ import annotations
 
 import os
+import queue
+import signal
 import subprocess
+import sys
+import threading
 from pathlib import Path
-from typing import Iterable
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from lolipop.modules.profiler import adopt, current_depth, span
+
+if TYPE_CHECKING:
+    from lolipop.handlers.step_state import StepState
+
+DEFAULT_JOBS = os.cpu_count() or 1
+
+# how often a running graph checks its `cancel` event
+CANCEL_POLL_INTERVAL = 0.05
 
 
 class ScriptExecutionError(Exception):
     pass
 
 
-def run_scripts(
-    scripts: Iterable[str],
-    project_dir: Path,
-    env_path: Path,
-) -> None:
-    if not scripts:
-        return
+class Task:
+    def __init__(self, name: str, cmd: str, deps: list[str], spec: dict | None = None):
+        self.name = name
+        self.cmd = cmd
+        self.deps = deps
+        self.spec = spec or {}
 
+    def __repr__(self) -> str:
+        return f"Task({self.name!r}, deps={self.deps!r})"
+
+
+# -------------------------
+# Environment
+# -------------------------
+def script_env(env_path: Path) -> dict:
     env = os.environ.copy()
 
     bin_dir = env_path / "bin"
     env["PATH"] = f"{bin_dir}{os.pathsep}{env.get('PATH', '')}"
     env["VIRTUAL_ENV"] = str(env_path)
+    return env
+
+
+# -------------------------
+# Schema
+# -------------------------
+def is_flat(scripts: Iterable) -> bool:
+    return all(isinstance(s, str) for s in scripts)
+
+
+def parse_tasks(scripts: Iterable) -> list[Task]:
+    """
+    Turn a `scripts` list into tasks with resolved dependencies.
+    """
+    tasks: list[Task] = []
+    names: set[str] = set()
+
+    def unique(base: str) -> str:
+        name, n = base, 2
+        while name in names:
+            name = f"{base}#{n}"
+            n += 1
+        names.add(name)
+        return name
+
+    def make(entry, prev: list[str]) -> Task:
+        if isinstance(entry, str):
+            return Task(unique(entry.split()[0] if entry.split() else "step"), entry, list(prev))
+
+        if not isinstance(entry, dict):
+            raise ScriptExecutionError(f"Invalid script entry: {entry!r}")
+
+        cmd = entry.get("run") or entry.get("cmd")
+        if not isinstance(cmd, str) or not cmd.strip():
+            raise ScriptExecutionError(f"Script entry needs a 'run' command: {entry!r}")
+
+        name = entry.get("name")
+        if name is not None:
+            name = str(name)
+            if name in names:
+                raise ScriptExecutionError(f"Duplicate task name: {name}")
+            names.add(name)
+        else:
+            name = unique(cmd.split()[0])
+
+        if "depends_on" in entry:
+            deps = entry["depends_on"] or []
+            deps = [deps] if isinstance(deps, str) else [str(d) for d in deps]
+        else:
+            deps = list(prev)
+
+        return Task(name, cmd, deps, entry)
+
+    prev: list[str] = []
+    for entry in scripts:
+        if isinstance(entry, dict) and "parallel" in entry:
+            members = entry["parallel"] or []
+            if not isinstance(members, list):
+                raise ScriptExecutionError("'parallel' must be a list of tasks")
+            group = [make(m, prev) for m in members]
+            tasks.extend(group)
+            prev = [t.name for t in group] or prev
+        else:
+            task = make(entry, prev)
+            tasks.append(task)
+            prev = [task.name]
+
+    known = {t.name for t in tasks}
+    for task in tasks:
+        missing = [d for d in task.deps if d not in known]
+        if missing:
+            raise ScriptExecutionError(
+                f"Task '{task.name}' depends on unknown task(s): {', '.join(missing)}"
+            )
+
+    _check_acyclic(tasks)
+    return tasks
+
+
+def _check_acyclic(tasks: list[Task]) -> None:
+    deps = {t.name: set(t.deps) for t in tasks}
+    while deps:
+        ready = [n for n, d in deps.items() if not d]
+        if not ready:
+            raise ScriptExecutionError(
+                f"Dependency cycle between tasks: {', '.join(sorted(deps))}"
+            )
+        for n in ready:
+            del deps[n]
+        for d in deps.values():
+            d.difference_update(ready)
+
+
+# -------------------------
+# Process groups
+# -------------------------
+def _popen_group(cmd: str, **kwargs) -> subprocess.Popen:
+    if os.name == "posix":
+        kwargs["start_new_session"] = True
+    return subprocess.Popen(cmd, shell=True, **kwargs)
+
+
+def kill_process_group(proc: subprocess.Popen, timeout: float = 5.0) -> None:
+    """
+    Terminate a task and everything it spawned; SIGKILL after `timeout`.
+    """
+    if proc.poll() is not None:
+        return
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGTERM)
+        else:
+            proc.terminate()
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+        proc.wait()
+    except ProcessLookupError:
+        pass
+
+
+# -------------------------
+# Graph executor
+# -------------------------
+class PrefixedOutput:
+    """
+    Serializes prefixed lines from concurrent tasks.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.lock = threading.Lock()
+
+    def line(self, prefix: str, text: str) -> None:
+        with self.lock:
+            self.stream.write(f"{prefix}{text}")
+            if not text.endswith("\n"):
+                self.stream.write("\n")
+            self.stream.flush()
+
+
+def _pump(
+    task: Task,
+    proc: subprocess.Popen,
+    out: PrefixedOutput,
+    width: int,
+    done: queue.Queue,
+    depth: int = 0,
+):
+    adopt(depth)
+    prefix = f"[{task.name}]".ljust(width + 2) + " "
+    assert proc.stdout is not None
+    with span(f"task {task.name}", cat="script", cmd=task.cmd):
+        for raw in iter(proc.stdout.readline, b""):
+            out.line(prefix, raw.decode("utf-8", errors="replace"))
+        proc.stdout.close()
+        code = proc.wait()
+    done.put((task.name, code))
+
+
+def run_task_graph(
+    tasks: list[Task],
+    project_dir: Path,
+    env: dict,
+    jobs: int = DEFAULT_JOBS,
+    cancel: Optional[threading.Event] = None,
+    state: Optional["StepState"] = None,
+    output: Optional[PrefixedOutput] = None,
+) -> None:
+    """
+    Execute tasks respecting dependencies, at most `jobs` at a time.
+    The first failure (or `cancel` being set) kills all running tasks
+    and nothing new is started. With `state`, tasks whose inputs are
+    unchanged since their last success are skipped. Graphs running side
+    by side should share one `output`.
+    """
+    if not tasks:
+        return
+
+    jobs = max(1, jobs)
+    out = output or PrefixedOutput()
+    width = max(len(t.name) for t in tasks)
+    by_name = {t.name: t for t in tasks}
+    waiting = {t.name: set(t.deps) for t in tasks}
+    running: dict[str, subprocess.Popen] = {}
+    done: queue.Queue = queue.Queue()
+    failed: Optional[Task] = None
+
+    def finish(name: str):
+        for deps in waiting.values():
+            deps.discard(name)
+
+    def start(task: Task):
+        proc = _popen_group(
+            task.cmd,
+            cwd=project_dir,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        running[task.name] = proc
+        threading.Thread(
+            target=_pump,
+            args=(task, proc, out, width, done, current_depth()),
+            daemon=True,
+        ).start()
+
+    def start_ready():
+        progress = True
+        while progress:
+            progress = False
+            for name in [n for n, d in waiting.items() if not d]:
+                if len(running) >= jobs:
+                    return
+                task = by_name[name]
+                del waiting[name]
+                progress = True
+                if state is not None and state.is_fresh(task.name, task.cmd, task.spec):
+                    out.line(f"[{task.name}]".ljust(width + 2) + " ", "skipped (unchanged)")
+                    finish(name)
+                    continue
+                start(task)
+
+    try:
+        start_ready()
+        while running:
+            try:
+                name, code = done.get(timeout=CANCEL_POLL_INTERVAL)
+            except queue.Empty:
+                if cancel is not None and cancel.is_set():
+                    break
+                continue
+
+            del running[name]
+            if code != 0:
+                failed = by_name[name]
+                if state is not None:
+                    state.forget(name)
+                break
+            if state is not None:
+                state.record(name)
+            finish(name)
+            if cancel is not None and cancel.is_set():
+                break
+            start_ready()
+    finally:
+        for proc in running.values():
+            kill_process_group(proc)
+        if state is not None:
+            state.save()
+
+    if failed is not None:
+        raise ScriptExecutionError(f"Command failed: {failed.cmd}")
+    if waiting and not (cancel is not None and cancel.is_set()):
+        raise ScriptExecutionError(
+            f"Tasks never became runnable: {', '.join(sorted(waiting))}"
+        )
+
+
+# -------------------------
+# Entry point
+# -------------------------
+def run_scripts(
+    scripts: Iterable,
+    project_dir: Path,
+    env_path: Path,
+    jobs: int = DEFAULT_JOBS,
+    state: Optional["StepState"] = None,
+) -> list[str]:
+    """
+    Run a script list. Returns the names of steps skipped as unchanged
+    (only task-graph steps with `inputs` can be skipped, and only when
+    `state` is given).
+    """
+    if not scripts:
+        return []
+
+    scripts = [scripts] if isinstance(scripts, str) else list(scripts)
+    env = script_env(env_path)
+
+    if not is_flat(scripts):
+        run_task_graph(parse_tasks(scripts), project_dir, env, jobs=jobs, state=state)
+        return list(state.skipped) if state is not None else []
 
     for cmd in scripts:
         try:
-            subprocess.run(
-                cmd,
-                shell=True,
-                cwd=project_dir,
-                env=env,
-                check=True,
-            )
+            with span("script", cat="script", cmd=cmd):
+                subprocess.run(
+                    cmd,
+                    shell=True,
+                    cwd=project_dir,
+                    env=env,
+                    check=True,
+                )
         except subprocess.CalledProcessError as e:
             raise ScriptExecutionError(f"Command failed: {cmd}") from e
+
+    return []
@@ -0,0 +1,139 @@
+"""
+Lolipop setup step state
+
+Remembers what each setup step saw on its last successful run, so
+unchanged steps can be skipped:
+
+    setup:
+      - name: deps
+        run: pip install -r requirements.txt
+        inputs: [requirements.txt]
+      - name: codegen
+        run: make proto
+        inputs: ["proto/**/*.proto"]
+        outputs: ["gen/**/*.py"]
+
+A step with `inputs` is skipped when its command, its input
+fingerprints (stat first, content hash second) and the environment
+identity all match its last successful run, and every `outputs` glob
+still matches at least one file. Steps without `inputs` always run.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable
+
+from lolipop.modules.app_support import get_lolipop_data_dir
+from lolipop.modules.fingerprint import fingerprint_files, same_content
+
+STATE_DIR = get_lolipop_data_dir(create=False) / "state" / "setup"
+
+
+def _as_list(value) -> list[str]:
+    if not value:
+        return []
+    return [value] if isinstance(value, str) else [str(v) for v in value]
+
+
+def expand_globs(project_dir: Path, patterns: Iterable[str]) -> list[Path]:
+    found: set[Path] = set()
+    for pattern in patterns:
+        for path in project_dir.glob(pattern):
+            if path.is_file():
+                found.add(path)
+    return sorted(found)
+
+
+def environment_identity(env_path: Path) -> str:
+    """
+    Cheap identity of a venv: its path plus pyvenv.cfg's stat, which
+    changes whenever the venv is recreated.
+    """
+    cfg = env_path / "pyvenv.cfg"
+    try:
+        st = cfg.stat()
+        return f"{env_path}|{st.st_size}|{st.st_mtime_ns}|{st.st_ino}"
+    except OSError:
+        return str(env_path)
+
+
+class StepState:
+    def __init__(self, project_dir: Path, env_path: Path, force: bool = False):
+        self.project_dir = project_dir.resolve()
+        self.env_id = environment_identity(env_path)
+        self.force = force
+
+        key = hashlib.sha1(str(self.project_dir).encode("utf-8")).hexdigest()[:16]
+        self.path = STATE_DIR / f"{key}.json"
+
+        self.steps: Dict[str, dict] = self._load()
+        self._pending: Dict[str, dict] = {}
+        self.skipped: list[str] = []
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if data.get("project") != str(self.project_dir):
+            return {}
+        return data.get("steps", {})
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(
+            json.dumps({"project": str(self.project_dir), "steps": self.steps}),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.path)
+
+    # -------------------------
+    # Decisions
+    # -------------------------
+    def is_fresh(self, name: str, cmd: str, spec: dict) -> bool:
+        """
+        Fingerprint the step's inputs and decide whether it can be skipped.
+        The fingerprint is kept and stored by `record` if the step runs.
+        """
+        inputs = _as_list(spec.get("inputs"))
+        if not inputs:
+            return False
+
+        last = self.steps.get(name) or {}
+        files = expand_globs(self.project_dir, inputs)
+        current = fingerprint_files(files, self.project_dir, last.get("inputs"))
+        self._pending[name] = {
+            "cmd": cmd,
+            "env": self.env_id,
+            "inputs": current,
+        }
+
+        if self.force or not last:
+            return False
+        if last.get("cmd") != cmd or last.get("env") != self.env_id:
+            return False
+        if not same_content(last.get("inputs", {}), current):
+            return False
+
+        for pattern in _as_list(spec.get("outputs")):
+            if not any(p.exists() for p in self.project_dir.glob(pattern)):
+                return False
+
+        # refresh stat signatures so the next run skips hashing
+        self.steps[name] = self._pending.pop(name)
+        self.skipped.append(name)
+        return True
+
+    def record(self, name: str) -> None:
+        pending = self._pending.pop(name, None)
+        if pending is not None:
+            self.steps[name] = pending
+
+    def forget(self, name: str) -> None:
+        self._pending.pop(name, None)
+        self.steps.pop(name, None)
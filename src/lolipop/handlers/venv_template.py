@@ -0,0 +1,240 @@
+"""
+Lolipop venv templates
+
+Fast environment creation: one pristine venv per interpreter is kept
+under LOLI_ENV_HOME/.templates and new environments are cloned from it
+instead of running `python -m venv` (and ensurepip) each time.
+
+Files are cloned copy-on-write (reflink) where the filesystem supports
+it, hardlinked otherwise, and copied as a last resort. Files that embed
+the venv path (pyvenv.cfg, activation scripts, console-script shebangs)
+are always rewritten as new files, never linked.
+
+Hardlinked files are shared with the template; tools like pip replace
+files rather than edit them in place, so the template stays pristine.
+"""
+
+from __future__ import annotations
+
+import errno
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+from typing import Optional
+
+TEMPLATE_DIR_NAME = ".templates"
+MARKER = ".lolipop-template"
+
+# files larger than this are never rewritten (not scripts)
+REWRITE_MAX_SIZE = 256 * 1024
+
+FICLONE = 0x40049409  # linux/fs.h
+
+
+class VenvTemplateError(Exception):
+    pass
+
+
+# -------------------------
+# Clone primitives
+# -------------------------
+def _reflink(src: str, dst: str) -> None:
+    if sys.platform.startswith("linux"):
+        import fcntl
+
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            try:
+                fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+            except OSError:
+                d.close()
+                os.unlink(dst)
+                raise
+        shutil.copystat(src, dst)
+        return
+
+    if sys.platform == "darwin":
+        import ctypes
+
+        libc = ctypes.CDLL("libc.dylib", use_errno=True)
+        if libc.clonefile(src.encode(), dst.encode(), 0) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), src)
+        return
+
+    raise OSError(errno.EOPNOTSUPP, "reflink not supported", src)
+
+
+class _Cloner:
+    """
+    Picks the fastest working strategy on the first file and sticks to it.
+    """
+
+    STRATEGIES = ("reflink", "hardlink", "copy")
+
+    def __init__(self, strategy: Optional[str] = None):
+        self.strategy = strategy or os.environ.get("LOLIPOP_VENV_CLONE") or "reflink"
+        if self.strategy not in self.STRATEGIES:
+            raise VenvTemplateError(f"Unknown clone strategy: {self.strategy}")
+
+    def clone(self, src: str, dst: str) -> None:
+        while True:
+            try:
+                if self.strategy == "reflink":
+                    _reflink(src, dst)
+                elif self.strategy == "hardlink":
+                    os.link(src, dst)
+                else:
+                    shutil.copy2(src, dst)
+                return
+            except OSError:
+                if self.strategy == "copy":
+                    raise
+                # downgrade for this and every following file
+                self.strategy = self.STRATEGIES[self.STRATEGIES.index(self.strategy) + 1]
+
+
+def _needs_rewrite(rel: str, size: int) -> bool:
+    if rel == "pyvenv.cfg":
+        return True
+    parts = rel.split(os.sep)
+    return parts[0] in ("bin", "Scripts") and len(parts) == 2 and size <= REWRITE_MAX_SIZE
+
+
+def clone_tree(template: Path, dest: Path, strategy: Optional[str] = None) -> str:
+    """
+    Clone a template venv to `dest`, rewriting embedded template paths.
+    Returns the clone strategy that was used.
+    """
+    src_root = str(template)
+    dst_root = str(dest)
+    old = src_root.encode()
+    new = dst_root.encode()
+    cloner = _Cloner(strategy)
+
+    os.makedirs(dst_root)
+    for dirpath, dirnames, filenames in os.walk(src_root):
+        rel_dir = os.path.relpath(dirpath, src_root)
+        out_dir = dst_root if rel_dir == "." else os.path.join(dst_root, rel_dir)
+
+        for name in list(dirnames):
+            src = os.path.join(dirpath, name)
+            dst = os.path.join(out_dir, name)
+            if os.path.islink(src):
+                dirnames.remove(name)  # e.g. lib64 -> lib
+                os.symlink(_relink(os.readlink(src), src_root, dst_root), dst)
+            else:
+                os.mkdir(dst)
+
+        for name in filenames:
+            if rel_dir == "." and name == MARKER:
+                continue
+            src = os.path.join(dirpath, name)
+            dst = os.path.join(out_dir, name)
+            rel = os.path.normpath(os.path.join(rel_dir, name))
+
+            if os.path.islink(src):
+                os.symlink(_relink(os.readlink(src), src_root, dst_root), dst)
+                continue
+
+            st = os.stat(src)
+            if _needs_rewrite(rel, st.st_size):
+                with open(src, "rb") as f:
+                    data = f.read()
+                if old in data:
+                    with open(dst, "wb") as f:
+                        f.write(data.replace(old, new))
+                    os.chmod(dst, st.st_mode & 0o7777)
+                    continue
+
+            cloner.clone(src, dst)
+
+    return cloner.strategy
+
+
+def _relink(target: str, src_root: str, dst_root: str) -> str:
+    if os.path.isabs(target) and (target == src_root or target.startswith(src_root + os.sep)):
+        return dst_root + target[len(src_root):]
+    return target
+
+
+# -------------------------
+# Templates
+# -------------------------
+def template_path(env_home: Path, python_cmd: str) -> Path:
+    """
+    One template per interpreter binary (keyed on its resolved path).
+    """
+    exe = shutil.which(python_cmd)
+    if exe is None:
+        raise VenvTemplateError(f"Python interpreter not found: {python_cmd}")
+    real = os.path.realpath(exe)
+    key = hashlib.sha1(real.encode("utf-8")).hexdigest()[:10]
+    return env_home / TEMPLATE_DIR_NAME / f"{Path(python_cmd).name}-{key}"
+
+
+def _template_valid(path: Path) -> bool:
+    if not (path / MARKER).is_file() or not (path / "pyvenv.cfg").is_file():
+        return False
+    python = path / "bin" / "python"
+    return python.exists()  # follows the symlink to the base interpreter
+
+
+def ensure_template(env_home: Path, python_cmd: str) -> Path:
+    path = template_path(env_home, python_cmd)
+    if _template_valid(path):
+        return path
+
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    shutil.rmtree(path, ignore_errors=True)
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        subprocess.run(
+            [python_cmd, "-m", "venv", str(tmp)],
+            check=True,
+            capture_output=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise VenvTemplateError(f"Failed to build template venv: {e}")
+
+    # paths inside the template must name its final location
+    old = str(tmp).encode()
+    new = str(path).encode()
+    for file in [tmp / "pyvenv.cfg", *(tmp / "bin").iterdir()]:
+        if file.is_symlink() or not file.is_file():
+            continue
+        data = file.read_bytes()
+        if old in data:
+            file.write_bytes(data.replace(old, new))
+
+    (tmp / MARKER).write_text(python_cmd, encoding="utf-8")
+    try:
+        os.rename(tmp, path)
+    except OSError:
+        # another process built it first
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not _template_valid(path):
+            raise VenvTemplateError(f"Failed to install template at {path}")
+    return path
+
+
+def clone_venv(env_home: Path, python_cmd: str, dest: Path) -> str:
+    """
+    Create `dest` as a clone of the template for `python_cmd`.
+    Returns the clone strategy used. Leaves nothing behind on failure.
+    """
+    template = ensure_template(env_home, python_cmd)
+    try:
+        return clone_tree(template, dest)
+    except Exception:
+        shutil.rmtree(dest, ignore_errors=True)
+        raise
+
+
+def remove_templates(env_home: Path) -> None:
+    shutil.rmtree(env_home / TEMPLATE_DIR_NAME, ignore_errors=True)
@@ -0,0 +1,339 @@
+"""
+Lolipop file watcher
+
+Recursive change notification for a project tree, used by
+`lolipop run --watch`.
+
+Backends:
+- inotify (Linux): kernel events through ctypes, one watch per directory,
+  new directories are picked up as they appear; no scanning at rest
+- poll: periodic stat scan, used everywhere else or when inotify is
+  unavailable (e.g. watch limit reached, also when it is reached later
+  by a new directory)
+
+LOLIPOP_WATCH_BACKEND=poll|inotify forces a backend. Paths matching
+the ignore globs (by name or by path relative to the root) are never
+watched or reported.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+
+DEFAULT_IGNORE = (
+    ".git",
+    ".hg",
+    ".svn",
+    "__pycache__",
+    ".venv",
+    "venv",
+    "node_modules",
+    ".mypy_cache",
+    ".pytest_cache",
+    ".ruff_cache",
+    "*.pyc",
+    "*.swp",
+    "*.swx",
+    "*~",
+    ".#*",
+    "4913",  # vim's write probe
+)
+
+DEFAULT_DEBOUNCE = 0.2
+POLL_INTERVAL = 0.5
+
+# linux/inotify.h
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+    | IN_ONLYDIR | IN_DONT_FOLLOW | IN_EXCL_UNLINK
+)
+
+_EVENT = struct.Struct("iIII")
+
+
+class WatchError(Exception):
+    pass
+
+
+class _Ignore:
+    def __init__(self, root: Path, patterns: Iterable[str]):
+        self.root = root
+        self.patterns = tuple(patterns)
+
+    def __call__(self, path: Path) -> bool:
+        try:
+            rel = path.relative_to(self.root).as_posix()
+        except ValueError:
+            return True
+        if rel == ".":
+            return False
+        name = path.name
+        return any(
+            fnmatch.fnmatch(name, p) or fnmatch.fnmatch(rel, p)
+            for p in self.patterns
+        )
+
+
+# -------------------------
+# inotify backend
+# -------------------------
+class _InotifyBackend:
+    name = "inotify"
+
+    def __init__(self, root: Path, ignored: _Ignore):
+        if not sys.platform.startswith("linux"):
+            raise WatchError("inotify is only available on Linux")
+
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise WatchError(f"inotify_init1 failed: {os.strerror(ctypes.get_errno())}")
+
+        self.root = root
+        self.ignored = ignored
+        self.dirs: Dict[int, Path] = {}
+        # set once a new directory could not be watched (limit reached);
+        # the Watcher then falls back to polling
+        self.exhausted = False
+        try:
+            self._watch_tree(root)
+        except WatchError:
+            os.close(self.fd)
+            raise
+
+    def _watch(self, directory: Path) -> None:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == 28:  # ENOSPC: fs.inotify.max_user_watches reached
+                raise WatchError("inotify watch limit reached")
+            return  # vanished or unreadable
+        self.dirs[wd] = directory
+
+    def _watch_tree(self, top: Path) -> None:
+        for dirpath, dirnames, _ in os.walk(top):
+            current = Path(dirpath)
+            dirnames[:] = [d for d in dirnames if not self.ignored(current / d)]
+            self._watch(current)
+
+    def _files_under(self, top: Path) -> Set[Path]:
+        found: Set[Path] = set()
+        for dirpath, dirnames, filenames in os.walk(top):
+            current = Path(dirpath)
+            dirnames[:] = [d for d in dirnames if not self.ignored(current / d)]
+            found.update(p for p in (current / f for f in filenames) if not self.ignored(p))
+        return found
+
+    def read(self, timeout: Optional[float]) -> Set[Path]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changed: Set[Path] = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                raw = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    # events were lost: re-sync watches and report the root
+                    try:
+                        self._watch_tree(self.root)
+                    except WatchError:
+                        self.exhausted = True
+                    changed.add(self.root)
+                    continue
+                if mask & IN_IGNORED:
+                    self.dirs.pop(wd, None)
+                    continue
+
+                directory = self.dirs.get(wd)
+                if directory is None:
+                    continue
+                path = directory / os.fsdecode(raw) if raw else directory
+                if self.ignored(path):
+                    continue
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        # files may land before the new watch exists
+                        try:
+                            self._watch_tree(path)
+                        except WatchError:
+                            # part of the tree is unwatched: report the root
+                            self.exhausted = True
+                            changed.add(self.root)
+                        changed.update(self._files_under(path))
+                    elif mask & (IN_DELETE | IN_MOVED_FROM):
+                        changed.add(path)
+                    continue
+                changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+# -------------------------
+# Polling backend
+# -------------------------
+class _PollBackend:
+    name = "poll"
+
+    def __init__(self, root: Path, ignored: _Ignore, interval: float = POLL_INTERVAL):
+        self.root = root
+        self.ignored = ignored
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot: Dict[str, Tuple[int, int]] = {}
+        stack = [str(self.root)]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if self.ignored(Path(entry.path)):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    snapshot[entry.path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def read(self, timeout: Optional[float]) -> Set[Path]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.interval
+            if deadline is not None:
+                wait = min(wait, max(0.0, deadline - time.monotonic()))
+            time.sleep(wait)
+
+            current = self._scan()
+            old = self.snapshot
+            self.snapshot = current
+            changed = {
+                Path(p)
+                for p in current.keys() | old.keys()
+                if current.get(p) != old.get(p)
+            }
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self) -> None:
+        pass
+
+
+# -------------------------
+# Public API
+# -------------------------
+class Watcher:
+    def __init__(
+        self,
+        root: Path,
+        ignore: Iterable[str] = (),
+        backend: Optional[str] = None,
+    ):
+        self.root = root.resolve()
+        ignored = _Ignore(self.root, (*DEFAULT_IGNORE, *ignore))
+        backend = backend or os.environ.get("LOLIPOP_WATCH_BACKEND")
+
+        if backend not in (None, "inotify", "poll"):
+            raise WatchError(f"Unknown watch backend: {backend}")
+
+        self._ignored = ignored
+        self._forced = backend
+        self._backend = None
+        if backend in (None, "inotify") and sys.platform.startswith("linux"):
+            try:
+                self._backend = _InotifyBackend(self.root, ignored)
+            except (WatchError, OSError, AttributeError):
+                if backend == "inotify":
+                    raise
+        if self._backend is None:
+            self._backend = _PollBackend(self.root, ignored)
+
+    @property
+    def backend(self) -> str:
+        return self._backend.name
+
+    def poll(self, timeout: Optional[float] = None) -> Set[Path]:
+        """
+        Wait up to `timeout` seconds (forever if None) for changes.
+        Returns the changed paths, or an empty set on timeout.
+        """
+        changed = self._backend.read(timeout)
+        if getattr(self._backend, "exhausted", False):
+            # same as at setup: poll instead, unless inotify was forced
+            if self._forced == "inotify":
+                raise WatchError("inotify watch limit reached")
+            self._backend.close()
+            self._backend = _PollBackend(self.root, self._ignored)
+        return changed
+
+    def changes(self, debounce: float = DEFAULT_DEBOUNCE) -> Iterator[Set[Path]]:
+        """
+        Yield one batch per burst of changes: a batch is emitted once no
+        further change arrived for `debounce` seconds.
+        """
+        while True:
+            batch = self.poll(None)
+            if not batch:
+                continue
+            while True:
+                more = self.poll(debounce)
+                if not more:
+                    break
+                batch |= more
+            yield batch
+
+    def close(self) -> None:
+        self._backend.close()
+
+    def __enter__(self) -> "Watcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
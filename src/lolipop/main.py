@@ -3,21 +3,72 @@ Lolipop entrypoint
 
 The entrypoint to lolipop utility.
 Receives commands, uses handlers for self and global arguments.
+
+Subcommands are registered lazily: a command's module (and whatever it
+imports) is only loaded when that command runs.
+
+`--profile` times the command's phases (see modules/profiler).
 """
 
+from pathlib import Path
+
+import click
 import typer
-from lolipop.commands.init import app as init_app
-from lolipop.commands.run import app as run_app
-from lolipop.commands.project import app as project_app
+from lolipop.modules.lazy_group import LazyGroup
+
+
+class LolipopGroup(LazyGroup):
+    lazy_commands = {
+        "init": ("lolipop.commands.init", "Initialize a Lolipop project"),
+        "install": ("lolipop.commands.install", "Install a project from a git url"),
+        "run": ("lolipop.commands.run", "Run a Lolipop project"),
+        "project": ("lolipop.commands.project", "Manage Lolipop projects"),
+        "env": ("lolipop.commands.env", "Manage Lolipop environments"),
+        "cache": ("lolipop.commands.cache", "Inspect and clear Lolipop caches"),
+        "daemon": ("lolipop.commands.daemon", "Manage the Lolipop background daemon"),
+        "python": ("lolipop.commands.python", "Discover Python interpreters"),
+    }
+
+    def invoke(self, ctx: click.Context):
+        trace = ctx.params.get("trace")
+        if not (ctx.params.get("profile") or trace):
+            return super().invoke(ctx)
+
+        # enabled before the subcommand module is imported, so imports are timed too
+        from lolipop.modules import profiler
+
+        profiler.enable()
+        try:
+            with profiler.span("lolipop"):
+                return super().invoke(ctx)
+        finally:
+            profiler.print_summary()
+            if trace:
+                profiler.write_chrome_trace(Path(trace))
 
 
-app = typer.Typer(help="🍭 Lolipop: A developer utility for installing, setting up, and managing projects and environments effortlessly.", no_args_is_help=True)
+app = typer.Typer(
+    cls=LolipopGroup,
+    help="🍭 Lolipop: A developer utility for installing, setting up, and managing projects and environments effortlessly.",
+    no_args_is_help=True,
+)
 
-# Register commands
-app.add_typer(init_app, name="init")
-app.add_typer(run_app, name="run")
-app.add_typer(project_app, name="project")
 
+@app.callback()
+def callback(
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        envvar="LOLIPOP_PROFILE",
+        help="Print a per-phase timing summary to stderr",
+    ),
+    trace: Path | None = typer.Option(
+        None,
+        "--trace",
+        help="Write a Chrome trace-event JSON file (implies --profile)",
+    ),
+):
+    pass
 
 
 def main():
@@ -2,7 +2,7 @@ from pathlib import Path
 import os
 import platform
 
-def get_lolipop_data_dir(app_name: str = "lolipop") -> Path:
+def get_lolipop_data_dir(app_name: str = "lolipop", create: bool = True) -> Path:
     system = platform.system()
 
     if system == "Darwin":  # macOS
@@ -13,5 +13,6 @@ def get_lolipop_data_dir(app_name: str = "lolipop") -> Path:
         base = Path.home() / ".local" / "share"
 
     path = base / app_name
-    path.mkdir(parents=True, exist_ok=True)
+    if create:
+        path.mkdir(parents=True, exist_ok=True)
     return path
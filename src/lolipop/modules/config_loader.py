@@ -5,14 +5,28 @@ Handles loading configuration from:
 - lolipop.yaml / lolipop.yml
 - loli.yaml / loli.yml
 - pyproject.toml ([tool.lolipop])
+
+Parsed results are cached under the lolipop data dir, keyed on the
+file's path, mtime_ns, size and inode, so an unchanged config is never
+re-parsed. Set LOLIPOP_NO_CONFIG_CACHE=1 to bypass the cache.
 """
 
 from __future__ import annotations
 
-import tomllib
-import yaml
+import hashlib
+import os
+import pickle
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict
+
+from lolipop.modules.app_support import get_lolipop_data_dir
+from lolipop.modules.profiler import span, traced
+
+CONFIG_CACHE_DIR = get_lolipop_data_dir(create=False) / "cache" / "config"
+CACHE_FORMAT = 1
+
+# project config files, in lookup order (pyproject.toml comes last)
+CONFIG_FILENAMES = ("lolipop.yaml", "lolipop.yml", "loli.yaml", "loli.yml")
 
 
 class LolipopConfigError(Exception):
@@ -64,16 +78,112 @@ class LolipopConfig:
         return self.data.get("command", {})
 
 
+# --------------------------------------------------
+# Parsed-config cache
+# --------------------------------------------------
+
+def _cache_enabled() -> bool:
+    return not os.environ.get("LOLIPOP_NO_CONFIG_CACHE")
+
+
+def _cache_file(path: Path) -> Path:
+    key = hashlib.sha1(str(path).encode("utf-8")).hexdigest()
+    return CONFIG_CACHE_DIR / f"{key}.pickle"
+
+
+def _stat_key(st: os.stat_result) -> tuple:
+    return (CACHE_FORMAT, st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _cached_parse(path: Path, parse: Callable[[Path], Any]) -> Any:
+    """
+    Return parse(path), reusing the cached result while the file's
+    (mtime_ns, size, inode) is unchanged.
+    """
+    if not _cache_enabled():
+        with span("config.parse", cat="config", file=str(path)):
+            return parse(path)
+
+    path = path.resolve()
+    stat_key = _stat_key(path.stat())
+    cache_file = _cache_file(path)
+
+    try:
+        with cache_file.open("rb") as f:
+            entry = pickle.load(f)
+        if entry.get("path") == str(path) and entry.get("stat") == stat_key:
+            return entry["data"]
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, TypeError):
+        pass
+
+    with span("config.parse", cat="config", file=str(path)):
+        data = parse(path)
+
+    try:
+        CONFIG_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with tmp.open("wb") as f:
+            pickle.dump(
+                {"path": str(path), "stat": stat_key, "data": data},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp, cache_file)
+    except OSError:
+        pass  # caching is best effort
+
+    return data
+
+
+def config_cache_info() -> Dict[str, Any]:
+    entries = []
+    if CONFIG_CACHE_DIR.is_dir():
+        for file in CONFIG_CACHE_DIR.glob("*.pickle"):
+            try:
+                with file.open("rb") as f:
+                    entry = pickle.load(f)
+                source = entry.get("path")
+            except Exception:
+                source = None
+            entries.append(
+                {"file": str(file), "path": source, "size": file.stat().st_size}
+            )
+    return {
+        "dir": str(CONFIG_CACHE_DIR),
+        "enabled": _cache_enabled(),
+        "entries": entries,
+        "bytes": sum(e["size"] for e in entries),
+    }
+
+
+def clear_config_cache() -> int:
+    removed = 0
+    if CONFIG_CACHE_DIR.is_dir():
+        for file in CONFIG_CACHE_DIR.iterdir():
+            file.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
 # --------------------------------------------------
 # YAML loader
 # --------------------------------------------------
 
+def _parse_yaml(path: Path) -> Any:
+    import yaml
+
+    # libyaml is much faster when it is available
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with path.open("rb") as f:
+        return yaml.load(f, Loader=loader)
+
+
 def load_lolipop_yaml(path: Path) -> LolipopConfig:
     if not path.exists():
         raise LolipopConfigError(f"Config file not found: {path}")
 
     try:
-        data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+        data = _cached_parse(path, _parse_yaml) or {}
     except Exception as e:
         raise LolipopConfigError(f"Failed to load YAML {path}: {e}")
 
@@ -87,17 +197,23 @@ def load_lolipop_yaml(path: Path) -> LolipopConfig:
 # pyproject.toml loader
 # --------------------------------------------------
 
+def _parse_pyproject(path: Path) -> Any:
+    import tomllib
+
+    # only [tool.lolipop] is cached, not the whole pyproject
+    with path.open("rb") as f:
+        return tomllib.load(f).get("tool", {}).get("lolipop")
+
+
 def load_pyproject(path: Path) -> LolipopConfig | None:
     if not path.exists():
         return None
 
     try:
-        with path.open("rb") as f:
-            pyproject = tomllib.load(f)
+        lolipop = _cached_parse(path, _parse_pyproject)
     except Exception:
         return None
 
-    lolipop = pyproject.get("tool", {}).get("lolipop")
     if not isinstance(lolipop, dict):
         return None
 
@@ -108,8 +224,9 @@ def load_pyproject(path: Path) -> LolipopConfig | None:
 # Resolver
 # --------------------------------------------------
 
+@traced("config.load", cat="config")
 def load_project_config(project_dir: Path) -> LolipopConfig:
-    for name in ("lolipop.yaml", "lolipop.yml", "loli.yaml", "loli.yml"):
+    for name in CONFIG_FILENAMES:
         path = project_dir / name
         if path.exists():
             return load_lolipop_yaml(path)
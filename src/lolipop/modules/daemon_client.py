@@ -0,0 +1,67 @@
+"""
+Lolipop daemon client
+
+Thin client for the optional lolipop daemon (see handlers/daemon).
+Only imports the standard library so callers stay cheap; every call
+raises DaemonUnavailable when no daemon is listening, and callers fall
+back to doing the work in-process.
+
+Set LOLIPOP_NO_DAEMON=1 to never use the daemon.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+from typing import Any
+
+from lolipop.modules.app_support import get_lolipop_data_dir
+
+SOCKET_PATH = get_lolipop_data_dir(create=False) / "daemon.sock"
+TIMEOUT = 30.0
+
+
+class DaemonUnavailable(Exception):
+    pass
+
+
+class DaemonError(Exception):
+    """The daemon handled the request and reported an error."""
+
+
+def enabled() -> bool:
+    return (
+        hasattr(socket, "AF_UNIX")
+        and not os.environ.get("LOLIPOP_NO_DAEMON")
+        and SOCKET_PATH.exists()
+    )
+
+
+def call(op: str, timeout: float = TIMEOUT, **args: Any) -> Any:
+    if not enabled():
+        raise DaemonUnavailable("daemon not running")
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(SOCKET_PATH))
+            sock.sendall(json.dumps({"op": op, "args": args}).encode("utf-8") + b"\n")
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                if chunk.endswith(b"\n"):
+                    break
+    except OSError as e:
+        raise DaemonUnavailable(str(e))
+
+    if not chunks:
+        raise DaemonUnavailable("daemon closed the connection")
+
+    response = json.loads(b"".join(chunks))
+    if not response.get("ok"):
+        raise DaemonError(response.get("error") or "daemon request failed")
+    return response.get("result")
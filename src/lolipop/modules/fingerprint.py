@@ -0,0 +1,80 @@
+"""
+Lolipop file fingerprinting
+
+Stat-first change detection: a file is only re-hashed when its
+(size, mtime_ns, inode) differs from the previously recorded entry.
+Hashing streams bytes (large files are mmapped), so files of any size
+or encoding are handled.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+CHUNK_SIZE = 1 << 20
+MMAP_THRESHOLD = 16 << 20
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size >= MMAP_THRESHOLD:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    h.update(m)
+                return h.hexdigest()
+            except (OSError, ValueError):
+                pass  # not mappable (special file, odd fs): stream instead
+        while chunk := f.read(CHUNK_SIZE):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def stat_signature(st: os.stat_result) -> list:
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+def fingerprint_file(path: Path, previous: Optional[dict] = None) -> Optional[dict]:
+    """
+    Returns {"stat": [size, mtime_ns, inode], "sha256": ...} or None if
+    the file does not exist. `previous` is an earlier result for the
+    same path; its hash is reused when the stat signature matches.
+    """
+    try:
+        st = path.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+    signature = stat_signature(st)
+    if previous and previous.get("stat") == signature and previous.get("sha256"):
+        return previous
+
+    return {"stat": signature, "sha256": file_digest(path)}
+
+
+def fingerprint_files(
+    paths: Iterable[Path],
+    base: Path,
+    previous: Optional[Dict[str, dict]] = None,
+) -> Dict[str, dict]:
+    """
+    Fingerprint many files, keyed by path relative to `base`.
+    """
+    previous = previous or {}
+    result: Dict[str, dict] = {}
+    for path in paths:
+        rel = path.relative_to(base).as_posix() if path.is_absolute() else path.as_posix()
+        fp = fingerprint_file(base / rel, previous.get(rel))
+        if fp is not None:
+            result[rel] = fp
+    return result
+
+
+def same_content(a: Dict[str, dict], b: Dict[str, dict]) -> bool:
+    if a.keys() != b.keys():
+        return False
+    return all(a[k].get("sha256") == b[k].get("sha256") for k in a)
@@ -0,0 +1,81 @@
+"""
+Lolipop lazy command group
+
+Click/Typer group that only imports a subcommand's module when that
+subcommand is actually invoked. Help listings use the registered help
+text, so `lolipop --help` never imports command modules.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import Dict, Tuple
+
+import click
+from typer.core import TyperGroup
+
+
+# name -> (module path, short help)
+LazyCommands = Dict[str, Tuple[str, str]]
+
+
+class LazyGroup(TyperGroup):
+    """
+    Subclass and set `lazy_commands`, then pass it as `cls=` to typer.Typer.
+    Each module must expose a Typer instance named `app`.
+    """
+
+    lazy_commands: LazyCommands = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._listing = False
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        eager = super().list_commands(ctx)
+        return eager + [n for n in self.lazy_commands if n not in self.commands]
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        if cmd_name in self.commands:
+            return self.commands[cmd_name]
+
+        entry = self.lazy_commands.get(cmd_name)
+        if entry is None:
+            return None
+
+        module_path, help_text = entry
+
+        # Help / completion only needs the name and short help
+        if self._listing or ctx.resilient_parsing:
+            return click.Command(cmd_name, help=help_text, short_help=help_text)
+
+        return self._load(cmd_name, module_path)
+
+    def format_help(self, ctx: click.Context, formatter: click.HelpFormatter) -> None:
+        self._listing = True
+        try:
+            super().format_help(ctx, formatter)
+        finally:
+            self._listing = False
+
+    def _load(self, cmd_name: str, module_path: str) -> click.Command:
+        import typer.main
+
+        module = importlib.import_module(module_path)
+        app = module.app
+        # built as subcommands, not top-level apps: get_command would add
+        # --install-completion/--show-completion to every one of them
+        if (
+            len(app.registered_commands) == 1
+            and not (app.registered_callback or app.info.callback or app.registered_groups)
+        ):
+            command = typer.main.get_command_from_info(
+                app.registered_commands[0],
+                pretty_exceptions_short=app.pretty_exceptions_short,
+                rich_markup_mode=app.rich_markup_mode,
+            )
+        else:
+            command = typer.main.get_group(app)
+        command.name = cmd_name
+        self.commands[cmd_name] = command
+        return command
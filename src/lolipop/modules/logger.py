@@ -3,18 +3,25 @@ Lolipop logger module
 
 """
 
-from rich.console import Console
+_console = None
 
-console = Console()
+
+def get_console():
+    # rich is imported on first output, not on `import lolipop`
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
 
 def info(msg: str):
-    console.print(f"[cyan]ℹ {msg}[/cyan]")
+    get_console().print(f"[cyan]ℹ {msg}[/cyan]")
 
 def success(msg: str):
-    console.print(f"[green]✔ {msg}[/green]")
+    get_console().print(f"[green]✔ {msg}[/green]")
 
 def warn(msg: str):
-    console.print(f"[yellow]⚠ {msg}[/yellow]")
+    get_console().print(f"[yellow]⚠ {msg}[/yellow]")
 
 def error(msg: str):
-    console.print(f"[red]✖ {msg}[/red]")
+    get_console().print(f"[red]✖ {msg}[/red]")
@@ -0,0 +1,207 @@
+"""
+Lolipop profiler
+
+Lightweight phase timing. Code marks phases with
+
+    with span("env.create", env=name):
+        ...
+
+or decorates functions with @traced("git.info"). While profiling is
+off (the default) `span` returns a shared no-op context manager, so an
+instrumented call costs one global check.
+
+`lolipop --profile <command>` enables it, prints a per-phase summary to
+stderr, and `--trace FILE` also writes Chrome trace-event JSON (open it
+in chrome://tracing or https://ui.perfetto.dev).
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+_enabled = False
+_events: List[dict] = []
+_lock = threading.Lock()
+_local = threading.local()
+_origin_ns = 0
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "cat", "args", "start", "depth")
+
+    def __init__(self, name: str, cat: str, args: Dict[str, Any]):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.depth = len(stack) + getattr(_local, "base", 0)
+        stack.append(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        _local.stack.pop()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        event = {
+            "name": self.name,
+            "cat": self.cat,
+            "start": self.start,
+            "dur": end - self.start,
+            "depth": self.depth,
+            "tid": threading.get_ident(),
+            "args": self.args,
+        }
+        with _lock:
+            _events.append(event)
+        return False
+
+
+# -------------------------
+# Control
+# -------------------------
+def enable() -> None:
+    global _enabled, _origin_ns
+    if not _enabled:
+        _origin_ns = time.perf_counter_ns()
+        _enabled = True
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    global _enabled
+    _enabled = False
+    with _lock:
+        _events.clear()
+
+
+# -------------------------
+# Instrumentation
+# -------------------------
+def span(name: str, cat: str = "lolipop", **args: Any):
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, cat, args)
+
+
+def current_depth() -> int:
+    return len(getattr(_local, "stack", ())) + getattr(_local, "base", 0)
+
+
+def adopt(depth: int) -> None:
+    """
+    Nest spans of the calling (worker) thread under a span of the thread
+    that started it; pass the parent's current_depth().
+    """
+    _local.base = depth
+
+
+def traced(name: Optional[str] = None, cat: str = "lolipop") -> Callable:
+    def decorate(fn: Callable) -> Callable:
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(label, cat, {}):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+# -------------------------
+# Reporting
+# -------------------------
+def events() -> List[dict]:
+    with _lock:
+        return sorted(_events, key=lambda e: e["start"])
+
+
+def summary() -> List[dict]:
+    """
+    One row per span name, in order of first occurrence:
+    {"name", "depth", "count", "total_ms", "max_ms"}.
+    """
+    rows: Dict[str, dict] = {}
+    for event in events():
+        row = rows.get(event["name"])
+        if row is None:
+            row = rows[event["name"]] = {
+                "name": event["name"],
+                "depth": event["depth"],
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+            }
+        ms = event["dur"] / 1e6
+        row["count"] += 1
+        row["total_ms"] += ms
+        row["max_ms"] = max(row["max_ms"], ms)
+        row["depth"] = min(row["depth"], event["depth"])
+    return list(rows.values())
+
+
+def print_summary(stream: TextIO = sys.stderr) -> None:
+    rows = summary()
+    if not rows:
+        return
+    width = max(len(r["name"]) + 2 * r["depth"] for r in rows)
+    stream.write(f"\n{'phase':<{width}}  {'count':>5}  {'total ms':>10}  {'max ms':>10}\n")
+    for r in rows:
+        label = "  " * r["depth"] + r["name"]
+        stream.write(
+            f"{label:<{width}}  {r['count']:>5}  {r['total_ms']:>10.2f}  {r['max_ms']:>10.2f}\n"
+        )
+
+
+def write_chrome_trace(path: Path) -> None:
+    pid = os.getpid()
+    trace = [
+        {
+            "name": e["name"],
+            "cat": e["cat"],
+            "ph": "X",
+            "ts": (e["start"] - _origin_ns) / 1000,
+            "dur": e["dur"] / 1000,
+            "pid": pid,
+            "tid": e["tid"],
+            "args": e["args"],
+        }
+        for e in events()
+    ]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps({"traceEvents": trace, "displayTimeUnit": "ms"}, default=str),
+        encoding="utf-8",
+    )